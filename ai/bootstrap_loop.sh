@@ -46,6 +46,11 @@ cd "$REPO_ROOT"
 
 # v7 Drift Engine and Convergence
 : "${DRIFT_ENGINE:=ai/drift_engine.py}"
+: "${STATE_TOOLKIT:=ai/scripts/state_toolkit.py}"
+: "${ERROR_CLASSIFIER:=ai/scripts/error_classifier.py}"
+# Failure counters mirrored from errors.json into the append-only metrics store
+: "${METRICS_FILE:=${STATE_DIR}/metrics.json}"
+export METRICS_FILE
 : "${ARCHITECTURE_MEMO:=docs/master_memo.txt}"
 : "${DRIFT_STATE_FILE:=ai/state/drift.json}"
 : "${NOW_STATE_FILE:=ai/state/now.json}"
@@ -374,63 +379,11 @@ break_router_sticky_route() {
   if [ -z "$ROUTER_STATE_FILE" ]; then
     return
   fi
-  python3 - "$ROUTER_STATE_FILE" "$role" "$error_key" <<'PY'
-import json, sys, os
-
-path, role, key = sys.argv[1:4]
-try:
-    data = json.load(open(path))
-except (FileNotFoundError, json.JSONDecodeError):
-    sys.exit(0)
-
-episode_routes = data.get("episode_routes", {})
-episode = episode_routes.get(key, {})
-if not episode or role not in episode:
-    sys.exit(0)
-
-episode.pop(role, None)
-if episode:
-    episode_routes[key] = episode
-else:
-    episode_routes.pop(key, None)
-
-data["episode_routes"] = episode_routes
-with open(path, "w") as fh:
-    json.dump(data, fh, indent=2)
-PY
+  state_toolkit router-break-sticky "$ROUTER_STATE_FILE" "$role" "$error_key"
 }
 
 are_all_executor_providers_unhealthy() {
-  python3 - "$MODEL_ROUTER_CONFIG" "$ROUTER_STATE_FILE" <<'PY'
-import json
-import sys
-import os
-
-config_path, state_path = sys.argv[1], sys.argv[2]
-try:
-    with open(config_path) as cfgf:
-        config = json.load(cfgf)
-except (json.JSONDecodeError, FileNotFoundError):
-    print("false")
-    sys.exit(0)
-try:
-    with open(state_path) as sf:
-        state = json.load(sf)
-except (json.JSONDecodeError, FileNotFoundError):
-    state = {}
-
-executors = config.get("roles", {}).get("executor", {}).get("priority", [])
-providers = state.get("providers", {})
-
-for candidate in executors:
-    entry = providers.get(candidate, {})
-    health = entry.get("health", "healthy")
-    circuit = entry.get("circuit_state", "closed")
-    if health in ("healthy", "degraded") and circuit != "open":
-        print("false")
-        sys.exit(0)
-print("true")
-PY
+  state_toolkit router-executors-unhealthy "$MODEL_ROUTER_CONFIG" "$ROUTER_STATE_FILE"
 }
 
 set_orchestrator_status() {
@@ -438,25 +391,7 @@ set_orchestrator_status() {
   local reason="$2"
   local timestamp
   timestamp="$(date -u +%Y-%m-%dT%H:%M:%SZ)"
-  python3 - "$STATE_DIR/status.json" "$status_value" "$reason" "$timestamp" <<'PY'
-import json
-import os
-import sys
-
-path, status_value, reason, ts = sys.argv[1:5]
-data = {}
-if os.path.exists(path):
-    try:
-        with open(path) as fh:
-            data = json.load(fh)
-    except json.JSONDecodeError:
-        data = {}
-data["orchestrator_status"] = status_value
-data["safe_mode_reason"] = reason
-data["safe_mode_timestamp"] = ts
-with open(path, "w") as fh:
-    json.dump(data, fh, indent=2)
-PY
+  state_toolkit orchestrator-status "$STATE_DIR/status.json" "$status_value" "$reason" "$timestamp"
 }
 
 enter_safe_mode() {
@@ -468,27 +403,7 @@ enter_safe_mode() {
   local executor_health
   executor_health="$("$MODEL_ROUTER_CMD" status executor 2>/dev/null || echo '{}')"
 
-  python3 - "$SAFE_MODE_SUMMARY" "$stage" "$error_key" "$reason" "$executor_health" "$timestamp" <<'PY'
-import json
-import sys
-import os
-
-path, stage, error_key, reason, executor_health, timestamp = sys.argv[1:7]
-try:
-    executor_state = json.loads(executor_health)
-except json.JSONDecodeError:
-    executor_state = executor_health
-summary = {
-    "mode": "safe",
-    "entered_at": timestamp,
-    "stage": stage,
-    "error_key": error_key,
-    "reason": reason,
-    "executor_health": executor_state
-}
-with open(path, "w") as fh:
-    json.dump(summary, fh, indent=2)
-PY
+  state_toolkit safe-mode-summary "$SAFE_MODE_SUMMARY" "$stage" "$error_key" "$reason" "$executor_health" "$timestamp"
 
   printf '[%s] SAFE MODE: %s (stage=%s error_key=%s)\n' "$timestamp" "$reason" "$stage" "$error_key" >> "$ISSUES_FILE"
   set_orchestrator_status "halted_safe_mode" "$reason"
@@ -514,40 +429,6 @@ redact_secrets() {
   ' || true
 }
 
-# =============================================================================
-# Log Normalization (v5 requirement for stable error hashes)
-# =============================================================================
-normalize_log() {
-  sed -E '
-    s/[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}:[0-9]{2}[^ ]* //g
-    s/attempt[ _]?[0-9]+//gi
-    s/retry[ _#]?[0-9]+//gi
-    s|/tmp/[^ ]*||g
-    s|/var/folders/[^ ]*||g
-    s/\x1b\[[0-9;]*m//g
-    s/[[:space:]]+/ /g
-    s/^[[:space:]]+//
-    s/[[:space:]]+$//
-  ' || true
-}
-
-# =============================================================================
-# Error Signature Extraction (v5: first fatal line + last 60 lines)
-# =============================================================================
-extract_error_signature() {
-  local log_file="$1"
-  local fatal_line tail_lines
-  # Find first fatal/error line
-  fatal_line="$(grep -i -m1 -E '(error:|fatal:|failed:|panic:|exited with code [1-9])' "$log_file" 2>/dev/null || true)"
-  # Get last 60 lines
-  tail_lines="$(tail -n 60 "$log_file" 2>/dev/null || true)"
-  if [ -n "$fatal_line" ]; then
-    printf '%s\n%s' "$fatal_line" "$tail_lines"
-  else
-    tail -n 100 "$log_file" 2>/dev/null || true  # fallback
-  fi
-}
-
 # =============================================================================
 # Transient Failure Detection (v5 requirement)
 # =============================================================================
@@ -603,22 +484,7 @@ cleanup_stale_lock() {
   fi
 
   local lock_age
-  lock_age="$(
-printf '%s' "$existing_started" | python3 <<'PY'
-import datetime, sys
-
-timestamp = sys.stdin.read().strip()
-try:
-    started = datetime.datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%SZ")
-    now = datetime.datetime.utcnow()
-    delta = int((now - started).total_seconds())
-    if delta < 0:
-        delta = 0
-    print(delta)
-except Exception:
-    print(0)
-PY
-  )"
+  lock_age="$(state_toolkit lock-age "$existing_started")"
 
   log "Clearing stale lock $LOCK_DIR (pid=${existing_pid:-unknown} age=${lock_age}s) because pid not running"
   rm -rf "$LOCK_DIR" >/dev/null 2>&1 || true
@@ -830,6 +696,11 @@ atomic_json_write() {
   mv "$temp_file" "$target_file"
 }
 
+# JSON state reads/writes (errors.json, stage_status.json, give_up.json, ...)
+state_toolkit() {
+  python3 "$STATE_TOOLKIT" "$@"
+}
+
 ensure_state_files() {
   if [ ! -f "$ERRORS_JSON" ]; then
     atomic_json_write "$ERRORS_JSON" '{}'
@@ -869,92 +740,21 @@ record_give_up_entry() {
     evidence_capsule="$(python3 ai/drift_engine.py evidence --stage "$stage" --json 2>/dev/null || echo "{}")"
   fi
 
-  local payload
-  payload="$(
-python3 - "$GIVE_UP_STATE_FILE" "$stage" "$command" "$log_path" "$next_action" "$probe_summary" "$evidence_capsule" <<'PY'
-import json, os, sys
-from datetime import datetime, timezone
-
-path, stage, command, log_path, next_action, probe_summary, evidence_json = sys.argv[1:8]
-
-data = {}
-if os.path.exists(path):
-    try:
-        data = json.load(open(path))
-    except json.JSONDecodeError:
-        data = {}
-
-# Parse evidence capsule
-evidence = {}
-try:
-    evidence = json.loads(evidence_json) if evidence_json else {}
-except json.JSONDecodeError:
-    pass
-
-# v7 P0: Use evidence capsule to enrich the entry
-entry = {
-    "stage": stage,
-    "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
-    "last_command": command,
-    "log_path": evidence.get("log_path", log_path) or log_path or "unknown",
-    "next_action": evidence.get("suggested_next_action", next_action) or next_action or "Review logs",
-    "probe_summary": probe_summary,
-    # v7 P0 additions:
-    "failing_claim_id": evidence.get("failing_claim_id"),
-    "failing_claim_evidence": evidence.get("failing_claim_evidence"),
-    "evidence_excerpt": evidence.get("evidence_excerpt", "")[:500],
-    "gating_status": evidence.get("gating_status", {}),
-}
-
-data[stage] = entry
-print(json.dumps(data, indent=2))
-PY
-  )"
-  atomic_json_write "$GIVE_UP_STATE_FILE" "$payload"
+  state_toolkit give-up-record "$GIVE_UP_STATE_FILE" "$stage" "$command" "$log_path" "$next_action" "$probe_summary" "$evidence_capsule"
 }
 
 clear_stage_give_up_entry() {
   if [ ! -f "$GIVE_UP_STATE_FILE" ]; then
     return 0
   fi
-
-  local payload
-  payload="$(
-python3 - "$GIVE_UP_STATE_FILE" "$stage" <<'PY'
-import json, os, sys
-
-path, stage = sys.argv[1:3]
-data = {}
-if os.path.exists(path):
-    try:
-        data = json.load(open(path))
-    except json.JSONDecodeError:
-        data = {}
-data.pop(stage, None)
-print(json.dumps(data, indent=2))
-PY
-  )"
-  atomic_json_write "$GIVE_UP_STATE_FILE" "$payload"
+  state_toolkit give-up-clear "$GIVE_UP_STATE_FILE" "$stage"
 }
 
 get_stage_give_up_info() {
   if [ ! -f "$GIVE_UP_STATE_FILE" ]; then
     return 1
   fi
-  python3 - <<'PY' "$GIVE_UP_STATE_FILE" "$1"
-import json, sys
-
-path, stage = sys.argv[1:3]
-try:
-    data = json.load(open(path))
-except (json.JSONDecodeError, FileNotFoundError):
-    sys.exit(1)
-entry = data.get(stage)
-if not entry:
-    sys.exit(1)
-print(entry.get("next_action", ""))
-print(entry.get("log_path", ""))
-PY
+  state_toolkit give-up-info "$GIVE_UP_STATE_FILE" "$1"
 }
 
 print_stage_give_up_notice() {
@@ -979,45 +779,7 @@ reset_give_up_stage() {
     return 1
   fi
 
-  python3 - <<'PY' "$GIVE_UP_STATE_FILE" "$stage" "$force"
-import json, os, sys
-from datetime import datetime, timezone
-
-path, stage, force_flag = sys.argv[1:4]
-force = force_flag == "true"
-data = {}
-if os.path.exists(path):
-    try:
-        data = json.load(open(path))
-    except json.JSONDecodeError:
-        data = {}
-entry = data.get(stage)
-if not entry:
-    print(f"No give_up entry for stage {stage}")
-    sys.exit(1)
-ts = entry.get("timestamp")
-age = 1e9
-if ts:
-    try:
-        iso = ts
-        if iso.endswith("Z"):
-            iso = iso[:-1] + "+00:00"
-        last = datetime.fromisoformat(iso)
-        if last.tzinfo is None:
-            last = last.replace(tzinfo=timezone.utc)
-        age = (datetime.now(timezone.utc) - last).total_seconds()
-    except ValueError:
-        age = 1e9
-if age < 300 and not force:
-    print(f"Cannot reset {stage}: give_up recorded {int(age)}s ago. Use --force to override.")
-    sys.exit(2)
-data.pop(stage, None)
-with open(path, "w") as fh:
-    json.dump(data, fh, indent=2)
-print(f"Give-up entry for stage {stage} cleared.")
-PY
-
-  return $?
+  state_toolkit give-up-reset "$GIVE_UP_STATE_FILE" "$stage" "$force"
 }
 
 run_preflight() {
@@ -1087,7 +849,8 @@ check_stage_gating() {
 
   set +e
   local gating_output
-  gating_output="$(python3 ai/drift_engine.py check-gating --stage "$stage" --json 2>/dev/null)"
+  # Decision point: re-run every probe; evidence/select reuse the snapshot this writes
+  gating_output="$(python3 ai/drift_engine.py check-gating --stage "$stage" --refresh --json 2>/dev/null)"
   local rc=$?
   set -e
 
@@ -1190,16 +953,8 @@ compute_error_hash() {
     return
   fi
 
-  local signature
-  signature="$(extract_error_signature "$log_file" | normalize_log | redact_secrets)"
-
-  # Hash: stage + exit_code + normalized_signature
-  # Use md5 on macOS, md5sum on Linux
-  local hash
-  hash="$(printf '%s\n%s\n%s' "$stage" "$exit_code" "$signature" | md5 2>/dev/null || printf '%s\n%s\n%s' "$stage" "$exit_code" "$signature" | md5sum | awk '{print $1}')"
-
-  # Return first 8 characters
-  echo "${hash:0:8}"
+  # Signature = first fatal line + last 60 lines, normalized and redacted (ai/scripts/error_classifier.py)
+  python3 "$ERROR_CLASSIFIER" signature-hash --stage "$stage" --exit-code "$exit_code" "$log_file"
 }
 
 get_error_attempts() {
@@ -1210,18 +965,7 @@ get_error_attempts() {
     echo "0"
     return
   fi
-  python3 -c "
-import json, sys
-try:
-    data = json.load(open('$ERRORS_JSON'))
-    key = '$key'
-    if key in data:
-        print(data[key].get('attempts', 0))
-    else:
-        print(0)
-except:
-    print(0)
-"
+  state_toolkit errors-get "$ERRORS_JSON" "$key" attempts 0
 }
 
 get_error_last_source() {
@@ -1232,18 +976,7 @@ get_error_last_source() {
     echo "none"
     return
   fi
-  python3 -c "
-import json
-try:
-    data = json.load(open('$ERRORS_JSON'))
-    key = '$key'
-    if key in data:
-        print(data[key].get('last_source', 'none'))
-    else:
-        print('none')
-except:
-    print('none')
-"
+  state_toolkit errors-get "$ERRORS_JSON" "$key" last_source none
 }
 
 get_api_call_count() {
@@ -1254,18 +987,7 @@ get_api_call_count() {
     echo "0"
     return
   fi
-  python3 -c "
-import json
-try:
-    data = json.load(open('$ERRORS_JSON'))
-    key = '$key'
-    if key in data:
-        print(data[key].get('api_calls', 0))
-    else:
-        print(0)
-except:
-    print(0)
-"
+  state_toolkit errors-get "$ERRORS_JSON" "$key" api_calls 0
 }
 
 add_api_outcome() {
@@ -1273,51 +995,7 @@ add_api_outcome() {
   local error_hash="$2"
   local outcome="$3"
   local key="${stage}_${error_hash}"
-
-  local content
-  content="$(
-python3 - "$ERRORS_JSON" "$key" "$outcome" "$ISSUES_FILE" <<'PY'
-import json
-import os
-import sys
-
-path, key, outcome, issues_path = sys.argv[1:5]
-
-def load_data():
-    data = {}
-    if os.path.exists(path):
-        try:
-            with open(path) as f:
-                data = json.load(f)
-        except json.JSONDecodeError:
-            data = {}
-        except FileNotFoundError:
-            data = {}
-    return data
-
-data = load_data()
-entry = data.setdefault(key, {
-    "attempts": 0,
-    "api_calls": 0,
-    "last_source": "none",
-    "last_transition": "",
-    "api_outcomes": [],
-    "no_effect_count": 0,
-    "no_new_evidence_count": 0,
-    "patch_failures": 0,
-    "provider_failures": {}
-})
-entry.setdefault("api_outcomes", [])
-entry.setdefault("provider_failures", {})
-entry.setdefault("no_effect_count", 0)
-if outcome == "no_effect":
-    entry["no_effect_count"] = entry.get("no_effect_count", 0) + 1
-entry["api_outcomes"].append(outcome)
-print(json.dumps(data, indent=2))
-PY
-  )"
-
-  atomic_json_write "$ERRORS_JSON" "$content"
+  state_toolkit errors-add-api-outcome "$ERRORS_JSON" "$key" "$outcome" "$ISSUES_FILE"
 }
 
 get_error_field_value() {
@@ -1325,27 +1003,11 @@ get_error_field_value() {
   local error_hash="$2"
   local field="$3"
   local key="${stage}_${error_hash}"
-
   if [ ! -f "$ERRORS_JSON" ]; then
     echo "0"
     return
   fi
-  python3 - "$ERRORS_JSON" "$key" "$field" <<'PY'
-import json
-import sys
-
-path, key, field = sys.argv[1:4]
-try:
-    data = json.load(open(path))
-    entry = data.get(key, {})
-    value = entry.get(field, 0)
-    if isinstance(value, dict):
-        print(json.dumps(value))
-    else:
-        print(value)
-except:
-    print(0)
-PY
+  state_toolkit errors-get "$ERRORS_JSON" "$key" "$field" 0
 }
 
 increment_error_field_value() {
@@ -1354,32 +1016,7 @@ increment_error_field_value() {
   local field="$3"
   local delta="${4:-1}"
   local key="${stage}_${error_hash}"
-
-  local content
-  content="$(
-python3 - "$ERRORS_JSON" "$key" "$field" "$delta" "$ISSUES_FILE" <<'PY'
-import json
-import os
-import sys
-
-path, key, field, delta, issues_path = sys.argv[1:6]
-def load_data():
-    if not os.path.exists(path):
-        return {}
-    try:
-        return json.load(open(path))
-    except json.JSONDecodeError:
-        return {}
-
-data = load_data()
-entry = data.setdefault(key, {"attempts": 0, "api_calls": 0, "last_source": "none", "last_transition": "", "api_outcomes": [], "no_effect_count": 0, "no_new_evidence_count": 0, "patch_failures": 0, "provider_failures": {}})
-value = entry.get(field, 0) + int(delta)
-entry[field] = value
-print(json.dumps(data, indent=2))
-PY
-  )"
-
-  atomic_json_write "$ERRORS_JSON" "$content"
+  state_toolkit errors-increment "$ERRORS_JSON" "$key" "$field" "$delta" "$ISSUES_FILE"
 }
 
 set_error_field_value() {
@@ -1388,34 +1025,7 @@ set_error_field_value() {
   local field="$3"
   local new_value="$4"
   local key="${stage}_${error_hash}"
-
-  local content
-  content="$(
-python3 - "$ERRORS_JSON" "$key" "$field" "$new_value" "$ISSUES_FILE" <<'PY'
-import json
-import os
-import sys
-
-path, key, field, value, issues_path = sys.argv[1:6]
-def load_data():
-    if not os.path.exists(path):
-        return {}
-    try:
-        return json.load(open(path))
-    except json.JSONDecodeError:
-        return {}
-
-data = load_data()
-entry = data.setdefault(key, {"attempts": 0, "api_calls": 0, "last_source": "none", "last_transition": "", "api_outcomes": [], "no_effect_count": 0, "no_new_evidence_count": 0, "patch_failures": 0, "provider_failures": {}})
-try:
-    entry[field] = int(value)
-except ValueError:
-    entry[field] = value
-print(json.dumps(data, indent=2))
-PY
-  )"
-
-  atomic_json_write "$ERRORS_JSON" "$content"
+  state_toolkit errors-set "$ERRORS_JSON" "$key" "$field" "$new_value" "$ISSUES_FILE"
 }
 
 record_provider_failure() {
@@ -1423,32 +1033,7 @@ record_provider_failure() {
   local error_hash="$2"
   local provider="$3"
   local key="${stage}_${error_hash}"
-
-  local content
-  content="$(
-python3 - "$ERRORS_JSON" "$key" "$provider" "$ISSUES_FILE" <<'PY'
-import json
-import os
-import sys
-
-path, key, provider, issues_path = sys.argv[1:5]
-def load_data():
-    if not os.path.exists(path):
-        return {}
-    try:
-        return json.load(open(path))
-    except json.JSONDecodeError:
-        return {}
-
-data = load_data()
-entry = data.setdefault(key, {"attempts": 0, "api_calls": 0, "last_source": "none", "last_transition": "", "api_outcomes": [], "no_effect_count": 0, "no_new_evidence_count": 0, "patch_failures": 0, "provider_failures": {}})
-failures = entry.setdefault("provider_failures", {})
-failures[provider] = failures.get(provider, 0) + 1
-print(json.dumps(data, indent=2))
-PY
-  )"
-
-  atomic_json_write "$ERRORS_JSON" "$content"
+  state_toolkit errors-provider-failure "$ERRORS_JSON" "$key" "$provider" "$ISSUES_FILE"
 }
 
 get_api_outcome_count() {
@@ -1460,19 +1045,7 @@ get_api_outcome_count() {
     echo "0"
     return
   fi
-  python3 - "$ERRORS_JSON" "$key" "$desired_outcome" <<'PY'
-import json
-import sys
-
-path, key, desired = sys.argv[1:4]
-try:
-    data = json.load(open(path))
-    entry = data.get(key, {})
-    outcomes = entry.get("api_outcomes", [])
-    print(outcomes.count(desired))
-except:
-    print(0)
-PY
+  state_toolkit errors-api-outcome-count "$ERRORS_JSON" "$key" "$desired_outcome"
 }
 
 get_latest_api_outcome() {
@@ -1483,20 +1056,7 @@ get_latest_api_outcome() {
     echo ""
     return
   fi
-  python3 - "$ERRORS_JSON" "$key" <<'PY'
-import json
-import sys
-
-path, key = sys.argv[1:3]
-try:
-    data = json.load(open(path))
-    entry = data.get(key, {})
-    outcomes = entry.get("api_outcomes", [])
-    if outcomes:
-        print(outcomes[-1])
-except:
-    pass
-PY
+  state_toolkit errors-latest-api-outcome "$ERRORS_JSON" "$key"
 }
 
 update_error_state() {
@@ -1508,64 +1068,7 @@ update_error_state() {
   local key="${stage}_${error_hash}"
   local ts
   ts="$(date -u +%Y-%m-%dT%H:%M:%SZ)"
-
-  local content
-  content="$(
-python3 - "$ERRORS_JSON" "$key" "$source" "$ts" "$increment_api" "$increment_attempts" "$ISSUES_FILE" <<'PY'
-import json
-import os
-import sys
-
-path, key, source, ts, increment_api, increment_attempts, issues_path = sys.argv[1:8]
-
-def load_data():
-    data = {}
-    if os.path.exists(path):
-        try:
-            with open(path) as f:
-                data = json.load(f)
-        except json.JSONDecodeError:
-            timestamp = datetime.utcnow().strftime("%Y%m%d-%H%M%SZ")
-            corrupt_path = f"{path}.corrupted.{timestamp}"
-            os.rename(path, corrupt_path)
-            msg = f"[{datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')}] WARNING: Corrupted JSON moved to {corrupt_path}\n"
-            parent = os.path.dirname(issues_path)
-            if parent and not os.path.isdir(parent):
-                os.makedirs(parent, exist_ok=True)
-            with open(issues_path, "a") as fh:
-                fh.write(msg)
-            data = {}
-        except FileNotFoundError:
-            data = {}
-    return data
-
-data = load_data()
-entry = data.setdefault(key, {
-    "attempts": 0,
-    "api_calls": 0,
-    "last_source": "none",
-    "last_transition": "",
-    "api_outcomes": [],
-    "no_effect_count": 0,
-    "no_new_evidence_count": 0,
-    "patch_failures": 0,
-    "provider_failures": {}
-})
-entry.setdefault("api_outcomes", [])
-entry.setdefault("provider_failures", {})
-attempts = entry.get("attempts", 0)
-if increment_attempts == "true":
-    attempts += 1
-entry["attempts"] = attempts
-entry["last_source"] = source
-entry["last_transition"] = ts
-if increment_api == "true":
-    entry["api_calls"] = entry.get("api_calls", 0) + 1
-print(json.dumps(data, indent=2))
-PY
-  )"
-
-  atomic_json_write "$ERRORS_JSON" "$content"
+  state_toolkit errors-update "$ERRORS_JSON" "$key" "$source" "$ts" "$increment_api" "$increment_attempts" "$ISSUES_FILE"
 }
 
 reset_error_state() {
@@ -1574,53 +1077,18 @@ reset_error_state() {
   local key="${stage}_${error_hash}"
   local ts
   ts="$(date -u +%Y-%m-%dT%H:%M:%SZ)"
+  state_toolkit errors-reset "$ERRORS_JSON" "$key" "$ts" "$ISSUES_FILE"
+}
 
-  local content
-  content="$(
-python3 - "$ERRORS_JSON" "$key" "$ts" "$ISSUES_FILE" <<'PY'
-import json
-import os
-import sys
-from datetime import datetime
-
-path, key, ts, issues_path = sys.argv[1:5]
-
-def load_data():
-    data = {}
-    if os.path.exists(path):
-        try:
-            with open(path) as f:
-                data = json.load(f)
-        except json.JSONDecodeError:
-            timestamp = datetime.utcnow().strftime("%Y%m%d-%H%M%SZ")
-            corrupt_path = f"{path}.corrupted.{timestamp}"
-            os.rename(path, corrupt_path)
-            msg = f"[{datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')}] WARNING: Corrupted JSON moved to {corrupt_path}\n"
-            parent = os.path.dirname(issues_path)
-            if parent and not os.path.isdir(parent):
-                os.makedirs(parent, exist_ok=True)
-            with open(issues_path, "a") as fh:
-                fh.write(msg)
-            data = {}
-        except FileNotFoundError:
-            data = {}
-    return data
-
-data = load_data()
-entry = data.setdefault(key, {"attempts": 0, "api_calls": 0, "last_source": "none", "last_transition": "", "api_outcomes": []})
-entry["attempts"] = 0
-entry["api_calls"] = 0
-entry["last_source"] = "none"
-entry["last_transition"] = ts
-entry["no_effect_count"] = 0
-entry["no_new_evidence_count"] = 0
-entry["patch_failures"] = 0
-entry["provider_failures"] = {}
-print(json.dumps(data, indent=2))
-PY
-  )"
-
-  atomic_json_write "$ERRORS_JSON" "$content"
+# add_api_outcome applied + reset_error_state in one toolkit call
+record_patch_applied() {
+  local stage="$1"
+  local error_hash="$2"
+  local key="${stage}_${error_hash}"
+  local ts
+  ts="$(date -u +%Y-%m-%dT%H:%M:%SZ)"
+  state_toolkit errors-add-api-outcome "$ERRORS_JSON" "$key" applied "$ISSUES_FILE" :: \
+    errors-reset "$ERRORS_JSON" "$key" "$ts" "$ISSUES_FILE"
 }
 
 # =============================================================================
@@ -1632,58 +1100,13 @@ get_stage_status() {
     echo "idle"
     return
   fi
-  python3 -c "
-import json
-try:
-    data = json.load(open('$STAGE_STATUS_JSON'))
-    print(data.get('$stage', 'idle'))
-except:
-    print('idle')
-"
+  state_toolkit stage-status-get "$STAGE_STATUS_JSON" "$stage"
 }
 
 set_stage_status() {
   local stage="$1"
   local status="$2"  # idle, running, green, failed, give_up
-
-  local content
-  content="$(
-python3 - "$STAGE_STATUS_JSON" "$stage" "$status" "$ISSUES_FILE" <<'PY'
-import json
-import os
-import sys
-from datetime import datetime
-
-path, stage, status, issues_path = sys.argv[1:5]
-
-def load_data():
-    data = {}
-    if os.path.exists(path):
-        try:
-            with open(path) as f:
-                data = json.load(f)
-        except json.JSONDecodeError:
-            timestamp = datetime.utcnow().strftime("%Y%m%d-%H%M%SZ")
-            corrupt_path = f"{path}.corrupted.{timestamp}"
-            os.rename(path, corrupt_path)
-            msg = f"[{datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')}] WARNING: Corrupted JSON moved to {corrupt_path}\n"
-            parent = os.path.dirname(issues_path)
-            if parent and not os.path.isdir(parent):
-                os.makedirs(parent, exist_ok=True)
-            with open(issues_path, "a") as fh:
-                fh.write(msg)
-            data = {}
-        except FileNotFoundError:
-            data = {}
-    return data
-
-data = load_data()
-data[stage] = status
-print(json.dumps(data, indent=2))
-PY
-  )"
-
-  atomic_json_write "$STAGE_STATUS_JSON" "$content"
+  state_toolkit stage-status-set "$STAGE_STATUS_JSON" "$stage" "$status" "$ISSUES_FILE"
 }
 
 handle_stage_exit() {
@@ -2146,8 +1569,8 @@ orchestrate_stage() {
 
     if [ "$rc" -eq 0 ]; then
       log "Stage '$stage' succeeded!"
-      set_stage_status "$stage" "green"
-      clear_stage_give_up_entry "$stage"
+      state_toolkit stage-status-set "$STAGE_STATUS_JSON" "$stage" green "$ISSUES_FILE" :: \
+        give-up-clear "$GIVE_UP_STATE_FILE" "$stage"
       announce_stage_success "$stage"
       clear_current_stage_progress
       set -e
@@ -2169,10 +1592,17 @@ orchestrate_stage() {
     if [ "$used_fallback" = true ]; then
       log "WARNING: Failed to compute error hash (rc=$hash_rc). Using fallback key '$error_key'."
     fi
-    update_error_state "$stage" "$error_hash" "stage"
-    update_rc=$?
+    # One toolkit process records the failure and answers the error-state reads for this attempt
+    local error_attempts last_source api_calls last_api_outcome error_state
+    error_state="$(state_toolkit \
+      errors-update "$ERRORS_JSON" "$error_key" stage "$(date -u +%Y-%m-%dT%H:%M:%SZ)" false true "$ISSUES_FILE" :: \
+      errors-get "$ERRORS_JSON" "$error_key" attempts 0 :: \
+      errors-get "$ERRORS_JSON" "$error_key" last_source none :: \
+      errors-get "$ERRORS_JSON" "$error_key" api_calls 0 :: \
+      errors-latest-api-outcome "$ERRORS_JSON" "$error_key")" && update_rc=0 || update_rc=$?
     if [ "$update_rc" -ne 0 ]; then
       log "WARNING: Failed to update errors.json for stage failure (rc=$update_rc)."
+      error_state=""
     fi
 
     if [ ! -f "$log_file" ]; then
@@ -2186,29 +1616,31 @@ orchestrate_stage() {
     log "Error hash: $error_hash"
     announce_attempt_with_key "$attempt" "$error_key"
 
-    local error_attempts last_source api_calls
-    error_attempts="$(get_error_attempts "$stage" "$error_hash")" || error_attempts="0"
-    last_source="$(get_error_last_source "$stage" "$error_hash")" || last_source="none"
-    api_calls="$(get_api_call_count "$stage" "$error_hash")" || api_calls="0"
+    { read -r error_attempts; read -r last_source; read -r api_calls; read -r last_api_outcome; } <<< "$error_state" || true
+    error_attempts="${error_attempts:-0}"
+    last_source="${last_source:-none}"
+    api_calls="${api_calls:-0}"
 
     log "Error state: attempts=$error_attempts, last_source=$last_source, api_calls=$api_calls"
 
-    local last_api_outcome
-    last_api_outcome="$(get_latest_api_outcome "$stage" "$error_hash")" || last_api_outcome=""
+    # An applied patch that did not change the failure counts as no_effect
+    local evidence_ops=()
     if [ "$last_api_outcome" = "applied" ]; then
-      add_api_outcome "$stage" "$error_hash" "no_effect"
+      evidence_ops+=(errors-add-api-outcome "$ERRORS_JSON" "$error_key" no_effect "$ISSUES_FILE" ::)
       last_api_outcome="no_effect"
     fi
-
     if [ "$last_api_outcome" = "no_effect" ]; then
-      increment_error_field_value "$stage" "$error_hash" "no_new_evidence_count" "1"
+      evidence_ops+=(errors-increment "$ERRORS_JSON" "$error_key" no_new_evidence_count 1 "$ISSUES_FILE" ::)
     else
-      set_error_field_value "$stage" "$error_hash" "no_new_evidence_count" "0"
+      evidence_ops+=(errors-set "$ERRORS_JSON" "$error_key" no_new_evidence_count 0 "$ISSUES_FILE" ::)
     fi
 
     local repeated_no_evidence patch_failures safe_mode_reason
-    repeated_no_evidence="$(get_error_field_value "$stage" "$error_hash" "no_new_evidence_count")"
-    patch_failures="$(get_error_field_value "$stage" "$error_hash" "patch_failures")"
+    { read -r repeated_no_evidence; read -r patch_failures; } < <(state_toolkit "${evidence_ops[@]}" \
+      errors-get "$ERRORS_JSON" "$error_key" no_new_evidence_count 0 :: \
+      errors-get "$ERRORS_JSON" "$error_key" patch_failures 0 || true)
+    repeated_no_evidence="${repeated_no_evidence:-0}"
+    patch_failures="${patch_failures:-0}"
     if [ "$(are_all_executor_providers_unhealthy)" = "true" ]; then
       safe_mode_reason="executor_providers_unhealthy"
     elif [ "$patch_failures" -ge "$SAFE_MODE_PATCH_FAILURE_THRESHOLD" ]; then
@@ -2365,8 +1797,7 @@ orchestrate_stage() {
         set -e
 
         if [ "$patch_rc" -eq 0 ]; then
-          add_api_outcome "$stage" "$error_hash" "applied"
-          reset_error_state "$stage" "$error_hash"
+          record_patch_applied "$stage" "$error_hash"
           log "Patch applied. Re-running stage."
         else
           add_api_outcome "$stage" "$error_hash" "apply_failed"
@@ -2408,8 +1839,7 @@ orchestrate_stage() {
           set -e
 
           if [ "$patch_rc" -eq 0 ]; then
-            add_api_outcome "$stage" "$error_hash" "applied"
-            reset_error_state "$stage" "$error_hash"
+            record_patch_applied "$stage" "$error_hash"
             log "Patch applied after diagnostics. Re-running stage."
           else
             add_api_outcome "$stage" "$error_hash" "apply_failed"
@@ -2454,7 +1884,10 @@ measure_drift() {
     return 1
   fi
 
-  python3 "$DRIFT_ENGINE" measure --memo "$ARCHITECTURE_MEMO" --repo-root "$REPO_ROOT" --json
+  # DRIFT_MEASURE_BUDGET (seconds) bounds the tick; claims that do not fit are carried over.
+  # An optional claim id records the measurement as the outcome of a patch for that claim.
+  python3 "$DRIFT_ENGINE" measure --memo "$ARCHITECTURE_MEMO" --repo-root "$REPO_ROOT" \
+    ${DRIFT_MEASURE_BUDGET:+--budget "$DRIFT_MEASURE_BUDGET"} ${1:+--patch-claim "$1"} --json
 }
 
 # Select next claim from drift engine
@@ -2515,45 +1948,8 @@ all_claims_blocked_or_deferred() {
     return 1
   fi
 
-  # Parse using inline Python for reliability
   local result
-  result="$(python3 - "$status" <<'PY'
-import json
-import sys
-from datetime import datetime, timezone
-
-data = json.loads(sys.argv[1])
-claims = data.get("claims", [])
-now = datetime.now(timezone.utc)
-
-fail_claims = [c for c in claims if c.get("status") == "FAIL"]
-if not fail_claims:
-    print("0:0:0")  # all_blocked_or_deferred=true, blocked=0, deferred=0
-    sys.exit(0)
-
-blocked = 0
-deferred = 0
-for claim in fail_claims:
-    if claim.get("status") == "BLOCKED":
-        blocked += 1
-        continue
-    defer_until = claim.get("defer_until")
-    if defer_until:
-        try:
-            defer_dt = datetime.fromisoformat(defer_until)
-            if defer_dt > now:
-                deferred += 1
-                continue
-        except ValueError:
-            pass
-
-actionable = len(fail_claims) - blocked - deferred
-if actionable == 0:
-    print(f"0:{blocked}:{deferred}")
-else:
-    print(f"1:{blocked}:{deferred}")
-PY
-)"
+  result="$(state_toolkit drift-actionable "$status")"
 
   local rc blocked deferred
   rc="${result%%:*}"
@@ -2572,28 +1968,9 @@ all_claims_blocked() {
   all_claims_blocked_or_deferred
 }
 
-# Extract claim target from JSON
-get_claim_target() {
-  local claim_json="$1"
-  echo "$claim_json" | python3 -c "import json,sys; d=json.load(sys.stdin); print(d.get('evaluation',{}).get('target',''))" 2>/dev/null
-}
-
-# Extract claim ID from JSON
-get_claim_id() {
-  local claim_json="$1"
-  echo "$claim_json" | python3 -c "import json,sys; d=json.load(sys.stdin); print(d.get('id',''))" 2>/dev/null
-}
-
-# Extract claim text from JSON
-get_claim_text() {
-  local claim_json="$1"
-  echo "$claim_json" | python3 -c "import json,sys; d=json.load(sys.stdin); print(d.get('text',''))" 2>/dev/null
-}
-
-# Extract claim evaluation method
-get_claim_method() {
-  local claim_json="$1"
-  echo "$claim_json" | python3 -c "import json,sys; d=json.load(sys.stdin); print(d.get('evaluation',{}).get('method',''))" 2>/dev/null
+# Claim/drift JSON fields, one line each (FIELD[=DEFAULT], dotted paths), in one process
+json_fields() {
+  state_toolkit json-get "$@" 2>/dev/null
 }
 
 # Determine the most appropriate stage for a claim target path
@@ -2683,13 +2060,11 @@ call_executor_for_claim() {
   local claim_id="$2"
   local attempt="$3"
 
-  local claim_target claim_text
-  claim_target="$(get_claim_target "$claim_json")"
-  claim_text="$(get_claim_text "$claim_json")"
+  local claim_target claim_text claim_method
+  { read -r claim_target; read -r claim_text; read -r claim_method; } < <(json_fields "$claim_json" \
+    evaluation.target text evaluation.method || true)
   local error_key
   error_key="$(claim_to_error_key "$claim_id")"
-  local claim_method
-  claim_method="$(get_claim_method "$claim_json")"
   local claim_stage
   claim_stage="$(determine_claim_stage "$claim_target")"
   if [ -z "$claim_stage" ]; then
@@ -2956,8 +2331,7 @@ escalate_claim_to_architect() {
   local claim_id="$2"
 
   local claim_target claim_text
-  claim_target="$(get_claim_target "$claim_json")"
-  claim_text="$(get_claim_text "$claim_json")"
+  { read -r claim_target; read -r claim_text; } < <(json_fields "$claim_json" evaluation.target text || true)
   local error_key
   error_key="$(claim_to_error_key "$claim_id")"
   local claim_error_hash
@@ -3139,8 +2513,7 @@ converge_loop() {
   fi
 
   local drift_score episode
-  drift_score="$(echo "$drift_output" | python3 -c "import json,sys; d=json.load(sys.stdin); print(d.get('drift_score',1.0))" 2>/dev/null)"
-  episode="$(echo "$drift_output" | python3 -c "import json,sys; d=json.load(sys.stdin); print(d.get('episode',''))" 2>/dev/null)"
+  { read -r drift_score; read -r episode; } < <(json_fields "$drift_output" drift_score=1.0 episode || true)
 
   log "[converge] Episode: $episode"
   log "[converge] Initial drift score: $drift_score"
@@ -3211,7 +2584,7 @@ converge_loop() {
       set +e
       drift_output="$(measure_drift 2>/dev/null)"
       set -e
-      drift_score="$(echo "$drift_output" | python3 -c "import json,sys; d=json.load(sys.stdin); print(d.get('drift_score',0))" 2>/dev/null)"
+      drift_score="$(json_fields "$drift_output" drift_score=0)"
 
       if [ "$(echo "$drift_score == 0" | bc -l 2>/dev/null || echo "0")" = "1" ]; then
         log "[converge] Convergence achieved! Drift score: 0"
@@ -3223,13 +2596,11 @@ converge_loop() {
       continue
     fi
 
-    claim_id="$(get_claim_id "$claim_json")"
-    log "[converge] Selected claim: $claim_id"
-
-    # Get current attempt count for this claim
+    # Claim id and current attempt count
     local claim_attempts
-    claim_attempts="$(echo "$claim_json" | python3 -c "import json,sys; d=json.load(sys.stdin); print(d.get('attempts',0))" 2>/dev/null)"
+    { read -r claim_id; read -r claim_attempts; } < <(json_fields "$claim_json" id attempts=0 || true)
     claim_attempts="${claim_attempts:-0}"
+    log "[converge] Selected claim: $claim_id"
 
     # Attempt 1-2: Executor only
     if [ "$claim_attempts" -lt 2 ]; then
@@ -3277,7 +2648,7 @@ converge_loop() {
         # Re-measure drift after successful fix
         set +e
         drift_output="$(measure_drift 2>/dev/null)"
-        drift_score="$(echo "$drift_output" | python3 -c "import json,sys; d=json.load(sys.stdin); print(d.get('drift_score',0))" 2>/dev/null)"
+        drift_score="$(json_fields "$drift_output" drift_score=0)"
         set -e
         log "[converge] Drift score after fix: $drift_score"
         continue
@@ -3314,11 +2685,11 @@ converge_loop() {
       fi
 
       if [ "$arch_rc" -eq 0 ]; then
-        # Re-measure drift
+        # Re-measure drift; the architect patch was applied, so history records its delta
         set +e
-        drift_output="$(measure_drift 2>/dev/null)"
+        drift_output="$(measure_drift "$claim_id" 2>/dev/null)"
         set -e
-        drift_score="$(echo "$drift_output" | python3 -c "import json,sys; d=json.load(sys.stdin); print(d.get('drift_score',0))" 2>/dev/null)"
+        drift_score="$(json_fields "$drift_output" drift_score=0)"
         log "[converge] Drift score after architect fix: $drift_score"
         continue
       elif [ "$arch_rc" -eq 1 ]; then
@@ -3495,47 +2866,9 @@ main() {
 
   if [ "$reset_mode" = "--reset" ]; then
     log "Resetting stage '$stage' to idle"
-    set_stage_status "$stage" "idle"
-    # Clear all error states for this stage
-    local reset_content
-    reset_content="$(
-python3 - "$ERRORS_JSON" "$stage" "$ISSUES_FILE" <<'PY'
-import json
-import os
-import sys
-from datetime import datetime
-
-path, stage, issues_path = sys.argv[1:4]
-
-def load_data():
-    data = {}
-    if os.path.exists(path):
-        try:
-            with open(path) as f:
-                data = json.load(f)
-        except json.JSONDecodeError:
-            timestamp = datetime.utcnow().strftime("%Y%m%d-%H%M%SZ")
-            corrupt_path = f"{path}.corrupted.{timestamp}"
-            os.rename(path, corrupt_path)
-            msg = f"[{datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')}] WARNING: Corrupted JSON moved to {corrupt_path}\n"
-            parent = os.path.dirname(issues_path)
-            if parent and not os.path.isdir(parent):
-                os.makedirs(parent, exist_ok=True)
-            with open(issues_path, "a") as fh:
-                fh.write(msg)
-            data = {}
-        except FileNotFoundError:
-            data = {}
-    return data
-
-data = load_data()
-keys_to_remove = [k for k in data if k.startswith(stage + "_")]
-for k in keys_to_remove:
-    del data[k]
-print(json.dumps(data, indent=2))
-PY
-    )"
-    atomic_json_write "$ERRORS_JSON" "$reset_content"
+    # Stage back to idle and all error states for this stage cleared
+    state_toolkit stage-status-set "$STAGE_STATUS_JSON" "$stage" idle "$ISSUES_FILE" :: \
+      errors-clear-stage "$ERRORS_JSON" "$stage" "$ISSUES_FILE"
     log "Reset complete"
     exit 0
   fi
@@ -16,17 +16,50 @@ Does NOT:
 - Apply attempt policy (Orchestrator responsibility)
 """
 
+import fnmatch
+import functools
 import hashlib
 import json
+import math
+import mmap
 import os
 import re
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field, asdict
 from datetime import datetime, timezone, timedelta
 from enum import Enum
 from pathlib import Path
 from typing import Optional, List
 
+# Shared helpers (yaml_io) live with the orchestrator scripts; imported lazily
+# because PyYAML stays optional for the engine.
+sys.path.insert(0, str(Path(__file__).resolve().parent / "scripts"))
+
+
+def _env_number(name: str, default, cast, minimum):
+    """DRIFT_* knob from the environment; unset, malformed or out-of-range values use the default."""
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        value = cast(raw)
+    except ValueError:
+        value = None
+    if value is None or not value >= minimum:  # also rejects NaN
+        print(f"[drift-engine] Ignoring {name}={raw!r}; using {default}", file=sys.stderr)
+        return default
+    return value
+
+
+def _env_int(name: str, default: int, minimum: int = 0) -> int:
+    return _env_number(name, default, int, minimum)
+
+
+def _env_float(name: str, default: float, minimum: float = 0.0) -> float:
+    return _env_number(name, default, float, minimum)
+
 
 class ClaimType(str, Enum):
     STRUCTURAL = "structural"
@@ -53,6 +86,448 @@ class EvaluationMethod(str, Enum):
     CONTAINS_KEY = "contains_key"  # JSON/YAML file contains a specific key with non-null value
     COMMAND_SUCCEEDS = "command_succeeds"  # Bounded command runs and exits 0
     ARTIFACT_VALID = "artifact_valid"  # Check artifacts.json for validity
+    KUSTOMIZE_RESOLVES = "kustomize_resolves"  # Every resource in a kustomization tree exists and parses
+    YAML_TREE_VALID = "yaml_tree_valid"  # Every file matching a glob parses as YAML
+    HTTP_OK = "http_ok"  # URL answers with the expected status (and body pattern)
+    TCP_REACHABLE = "tcp_reachable"  # Host accepts TCP connections on every listed port
+    CLUSTER_RESOURCE = "cluster_resource"  # Cluster objects exist (and a field has a value) per the kubectl snapshot
+
+
+# Upper bounds (seconds) for the per-evaluator latency histogram exported to Prometheus.
+EVALUATOR_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+METRICS_PREFIX = "orchestrator_drift"
+
+# Evidence capsules read error logs backwards in fixed blocks and never look
+# further back than the byte budget, so give_up stays cheap on huge logs.
+EVIDENCE_SCAN_BYTES = _env_int("DRIFT_EVIDENCE_SCAN_BYTES", 4 * 1024 * 1024, minimum=1)
+EVIDENCE_BLOCK_BYTES = 64 * 1024
+EVIDENCE_MAX_LINES = 5
+EVIDENCE_MAX_CHARS = 500
+ERROR_LINE_RE = re.compile(rb"error|fatal|failed", re.IGNORECASE)
+
+# Gating snapshots (ai/state/gating_<stage>.json): a claim result is reused
+# while its input fingerprint (evaluation config + target file stamp, or the
+# artifacts.json stamp for artifact_valid) is unchanged. Results of methods
+# that probe live systems or read more than their target also expire after
+# GATING_SNAPSHOT_TTL seconds.
+GATING_SNAPSHOT_TTL = _env_float("DRIFT_GATING_TTL", 300.0)
+GATING_VOLATILE_METHODS = {
+    "command_succeeds", "kustomize_resolves", "yaml_tree_valid", "http_ok", "tcp_reachable", "cluster_resource",
+}
+
+# Drift history (timeline_stats.json): moving averages and recent velocity
+# cover the last HISTORY_WINDOW measurements; an episode is stalled after
+# STALL_ENTRIES measurements without a new best drift score.
+HISTORY_WINDOW = _env_int("DRIFT_HISTORY_WINDOW", 10, minimum=1)
+STALL_ENTRIES = _env_int("DRIFT_STALL_ENTRIES", 5, minimum=1)
+RECENT_PATCHES = 20
+
+# Methods answered from the directory listings measure_drift prefetches
+# (one os.scandir per distinct parent directory); their targets may be globs.
+STAT_METHODS = {"file_exists", "dir_exists", "file_nonempty", "script_behavior", "test_exists"}
+GLOB_MAGIC_RE = re.compile(r"[*?\[]")
+
+# Path implication: a failing dir_exists claim settles every claim targeting a
+# path below it, and a failing file_exists claim settles the file-reading
+# claims on the same target. Values are the status the evaluator itself would
+# report for a missing target.
+IMPLIED_STATUS = {
+    "file_exists": ClaimStatus.FAIL,
+    "dir_exists": ClaimStatus.FAIL,
+    "file_nonempty": ClaimStatus.FAIL,
+    "file_content": ClaimStatus.FAIL,
+    "yaml_parseable": ClaimStatus.FAIL,
+    "json_parseable": ClaimStatus.FAIL,
+    "contains_key": ClaimStatus.FAIL,
+    "kustomize_resolves": ClaimStatus.FAIL,
+    "script_behavior": ClaimStatus.UNKNOWN,
+    "test_exists": ClaimStatus.UNKNOWN,
+}
+FILE_READ_METHODS = {"file_nonempty", "file_content", "yaml_parseable", "json_parseable", "contains_key"}
+
+
+def read_error_excerpt(log_path: Path, budget: int = EVIDENCE_SCAN_BYTES,
+                       block_size: int = EVIDENCE_BLOCK_BYTES) -> str:
+    """
+    Most recent error/fatal/failed lines of a log (file order, capped at
+    EVIDENCE_MAX_CHARS), or its last EVIDENCE_MAX_CHARS when none match.
+
+    The file is read backwards block by block and at most `budget` bytes
+    from its end are examined, so time and memory do not depend on log size.
+    """
+    found: list[bytes] = []
+    with open(log_path, "rb") as fh:
+        end = fh.seek(0, os.SEEK_END)
+        floor = max(0, end - budget)
+        pos = end
+        carry = b""  # start of a line that continues into the block after
+        while pos > floor and len(found) < EVIDENCE_MAX_LINES:
+            size = min(block_size, pos - floor)
+            pos -= size
+            fh.seek(pos)
+            chunk = fh.read(size) + carry
+            # The first line of a block may start in the previous block; hold
+            # it back unless this is the last block within the budget.
+            cut = 0
+            if pos > floor:
+                cut = chunk.find(b"\n") + 1
+                if cut == 0:
+                    carry = chunk
+                    continue
+            carry = chunk[:cut]
+            hits = []
+            at = cut
+            while True:
+                match = ERROR_LINE_RE.search(chunk, at)
+                if match is None:
+                    break
+                start = chunk.rfind(b"\n", 0, match.start()) + 1
+                stop = chunk.find(b"\n", match.end())
+                stop = len(chunk) if stop < 0 else stop
+                hits.append(chunk[start:stop])
+                at = stop + 1
+            found.extend(reversed(hits))
+        if not found:
+            fh.seek(max(0, end - EVIDENCE_MAX_CHARS))
+            return fh.read().decode("utf-8", errors="replace")[-EVIDENCE_MAX_CHARS:]
+    lines = [line.decode("utf-8", errors="replace") for line in reversed(found[:EVIDENCE_MAX_LINES])]
+    return "\n".join(lines)[:EVIDENCE_MAX_CHARS]
+
+
+def iter_timeline(path: Path, block_size: int = 64 * 1024):
+    """Yield timeline.json entries one at a time without loading the whole array."""
+    decoder = json.JSONDecoder()
+    buf = ""
+    with open(path, encoding="utf-8") as fh:
+        while True:
+            data = fh.read(block_size)
+            buf += data
+            pos = 0
+            while True:
+                while pos < len(buf) and buf[pos] in "[, \t\r\n":
+                    pos += 1
+                if pos >= len(buf) or buf[pos] == "]":
+                    break
+                try:
+                    entry, pos = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if not data:
+                        return  # truncated tail
+                    break  # entry continues in the next block
+                yield entry
+            buf = buf[pos:]
+            if not data:
+                return
+
+
+def _epoch(timestamp: Optional[str]) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(timestamp).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def fold_timeline_entry(stats: dict, entry: dict) -> None:
+    """
+    Fold one timeline entry into the running history aggregates.
+
+    drift_delta is the current minus the previous drift score, so a patch
+    with delta 0 changed nothing and one with delta > 0 made drift worse.
+    """
+    ts = _epoch(entry.get("timestamp"))
+    if ts is None:
+        return
+    score = float(entry.get("drift_score") or 0.0)
+    lanes = {
+        "drift": score,
+        "structural": float((entry.get("structural_drift") or {}).get("score") or 0.0),
+        "operational": float((entry.get("operational_drift") or {}).get("score") or 0.0),
+    }
+    stats["entries"] = stats.get("entries", 0) + 1
+    point = {"timestamp": entry["timestamp"], "drift_score": score}
+    stats.setdefault("first", point)
+    stats["last"] = point
+
+    alpha = 2.0 / (HISTORY_WINDOW + 1)
+    ewma = stats.setdefault("ewma", dict(lanes))
+    for lane, value in lanes.items():
+        ewma[lane] = alpha * value + (1 - alpha) * ewma.get(lane, value)
+    window = stats.setdefault("window", [])
+    window.append([ts, score])
+    del window[:-HISTORY_WINDOW]
+
+    claims = stats.setdefault("claims", {})
+    for claim_id, status in (entry.get("transitions") or {}).items():
+        info = claims.setdefault(claim_id, {"passes": 0, "time_to_pass_total": 0.0})
+        if status == ClaimStatus.FAIL.value:
+            if info.get("status") != status:
+                info["fail_since"] = ts
+        elif status == ClaimStatus.PASS.value and info.get("fail_since") is not None:
+            took = ts - info.pop("fail_since")
+            info["passes"] += 1
+            info["time_to_pass_total"] += took
+            info["time_to_pass_last"] = took
+            info["time_to_pass_max"] = max(took, info.get("time_to_pass_max", 0.0))
+        info["status"] = status
+
+    if entry.get("patch_applied"):
+        patches = stats.setdefault("patches", {"applied": 0, "improved": 0, "zero_delta": 0, "regressed": 0,
+                                               "recent_ineffective": []})
+        delta = float(entry.get("drift_delta") or 0.0)
+        patches["applied"] += 1
+        kind = "improved" if delta < 0 else "zero_delta" if delta == 0 else "regressed"
+        patches[kind] += 1
+        if kind != "improved":
+            patches["recent_ineffective"].append(
+                {"timestamp": entry["timestamp"], "claim_id": entry.get("claim_id"), "drift_delta": delta})
+            del patches["recent_ineffective"][:-RECENT_PATCHES]
+
+    episodes = stats.setdefault("episodes", {})
+    episode = episodes.get(entry.get("episode") or "unknown")
+    if episode is None:
+        episode = episodes[entry.get("episode") or "unknown"] = {
+            "first_seen": entry["timestamp"], "entries": 0, "start_score": score,
+            "best_score": score, "since_improvement": 0,
+        }
+    episode["entries"] += 1
+    episode["last_seen"] = entry["timestamp"]
+    episode["last_score"] = score
+    if score < episode["best_score"]:
+        episode["best_score"] = score
+        episode["since_improvement"] = 0
+    elif episode["entries"] > 1:
+        episode["since_improvement"] += 1
+
+
+# file_content search keys are ("re", pattern) or ("lit", expected substring),
+# searched as bytes regexes over one memory map of the file.
+CONTENT_LINE_CHARS = 200
+
+
+@functools.lru_cache(maxsize=1024)
+def content_key_regex(kind: str, text: str) -> re.Pattern:
+    """Compiled bytes regex for one search key; raises re.error for an invalid pattern."""
+    if kind == "lit":
+        return re.compile(re.escape(text.encode("utf-8")))
+    return re.compile(text.encode("utf-8"))
+
+
+def _line_at(data, start: int, end: int) -> str:
+    line_start = data.rfind(b"\n", 0, start) + 1
+    line_end = data.find(b"\n", max(end, line_start))
+    if line_end < 0:
+        line_end = len(data)
+    line = data[line_start:min(line_end, line_start + CONTENT_LINE_CHARS)]
+    return line.decode("utf-8", errors="replace").strip()
+
+
+def scan_content(path: Path, keys) -> dict:
+    """
+    Resolve several search keys against one file; key -> matched line, None,
+    or the re.error of an invalid pattern (so it fails only its own claim).
+
+    The file is opened and memory-mapped once for all keys and never decoded
+    as a whole; each key's search stops at its first match. (One search per
+    key beats a single alternation here: CPython's re keeps its literal
+    prefix scan for a lone pattern but not inside an alternation.)
+    """
+    results: dict = {}
+    regexes = {}
+    for key in dict.fromkeys(keys):
+        try:
+            regexes[key] = content_key_regex(*key)
+        except re.error as e:
+            results[key] = e
+    with open(path, "rb") as fh:
+        try:
+            data = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            data = b""
+        try:
+            for key, regex in regexes.items():
+                match = regex.search(data)
+                results[key] = _line_at(data, match.start(), match.end()) if match else None
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
+    return results
+
+
+# kustomize_resolves: file names kustomize accepts, kustomization keys that
+# reference local paths, and references left to kustomize itself (remote).
+KUSTOMIZATION_FILES = ("kustomization.yaml", "kustomization.yml", "Kustomization")
+KUSTOMIZE_RESOURCE_KEYS = ("resources", "bases", "components", "crds")
+KUSTOMIZE_PATCH_KEYS = ("patchesStrategicMerge", "patches")
+KUSTOMIZE_GENERATOR_KEYS = ("configMapGenerator", "secretGenerator")
+REMOTE_REF_RE = re.compile(r"^(?:[a-z][a-z0-9+.-]*://|git@|github\.com/)|\?ref=")
+KUSTOMIZE_EVIDENCE_PROBLEMS = 3
+
+
+# yaml_tree_valid: parse in a process pool once this many files changed
+# (smaller batches are cheaper in-process); evidence lists this many failures.
+YAML_TREE_POOL_MIN = 16
+YAML_TREE_WORKERS = _env_int("DRIFT_YAML_WORKERS", 0) or os.cpu_count() or 1
+YAML_TREE_EVIDENCE_FILES = 5
+
+# Network claims are probed together before a pass evaluates them (see
+# scripts/net_probe.py); they have no local input to watch or fingerprint.
+NETWORK_METHODS = {"http_ok", "tcp_reachable", "cluster_resource"}
+# tcp_reachable results are shared by passes (and loop ticks) for TCP_CACHE_TTL
+# seconds through ai/state/tcp_cache.json.
+TCP_CACHE_TTL = _env_float("DRIFT_TCP_TTL", 30.0)
+
+# cluster_resource claims are answered from one `kubectl get KINDS -A -o json`
+# snapshot (ai/state/cluster_snapshot.json), fetched again after
+# CLUSTER_SNAPSHOT_TTL seconds or when a claim needs a kind it lacks.
+# DRIFT_KUBECTL replaces the kubectl command (e.g. with a stub printing JSON).
+CLUSTER_SNAPSHOT_TTL = _env_float("DRIFT_CLUSTER_TTL", 60.0)
+CLUSTER_EVIDENCE_OBJECTS = 3
+
+# Claim.latency_ms is an EWMA of evaluation wall time. `measure --budget`
+# evaluates claims in order of value (safety x impact) per expected second,
+# and starts a claim only if its worst case (the timeout of command and
+# network claims) fits in the time left; the rest are carried over.
+LATENCY_EWMA_ALPHA = 0.3
+BUDGET_MIN_VALUE = 0.05
+
+# Adaptive timeouts for command and network claims: each claim keeps a
+# streaming latency sketch (ai/state/claim_latency.json; log-spaced buckets,
+# ~5% relative error, halved once they hold LATENCY_SKETCH_MAX samples so old
+# behaviour fades). Once min_samples are in, the timeout is the quantile x
+# factor, times backoff ** consecutive timeouts, clamped to the floor and
+# ceiling; `timeouts:` in stage_contracts.yaml overrides these defaults
+# (globally and per method).
+TIMEOUT_METHODS = {"command_succeeds"} | NETWORK_METHODS
+DEFAULT_TIMEOUT_POLICY = {
+    "adaptive": True, "quantile": 0.99, "factor": 3.0, "min_samples": 5,
+    "backoff": 2.0, "floor": 1.0, "ceiling": 120.0,
+}
+LATENCY_SKETCH_GAMMA = 1.1
+LATENCY_SKETCH_MAX = 200
+LATENCY_SKETCH_RETENTION = 30 * 24 * 3600
+MAX_BACKOFF_STEPS = 8
+
+
+def yaml_file_status(path: str, known_sha: Optional[str] = None) -> tuple:
+    """
+    (sha256, parse error or None, parsed?) for one file; runs in pool workers.
+
+    The parse is skipped when the content hash equals known_sha.
+    """
+    import yaml_io
+    data = Path(path).read_bytes()
+    sha = hashlib.sha256(data).hexdigest()
+    if sha == known_sha:
+        return sha, None, False
+    try:
+        yaml_io.loads_all(data.decode("utf-8"))
+    except (yaml_io.YAMLError, UnicodeDecodeError) as e:
+        return sha, str(e).splitlines()[0][:80], True
+    return sha, None, True
+
+
+def resource_matches(resource: str, item: dict) -> bool:
+    """
+    Whether a cluster object is of a kubectl resource type: plural or
+    singular kind, optionally group-qualified (pods, node,
+    kustomizations.kustomize.toolkit.fluxcd.io).
+    """
+    name, _, group = resource.lower().partition(".")
+    kind = str(item.get("kind", "")).lower()
+    if not kind or name not in (kind, kind + "s", kind + "es", kind[:-1] + "ies"):
+        return False
+    return not group or str(item.get("apiVersion", "")).lower().startswith(group + "/")
+
+
+def selector_matches(selector: Optional[str], labels: dict) -> bool:
+    """Equality-based label selector: "app=web,tier!=db,release" (all terms must hold)."""
+    for term in (selector or "").split(","):
+        term = term.strip()
+        if not term:
+            continue
+        if "!=" in term:
+            key, _, value = term.partition("!=")
+            if labels.get(key.strip()) == value.strip():
+                return False
+        elif "=" in term:
+            key, _, value = term.partition("=")
+            if labels.get(key.strip()) != value.strip().lstrip("="):
+                return False
+        elif term.startswith("!"):
+            if term[1:] in labels:
+                return False
+        elif term not in labels:
+            return False
+    return True
+
+
+def resolve_key_path(obj, key_path: str):
+    """
+    Value at a dotted path in a cluster object, or None. In a list, a
+    numeric segment indexes and any other segment selects the entry whose
+    "type" it names, so status.conditions.Ready.status reads a condition.
+    """
+    for part in key_path.split("."):
+        if isinstance(obj, dict):
+            obj = obj.get(part)
+        elif isinstance(obj, list):
+            if part.isdigit():
+                obj = obj[int(part)] if int(part) < len(obj) else None
+            else:
+                obj = next((e for e in obj if isinstance(e, dict) and e.get("type") == part), None)
+        else:
+            return None
+        if obj is None:
+            return None
+    return obj
+
+
+def sketch_add(sketch: dict, ms: float) -> None:
+    """Add a latency sample (ms) to a sketch: {"count", "buckets": {index: weight}}."""
+    buckets = sketch.setdefault("buckets", {})
+    index = str(math.ceil(math.log(max(ms, 0.001), LATENCY_SKETCH_GAMMA)))
+    buckets[index] = buckets.get(index, 0) + 1
+    sketch["count"] = sketch.get("count", 0) + 1
+    if sketch["count"] > LATENCY_SKETCH_MAX:
+        for key in list(buckets):
+            buckets[key] = round(buckets[key] / 2, 3)
+            if buckets[key] < 0.01:
+                del buckets[key]
+        sketch["count"] = round(sum(buckets.values()), 3)
+
+
+def sketch_quantile(sketch: dict, quantile: float) -> Optional[float]:
+    """Upper bound (ms) of the bucket holding the quantile, or None for an empty sketch."""
+    buckets = sorted((int(k), v) for k, v in (sketch.get("buckets") or {}).items())
+    total = sum(v for _, v in buckets)
+    if not total:
+        return None
+    seen = 0.0
+    for index, weight in buckets:
+        seen += weight
+        if seen >= quantile * total:
+            return LATENCY_SKETCH_GAMMA ** index
+    return LATENCY_SKETCH_GAMMA ** buckets[-1][0]
+
+
+def _path_stamp(path: str) -> Optional[str]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+def _atomic_write_text(path: Path, text: str) -> None:
+    """Write through a per-process temp file and os.replace: readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    temp_file.write_text(text)
+    os.replace(temp_file, path)
+
+
+def _atomic_write_json(path: Path, data, indent: Optional[int] = None) -> None:
+    _atomic_write_text(path, json.dumps(data, indent=indent))
 
 
 class ClaimPriority(str, Enum):
@@ -73,6 +548,10 @@ class ClaimEvaluation:
     command: Optional[str] = None  # Command for command_succeeds
     timeout: int = 10  # Timeout in seconds for command_succeeds
     artifact_name: Optional[str] = None  # Artifact name for artifact_valid
+    ports: Optional[list] = None  # Ports for tcp_reachable (e.g., [22, 6443])
+    namespace: Optional[str] = None  # Namespace for cluster_resource (default: all namespaces)
+    selector: Optional[str] = None  # Label selector for cluster_resource (e.g., "app=source-controller")
+    match: str = "all"  # cluster_resource key_path must hold for "all" matching objects or "any" one
 
 
 @dataclass
@@ -97,6 +576,11 @@ class Claim:
     # v7 P0: Gating priority - gating claims must pass for stage completion
     priority: str = "structural"  # "gating", "structural", "operational"
     stage: Optional[str] = None  # Which stage this claim belongs to
+    # Root-cause claim whose failure settled this one (derived evidence, not evaluated)
+    implied_by: Optional[str] = None
+    # Smoothed evaluation wall time, and whether the last budgeted pass skipped this claim
+    latency_ms: Optional[float] = None
+    carried_over: bool = False
 
     def to_dict(self) -> dict:
         return {
@@ -114,6 +598,10 @@ class Claim:
                 "command": self.evaluation.command,
                 "timeout": self.evaluation.timeout,
                 "artifact_name": self.evaluation.artifact_name,
+                "ports": self.evaluation.ports,
+                "namespace": self.evaluation.namespace,
+                "selector": self.evaluation.selector,
+                "match": self.evaluation.match,
             },
             "status": self.status.value if isinstance(self.status, ClaimStatus) else self.status,
             "last_evaluated": self.last_evaluated,
@@ -127,6 +615,9 @@ class Claim:
             "impact_score": self.impact_score,
             "priority": self.priority,
             "stage": self.stage,
+            "implied_by": self.implied_by,
+            "latency_ms": self.latency_ms,
+            "carried_over": self.carried_over,
         }
 
     @classmethod
@@ -147,6 +638,10 @@ class Claim:
                 command=eval_data.get("command"),
                 timeout=eval_data.get("timeout", 10),
                 artifact_name=eval_data.get("artifact_name"),
+                ports=eval_data.get("ports"),
+                namespace=eval_data.get("namespace"),
+                selector=eval_data.get("selector"),
+                match=eval_data.get("match", "all"),
             ),
             status=ClaimStatus(data.get("status", "UNKNOWN")),
             last_evaluated=data.get("last_evaluated"),
@@ -160,6 +655,9 @@ class Claim:
             impact_score=data.get("impact_score", 0.0),
             priority=data.get("priority", "structural"),
             stage=data.get("stage"),
+            implied_by=data.get("implied_by"),
+            latency_ms=data.get("latency_ms"),
+            carried_over=data.get("carried_over", False),
         )
 
 
@@ -190,6 +688,9 @@ class DriftState:
     structural_drift: DriftLane = field(default_factory=DriftLane)
     operational_drift: DriftLane = field(default_factory=DriftLane)
     last_measured: Optional[str] = None
+    # Claims a budgeted measurement left at their previous status
+    carried_over_claims: int = 0
+    budget_seconds: Optional[float] = None
     claims: list = field(default_factory=list)
 
     def to_dict(self) -> dict:
@@ -206,10 +707,176 @@ class DriftState:
             "structural_drift": self.structural_drift.to_dict(),
             "operational_drift": self.operational_drift.to_dict(),
             "last_measured": self.last_measured,
+            "carried_over_claims": self.carried_over_claims,
+            "budget_seconds": self.budget_seconds,
             "claims": [c.to_dict() if isinstance(c, Claim) else c for c in self.claims],
         }
 
 
+class InotifyWatcher:
+    """
+    Minimal Linux inotify binding (ctypes, no third-party dependency).
+
+    Watches directories (non-recursive) and blocks in select() until
+    something changes, so an idle watcher costs no CPU. Besides the changed
+    directories, wait() raises two flags for the caller to act on and clear:
+    overflowed (the kernel queue dropped events, so the changed set is
+    incomplete) and tree_changed (a directory appeared, or a watched one went
+    away, so the set of directories to watch may differ).
+    """
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+                  IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+
+        libc_name = ctypes.util.find_library("c")
+        if not sys.platform.startswith("linux") or not libc_name:
+            raise OSError("inotify is only available on Linux")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("libc does not provide inotify")
+        self.fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._wd_to_dir: dict[int, Path] = {}
+        self._dir_to_wd: dict[Path, int] = {}
+        self.overflowed = False
+        self.tree_changed = False
+
+    def set_dirs(self, dirs: set) -> None:
+        for stale in set(self._dir_to_wd) - dirs:
+            wd = self._dir_to_wd.pop(stale)
+            self._wd_to_dir.pop(wd, None)
+            self._libc.inotify_rm_watch(self.fd, wd)
+        for directory in dirs - set(self._dir_to_wd):
+            wd = self._libc.inotify_add_watch(self.fd, str(directory).encode(), self.WATCH_MASK)
+            if wd >= 0:
+                self._dir_to_wd[directory] = wd
+                self._wd_to_dir[wd] = directory
+
+    def reset(self) -> None:
+        """Drop every watch (and the flags) so the next set_dirs() adds them all again."""
+        for wd in self._wd_to_dir:
+            self._libc.inotify_rm_watch(self.fd, wd)
+        self._wd_to_dir.clear()
+        self._dir_to_wd.clear()
+        self.overflowed = self.tree_changed = False
+
+    def wait(self, timeout: Optional[float]) -> set:
+        """Return the set of watched directories that saw events (empty on timeout)."""
+        import select
+
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        return self.read_events(buf)
+
+    def read_events(self, buf: bytes) -> set:
+        """Directories named by a buffer of inotify_event records; sets the overflow/tree flags."""
+        import struct
+
+        changed = set()
+        offset = 0
+        header = struct.calcsize("iIII")
+        while offset + header <= len(buf):
+            wd, mask, _cookie, name_len = struct.unpack_from("iIII", buf, offset)
+            offset += header + name_len
+            if mask & self.IN_Q_OVERFLOW:
+                self.overflowed = True
+                continue
+            directory = self._wd_to_dir.get(wd)
+            if directory is None:
+                continue
+            changed.add(directory)
+            if mask & self.IN_IGNORED:
+                # The kernel already removed this watch (directory deleted or unmounted)
+                self._wd_to_dir.pop(wd, None)
+                self._dir_to_wd.pop(directory, None)
+                self.tree_changed = True
+            elif mask & self.IN_MOVE_SELF or (mask & self.IN_ISDIR and mask & (self.IN_CREATE | self.IN_MOVED_TO)):
+                self.tree_changed = True
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """
+    Portable fallback: compares per-directory scandir snapshots on an
+    interval. Raises tree_changed like InotifyWatcher when subdirectories
+    come or go; it never overflows.
+    """
+
+    def __init__(self, interval: float = 2.0):
+        self.interval = interval
+        self._snapshots: dict[Path, dict] = {}
+        self.overflowed = False
+        self.tree_changed = False
+
+    @staticmethod
+    def _snapshot(directory: Path) -> dict:
+        entries = {}
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                        entries[entry.name] = (st.st_mtime_ns, st.st_size, entry.is_dir(follow_symlinks=False))
+                    except OSError:
+                        continue
+        except OSError:
+            return {}
+        return entries
+
+    @staticmethod
+    def _subdirs(snapshot: Optional[dict]) -> set:
+        return {name for name, (_, _, is_dir) in (snapshot or {}).items() if is_dir}
+
+    def set_dirs(self, dirs: set) -> None:
+        self._snapshots = {d: self._snapshots.get(d) or self._snapshot(d) for d in dirs}
+
+    def reset(self) -> None:
+        self._snapshots.clear()
+        self.overflowed = self.tree_changed = False
+
+    def wait(self, timeout: Optional[float]) -> set:
+        time.sleep(self.interval if timeout is None else min(self.interval, timeout))
+        changed = set()
+        for directory, previous in self._snapshots.items():
+            current = self._snapshot(directory)
+            if current != previous:
+                self._snapshots[directory] = current
+                changed.add(directory)
+                if self._subdirs(current) != self._subdirs(previous) or not directory.is_dir():
+                    self.tree_changed = True
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
 class DriftEngine:
     """
     v7 Drift Engine - Core claims extraction and evaluation component.
@@ -221,9 +888,47 @@ class DriftEngine:
         self.drift_file = self.state_dir / "drift.json"
         self.now_file = self.state_dir / "now.json"
         self.timeline_file = self.state_dir / "timeline.json"
+        self.timeline_stats_file = self.state_dir / "timeline_stats.json"
         self.stage_contracts_file = self.repo_root / "ai/config/stage_contracts.yaml"
         self.cluster_identity_file = self.state_dir / "cluster_identity.json"
         self.artifacts_file = self.state_dir / "artifacts.json"
+        # Prometheus textfile-collector output (node_exporter --collector.textfile.directory)
+        self.metrics_file = Path(os.environ.get("DRIFT_METRICS_FILE") or self.state_dir / "drift.prom")
+        self.metrics_state_file = self.state_dir / "drift_metrics.json"
+        # Evaluator latencies observed since the last metrics write, keyed by method
+        self._eval_latencies: dict[str, list[float]] = {}
+        # Directory listings (name -> os.DirEntry, None if not a directory)
+        # shared by the claims of one measurement pass; None outside a pass
+        self._dir_listings: Optional[dict] = None
+        # file_content keys per file for the current pass, and the scan results
+        self._content_keys: dict[str, list] = {}
+        self._content_hits: dict[str, dict] = {}
+        # kustomize_resolves per-directory parse results (ai/state/kustomize_cache.json)
+        self.kustomize_cache_file = self.state_dir / "kustomize_cache.json"
+        self._kustomize_nodes: Optional[dict] = None
+        # yaml_tree_valid per-file content hashes and parse results (ai/state/yaml_tree_cache.json)
+        self.yaml_tree_cache_file = self.state_dir / "yaml_tree_cache.json"
+        # (path, stamp) -> parse error or None, for manifests shared by several kustomizations
+        self._manifest_errors: dict[tuple, Optional[str]] = {}
+        # http_ok results of the current pass, keyed by (url, timeout)
+        self._http_results: dict[tuple, object] = {}
+        # tcp_reachable results of the current pass, keyed by (host, port), and their TTL cache
+        self._tcp_results: dict[tuple, dict] = {}
+        self.tcp_cache_file = self.state_dir / "tcp_cache.json"
+        # cluster_resource: kubectl snapshot shared by the claims of a pass, and its TTL file
+        self._cluster_snapshot: Optional[dict] = None
+        self.cluster_snapshot_file = self.state_dir / "cluster_snapshot.json"
+        # Adaptive timeouts: per-claim latency sketches (loaded lazily) and the
+        # merged timeout policy per method, both saved/dropped at the end of a pass
+        self.claim_latency_file = self.state_dir / "claim_latency.json"
+        self._latency_sketches: Optional[dict] = None
+        self._latency_dirty = False
+        self._timeout_policies: dict[str, dict] = {}
+        # Budget mode: timeouts of carried-over claims capped to the time left, per claim id
+        self._budget_caps: dict[str, float] = {}
+        self._root_dir = os.path.normpath(str(self.repo_root))
+        # Latest check_stage_gating report per stage in this process
+        self._gating_results: dict[str, dict] = {}
 
         # Protected files that patches cannot modify (v7 canonical list)
         # Source of truth: ai/config/config.yaml (protected_files)
@@ -280,6 +985,8 @@ class DriftEngine:
                 structural_drift=DriftLane(**data.get("structural_drift", {})),
                 operational_drift=DriftLane(**data.get("operational_drift", {})),
                 last_measured=data.get("last_measured"),
+                carried_over_claims=data.get("carried_over_claims", 0),
+                budget_seconds=data.get("budget_seconds"),
                 claims=claims,
             )
         except (json.JSONDecodeError, KeyError) as e:
@@ -288,21 +995,24 @@ class DriftEngine:
 
     def save_drift_state(self, state: DriftState) -> None:
         """Save drift state to file atomically."""
-        temp_file = self.drift_file.with_suffix(".tmp")
-        with open(temp_file, "w") as f:
-            json.dump(state.to_dict(), f, indent=2)
-        temp_file.rename(self.drift_file)
+        _atomic_write_json(self.drift_file, state.to_dict(), indent=2)
 
     def append_timeline(self, state: DriftState, claim_id: Optional[str] = None,
                         patch_applied: bool = False, drift_delta: float = 0.0) -> None:
-        """Append entry to timeline.json."""
-        timeline = []
-        if self.timeline_file.exists():
-            try:
-                with open(self.timeline_file) as f:
-                    timeline = json.load(f)
-            except json.JSONDecodeError:
-                timeline = []
+        """
+        Append entry to timeline.json and fold it into timeline_stats.json.
+
+        The entry is spliced in before the closing bracket, so appending does
+        not re-read or rewrite earlier history. Claims whose status changed
+        since the previous entry are recorded under "transitions".
+        """
+        stats = self.load_timeline_stats()
+        known = stats.get("claims", {})
+        transitions = {}
+        for claim in state.claims:
+            status = claim.status.value if isinstance(claim.status, ClaimStatus) else claim.status
+            if (known.get(claim.id) or {}).get("status") != status:
+                transitions[claim.id] = status
 
         entry = {
             "timestamp": datetime.now(timezone.utc).isoformat(),
@@ -313,11 +1023,114 @@ class DriftEngine:
             "claim_id": claim_id,
             "patch_applied": patch_applied,
             "drift_delta": drift_delta,
+            "transitions": transitions,
         }
-        timeline.append(entry)
+        # Same layout json.dump(timeline, indent=2) produces.
+        item = "  " + json.dumps(entry, indent=2).replace("\n", "\n  ")
+
+        appended = False
+        if self.timeline_file.is_file():
+            with open(self.timeline_file, "r+b") as f:
+                end = f.seek(0, os.SEEK_END)
+                start = max(0, end - 64)
+                f.seek(start)
+                tail = f.read().rstrip()
+                if tail.endswith(b"]"):
+                    body = tail[:-1].rstrip()
+                    f.seek(start + len(body))
+                    f.truncate()
+                    # Entries are objects, so only an empty array has "[" before the bracket.
+                    sep = "\n" if body.endswith(b"[") else ",\n"
+                    f.write((sep + item + "\n]").encode("utf-8"))
+                    appended = True
+        if not appended:
+            _atomic_write_text(self.timeline_file, "[\n" + item + "\n]")
+            stats = {}
+
+        fold_timeline_entry(stats, entry)
+        stats["timeline_bytes"] = self.timeline_file.stat().st_size
+        self.save_timeline_stats(stats)
+
+    def load_timeline_stats(self, rebuild: bool = False) -> dict:
+        """
+        History aggregates matching the current timeline.json.
 
-        with open(self.timeline_file, "w") as f:
-            json.dump(timeline, f, indent=2)
+        The stats record the timeline size they cover; when it no longer
+        matches (stats missing or written by an older engine) they are rebuilt
+        by streaming the timeline once.
+        """
+        stats = {}
+        if not rebuild:
+            try:
+                stats = json.loads(self.timeline_stats_file.read_text())
+            except (OSError, json.JSONDecodeError):
+                stats = {}
+        try:
+            size = self.timeline_file.stat().st_size
+        except OSError:
+            return {}
+        if isinstance(stats, dict) and stats.get("timeline_bytes") == size:
+            return stats
+        stats = {}
+        for entry in iter_timeline(self.timeline_file):
+            if isinstance(entry, dict):
+                fold_timeline_entry(stats, entry)
+        stats["timeline_bytes"] = size
+        self.save_timeline_stats(stats)
+        return stats
+
+    def save_timeline_stats(self, stats: dict) -> None:
+        _atomic_write_json(self.timeline_stats_file, stats, indent=2)
+
+    def drift_history(self, rebuild: bool = False) -> dict:
+        """Convergence report derived from the timeline aggregates."""
+        stats = self.load_timeline_stats(rebuild=rebuild)
+        if not stats.get("entries"):
+            return {"entries": 0}
+
+        def per_hour(start_ts: float, start_score: float, end_ts: float, end_score: float) -> Optional[float]:
+            hours = (end_ts - start_ts) / 3600
+            # Negative velocity means drift is going down (converging).
+            return round((end_score - start_score) / hours, 6) if hours > 0 else None
+
+        first, last = stats["first"], stats["last"]
+        window = stats.get("window", [])
+        claims = stats.get("claims", {})
+        time_to_pass = {
+            claim_id: {
+                "passes": info["passes"],
+                "mean_seconds": round(info["time_to_pass_total"] / info["passes"], 3),
+                "last_seconds": round(info["time_to_pass_last"], 3),
+                "max_seconds": round(info["time_to_pass_max"], 3),
+            }
+            for claim_id, info in sorted(claims.items())
+            if info.get("passes")
+        }
+        stalled = [
+            {"episode": name, **episode}
+            for name, episode in sorted(stats.get("episodes", {}).items())
+            if episode["since_improvement"] >= STALL_ENTRIES and episode.get("last_score", 0) > 0
+        ]
+        return {
+            "entries": stats["entries"],
+            "first": first,
+            "last": last,
+            "velocity_per_hour": per_hour(_epoch(first["timestamp"]), first["drift_score"],
+                                          _epoch(last["timestamp"]), last["drift_score"]),
+            "recent_velocity_per_hour": (
+                per_hour(window[0][0], window[0][1], window[-1][0], window[-1][1]) if len(window) > 1 else None
+            ),
+            "moving_average": {
+                "window": len(window),
+                "drift": round(sum(score for _, score in window) / len(window), 6) if window else None,
+                "ewma": {lane: round(value, 6) for lane, value in stats.get("ewma", {}).items()},
+            },
+            "time_to_pass": time_to_pass,
+            "failing_claims": sorted(cid for cid, info in claims.items() if info.get("status") == ClaimStatus.FAIL.value),
+            "patches": stats.get("patches", {"applied": 0}),
+            "stalled_episodes": stalled,
+            "episodes": len(stats.get("episodes", {})),
+        }
 
     def update_now_state(self, active_claim: Optional[str] = None,
                          last_patch: Optional[str] = None,
@@ -333,8 +1146,128 @@ class DriftEngine:
             "provider_assignments": provider_assignments or {},
             "updated_at": datetime.now(timezone.utc).isoformat(),
         }
-        with open(self.now_file, "w") as f:
-            json.dump(now_state, f, indent=2)
+        _atomic_write_json(self.now_file, now_state, indent=2)
+
+    # =========================================================================
+    # Prometheus metrics (textfile collector)
+    # =========================================================================
+
+    def load_metrics_state(self) -> dict:
+        """Load cumulative counters/histograms backing the metrics file."""
+        base = {"measurements_total": 0, "evaluator_latency": {}}
+        if self.metrics_state_file.is_file():
+            try:
+                base.update(json.loads(self.metrics_state_file.read_text()))
+            except (json.JSONDecodeError, OSError):
+                pass
+        return base
+
+    def record_evaluator_latencies(self, metrics_state: dict) -> None:
+        """Fold pending evaluator latencies into the cumulative histograms."""
+        histograms = metrics_state.setdefault("evaluator_latency", {})
+        for method, samples in self._eval_latencies.items():
+            hist = histograms.setdefault(method, {
+                "buckets": [0] * len(EVALUATOR_LATENCY_BUCKETS),
+                "sum": 0.0,
+                "count": 0,
+            })
+            for value in samples:
+                for i, bound in enumerate(EVALUATOR_LATENCY_BUCKETS):
+                    if value <= bound:
+                        hist["buckets"][i] += 1
+                hist["sum"] += value
+                hist["count"] += 1
+        self._eval_latencies = {}
+
+    def count_deferred_claims(self, claims: list) -> int:
+        """Count FAIL claims whose defer_until is still in the future."""
+        now = datetime.now(timezone.utc)
+        deferred = 0
+        for claim in claims:
+            if claim.status != ClaimStatus.FAIL or not claim.defer_until:
+                continue
+            try:
+                if datetime.fromisoformat(claim.defer_until) > now:
+                    deferred += 1
+            except ValueError:
+                pass
+        return deferred
+
+    def render_metrics(self, state: DriftState, metrics_state: dict, drift_delta: float,
+                       bootstrap_window: bool) -> str:
+        """Render drift state in the Prometheus text exposition format."""
+        p = METRICS_PREFIX
+        lines = []
+
+        def metric(name: str, mtype: str, help_text: str, samples: list) -> None:
+            lines.append(f"# HELP {p}_{name} {help_text}")
+            lines.append(f"# TYPE {p}_{name} {mtype}")
+            for labels, value in samples:
+                label_str = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{p}_{name}{{{label_str}}} {value}" if label_str else f"{p}_{name} {value}")
+
+        metric("score", "gauge", "Fraction of claims currently failing.", [({}, state.drift_score)])
+        metric("claims", "gauge", "Claims by status.", [
+            ({"status": "pass"}, state.pass_claims),
+            ({"status": "fail"}, state.fail_claims),
+            ({"status": "unknown"}, state.unknown_claims),
+            ({"status": "blocked"}, state.blocked_claims),
+        ])
+        lanes = (("structural", state.structural_drift), ("operational", state.operational_drift))
+        metric("lane_score", "gauge", "Drift score per lane.",
+               [({"lane": name}, lane.score) for name, lane in lanes])
+        lane_samples = []
+        for name, lane in lanes:
+            lane_samples.extend([
+                ({"lane": name, "status": "pass"}, lane.pass_claims),
+                ({"lane": name, "status": "fail"}, lane.fail_claims),
+                ({"lane": name, "status": "unknown"}, lane.unknown_claims),
+                ({"lane": name, "status": "blocked"}, lane.blocked_claims),
+            ])
+        metric("lane_claims", "gauge", "Claims by lane and status.", lane_samples)
+        metric("bootstrap_window", "gauge", "1 while structural drift keeps the bootstrap window open.",
+               [({}, 1 if bootstrap_window else 0)])
+        metric("carried_over_claims", "gauge", "Claims a budgeted measurement left unevaluated.",
+               [({}, state.carried_over_claims)])
+        metric("deferred_claims", "gauge", "FAIL claims deferred for infrastructure reasons.",
+               [({}, self.count_deferred_claims(state.claims))])
+        metric("timeline_delta", "gauge", "Drift score change since the previous measurement.",
+               [({}, round(drift_delta, 3))])
+        metric("measurements_total", "counter", "Completed drift measurements.",
+               [({}, metrics_state.get("measurements_total", 0))])
+        measured_ts = time.time()
+        if state.last_measured:
+            try:
+                measured_ts = datetime.fromisoformat(state.last_measured).timestamp()
+            except ValueError:
+                pass
+        metric("last_measured_timestamp_seconds", "gauge", "Unix time of the last drift measurement.",
+               [({}, round(measured_ts, 3))])
+        metric("episode_info", "gauge", "Current convergence episode.",
+               [({"episode": state.episode, "memo_hash": state.memo_hash}, 1)])
+
+        name = f"{p}_evaluator_latency_seconds"
+        lines.append(f"# HELP {name} Claim evaluation latency per evaluation method.")
+        lines.append(f"# TYPE {name} histogram")
+        for method, hist in sorted(metrics_state.get("evaluator_latency", {}).items()):
+            for bound, count in zip(EVALUATOR_LATENCY_BUCKETS, hist["buckets"]):
+                lines.append(f'{name}_bucket{{method="{method}",le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{method="{method}",le="+Inf"}} {hist["count"]}')
+            lines.append(f'{name}_sum{{method="{method}"}} {round(hist["sum"], 6)}')
+            lines.append(f'{name}_count{{method="{method}"}} {hist["count"]}')
+
+        return "\n".join(lines) + "\n"
+
+    def write_metrics(self, state: DriftState, drift_delta: float = 0.0,
+                      bootstrap_window: bool = False) -> None:
+        """Write the textfile-collector file atomically (node_exporter never sees a partial file)."""
+        metrics_state = self.load_metrics_state()
+        metrics_state["measurements_total"] = metrics_state.get("measurements_total", 0) + 1
+        self.record_evaluator_latencies(metrics_state)
+
+        _atomic_write_json(self.metrics_state_file, metrics_state, indent=2)
+        _atomic_write_text(self.metrics_file,
+                           self.render_metrics(state, metrics_state, drift_delta, bootstrap_window))
 
     def extract_claims_from_memo(self, memo_path: str, memo_hash: str, episode: str) -> list[Claim]:
         """
@@ -445,17 +1378,756 @@ class DriftEngine:
 
         return unique_claims
 
+    def _listing(self, directory: str, listings: dict) -> Optional[dict]:
+        """Entries of one directory, read with a single os.scandir."""
+        if directory not in listings:
+            try:
+                with os.scandir(directory) as it:
+                    listings[directory] = {entry.name: entry for entry in it}
+            except (FileNotFoundError, NotADirectoryError, PermissionError):
+                listings[directory] = None
+        return listings[directory]
+
+    def prefetch_claim_targets(self, claims: list[Claim]) -> int:
+        """
+        List every directory holding a stat-style claim target once.
+
+        Claims are grouped by parent directory, so the syscall count follows
+        the number of distinct directories rather than the number of claims.
+        Starts (or extends) a measurement pass; end_measurement_pass() drops
+        the listings. Returns the number of directories listed.
+        """
+        if self._dir_listings is None:
+            self._dir_listings = {}
+        listings = self._dir_listings
+        parents = set()
+        for claim in claims:
+            target = claim.evaluation.target
+            if claim.evaluation.method == "file_content" and target:
+                # Every content claim on a file is answered by one scan of it
+                self._content_keys.setdefault(str(self.repo_root / target), []).extend(self.content_keys(claim))
+            if claim.evaluation.method not in STAT_METHODS or not target:
+                continue
+            if os.path.normpath(target).startswith("..") or os.path.isabs(target):
+                continue  # outside the repo: evaluated with plain stat calls
+            if GLOB_MAGIC_RE.search(target):
+                # Globs are expanded lazily from the same listings; prefetch the literal prefix.
+                parent = os.path.normpath(target[:GLOB_MAGIC_RE.search(target).start()].rpartition("/")[0] or ".")
+            else:
+                parent = os.path.dirname(os.path.normpath(target))
+            # Same keys _target_entry() and _glob_target() use
+            parents.add(os.path.join(self._root_dir, parent) if parent not in ("", ".") else self._root_dir)
+        parents -= set(listings)
+        for directory in sorted(parents):
+            self._listing(directory, listings)
+        return len(parents)
+
+    def end_measurement_pass(self) -> None:
+        self._dir_listings = None
+        self._content_keys = {}
+        self._content_hits = {}
+        self._http_results = {}
+        self._tcp_results = {}
+        self._cluster_snapshot = None
+        self._timeout_policies = {}
+        self._budget_caps = {}
+        if self._latency_dirty:
+            self.save_latency_sketches()
+
+    def latency_sketches(self) -> dict:
+        if self._latency_sketches is None:
+            try:
+                data = json.loads(self.claim_latency_file.read_text())
+            except (FileNotFoundError, json.JSONDecodeError):
+                data = {}
+            self._latency_sketches = data if isinstance(data, dict) else {}
+        return self._latency_sketches
+
+    def save_latency_sketches(self) -> None:
+        """Save the sketches atomically, dropping claims not evaluated within the retention window."""
+        now = time.time()
+        sketches = {claim_id: sketch for claim_id, sketch in self.latency_sketches().items()
+                    if now - sketch.get("seen", 0) < LATENCY_SKETCH_RETENTION}
+        _atomic_write_json(self.claim_latency_file, sketches)
+        self._latency_sketches = sketches
+        self._latency_dirty = False
+
+    def record_latency(self, claim: Claim, ms: float, timed_out: bool) -> None:
+        """Fold one execution into the claim's sketch; consecutive timeouts drive the backoff."""
+        sketch = self.latency_sketches().setdefault(claim.id, {})
+        sketch_add(sketch, ms)
+        sketch["timeouts"] = min(sketch.get("timeouts", 0) + 1, MAX_BACKOFF_STEPS) if timed_out else 0
+        sketch["seen"] = time.time()
+        self._latency_dirty = True
+
+    def timeout_policy(self, method: str) -> dict:
+        """DEFAULT_TIMEOUT_POLICY overlaid with stage_contracts.yaml `timeouts:` and its per-method entry."""
+        if method not in self._timeout_policies:
+            config = self.load_stage_contracts().get("timeouts") or {}
+            policy = dict(DEFAULT_TIMEOUT_POLICY)
+            policy.update({k: v for k, v in config.items() if k in DEFAULT_TIMEOUT_POLICY})
+            policy.update({k: v for k, v in ((config.get("methods") or {}).get(method) or {}).items()
+                           if k in DEFAULT_TIMEOUT_POLICY})
+            self._timeout_policies[method] = policy
+        return self._timeout_policies[method]
+
+    def adaptive_timeout(self, claim: Claim) -> tuple:
+        """
+        (timeout seconds, evidence note or None) for a command/network claim.
+        The configured timeout is used until the sketch has min_samples. A
+        budget cap (see fits_budget) lowers either.
+        """
+        value, note = self._policy_timeout(claim)
+        cap = self._budget_caps.get(claim.id)
+        if cap is not None and cap < value:
+            return cap, f"timeout {value:g}s capped to {cap:.3g}s of budget"
+        return value, note
+
+    def _policy_timeout(self, claim: Claim) -> tuple:
+        configured = float(claim.evaluation.timeout or 10)
+        policy = self.timeout_policy(claim.evaluation.method)
+        if claim.evaluation.method not in TIMEOUT_METHODS or not policy["adaptive"]:
+            return configured, None
+        sketch = self.latency_sketches().get(claim.id) or {}
+        if sketch.get("count", 0) < policy["min_samples"]:
+            return configured, None
+        quantile = sketch_quantile(sketch, float(policy["quantile"])) / 1000
+        backoff = float(policy["backoff"]) ** sketch.get("timeouts", 0)
+        raw = quantile * float(policy["factor"]) * backoff
+        value = round(min(max(raw, float(policy["floor"])), float(policy["ceiling"])), 3)
+        note = (f"adaptive timeout {value:g}s: p{float(policy['quantile']) * 100:g} {quantile:.3g}s"
+                f" x{float(policy['factor']):g}" + (f" x{backoff:g} backoff" if backoff > 1 else ""))
+        if value != round(raw, 3):
+            note += " (floor)" if value > raw else " (ceiling)"
+        return value, note
+
+    def claim_timeout(self, claim: Claim) -> float:
+        return self.adaptive_timeout(claim)[0]
+
+    def prefetch_network_probes(self, claims: list[Claim], refresh: bool = False) -> int:
+        """
+        Probe every http_ok and tcp_reachable target among the claims at
+        once, in one event loop: HTTP over keep-alive connections pooled per
+        host, TCP as plain connects under a global cap. Ports checked less
+        than TCP_CACHE_TTL seconds ago are answered from the cache. The
+        cluster snapshot is loaded for all cluster_resource kinds at once.
+        refresh=True bypasses both the TCP cache and the snapshot file.
+        Results are held until end_measurement_pass(). Returns the number of
+        network probes.
+        """
+        cluster_claims = [c for c in claims if c.evaluation.method == "cluster_resource" and c.evaluation.target]
+        if cluster_claims:
+            self._cluster_snapshot = self.cluster_snapshot(
+                [self.cluster_kind(c) for c in cluster_claims],
+                max(self.claim_timeout(c) for c in cluster_claims),
+                refresh=refresh,
+            )
+        http_keys = [(claim.evaluation.target, self.claim_timeout(claim)) for claim in claims
+                     if claim.evaluation.method == "http_ok" and claim.evaluation.target]
+        http_keys = [key for key in dict.fromkeys(http_keys) if key not in self._http_results]
+        wanted: dict[tuple, float] = {}
+        for claim in claims:
+            if claim.evaluation.method == "tcp_reachable":
+                for host_port in self.tcp_targets(claim):
+                    if host_port not in self._tcp_results:
+                        wanted[host_port] = max(wanted.get(host_port, 0.0), self.claim_timeout(claim))
+        cache = self.load_tcp_cache() if wanted else {}
+        now = time.time()
+        tcp_keys = []
+        for (host, port), timeout in wanted.items():
+            entry = cache.get(f"{host}:{port}")
+            if not refresh and isinstance(entry, dict) and now - entry.get("checked_at", 0) < TCP_CACHE_TTL:
+                self._tcp_results[(host, port)] = dict(entry, cached=True)
+            else:
+                tcp_keys.append((host, port, timeout))
+        if not http_keys and not tcp_keys:
+            return 0
+        import net_probe
+        http_results, tcp_results = net_probe.probe(http_keys, tcp_keys)
+        self._http_results.update(http_results)
+        for (host, port, _), result in tcp_results.items():
+            cache[f"{host}:{port}"] = {"latency_ms": result.latency_ms, "error": result.error, "checked_at": now}
+            self._tcp_results[(host, port)] = dict(cache[f"{host}:{port}"], cached=False)
+        if tcp_results:
+            self.save_tcp_cache(cache, now)
+        return len(http_keys) + len(tcp_keys)
+
+    @staticmethod
+    def tcp_targets(claim: Claim) -> list[tuple]:
+        """(host, port) pairs of a tcp_reachable claim: target HOST or HOST:PORT plus `ports`."""
+        import net_probe
+        host, port = net_probe.split_host_port(claim.evaluation.target or "")
+        ports = claim.evaluation.ports
+        if isinstance(ports, (int, str)):
+            ports = str(ports).split(",")
+        ports = [int(p) for p in ports or [] if str(p).strip().isdigit()]
+        if port is not None:
+            ports.insert(0, port)
+        return [(host, p) for p in dict.fromkeys(ports)] if host else []
+
+    @staticmethod
+    def cluster_kind(claim: Claim) -> str:
+        """Resource type of a cluster_resource target ("pods", "kustomizations.kustomize.toolkit.fluxcd.io/apps")."""
+        return claim.evaluation.target.strip().partition("/")[0].lower()
+
+    def cluster_snapshot(self, kinds: list, timeout: float = 10, refresh: bool = False) -> dict:
+        """
+        Cluster objects of the given kinds: the pass snapshot or the
+        snapshot file while fresh and covering every kind, otherwise a new
+        single kubectl fetch (of these kinds plus those already covered).
+        refresh=True always fetches.
+        """
+        kinds = set(kinds)
+        now = time.time()
+        snapshot = None if refresh else self._cluster_snapshot
+        if snapshot is None and not refresh:
+            try:
+                snapshot = json.loads(self.cluster_snapshot_file.read_text())
+            except (FileNotFoundError, json.JSONDecodeError):
+                snapshot = None
+        fresh = (isinstance(snapshot, dict) and isinstance(snapshot.get("kinds"), dict)
+                 and now - snapshot.get("fetched_at", 0) < CLUSTER_SNAPSHOT_TTL)
+        if fresh and kinds <= set(snapshot["kinds"]):
+            return snapshot
+        if fresh:
+            kinds |= set(snapshot["kinds"])
+        snapshot = self.fetch_cluster_snapshot(sorted(kinds), timeout)
+        _atomic_write_json(self.cluster_snapshot_file, snapshot)
+        # Not saved: only claims answered from this fetch sample its latency
+        snapshot["probed"] = True
+        return snapshot
+
+    def fetch_cluster_snapshot(self, kinds: list, timeout: float = 10) -> dict:
+        """
+        One `kubectl get KIND,KIND,... --all-namespaces -o json` call.
+
+        kubectl fails the whole call for a single unknown kind (e.g. a CRD
+        that is not installed yet); only then are kinds fetched one by one,
+        so each claim reports its own kind's error.
+        """
+        import shlex
+        import subprocess
+        kubectl = shlex.split(os.environ.get("DRIFT_KUBECTL", "kubectl"))
+        env = os.environ.copy()
+        kubeconfig = self.repo_root / "infrastructure/proxmox/k3s/kubeconfig"
+        if "KUBECONFIG" not in env and kubeconfig.is_file():
+            env["KUBECONFIG"] = str(kubeconfig)
+
+        def get(names: list) -> tuple:
+            """(items, error, per-kind retry useful?)"""
+            try:
+                result = subprocess.run(
+                    kubectl + ["get", ",".join(names), "--all-namespaces", "-o", "json",
+                               f"--request-timeout={max(1, int(timeout))}s"],
+                    capture_output=True, timeout=timeout + 5, cwd=str(self.repo_root), env=env,
+                )
+            except FileNotFoundError:
+                return None, f"{kubectl[0]} not found", False
+            except subprocess.TimeoutExpired:
+                return None, f"timed out after {timeout:g}s", False
+            if result.returncode != 0:
+                lines = result.stderr.decode(errors="replace").strip().splitlines()
+                return None, (lines[-1] if lines else f"rc={result.returncode}")[:200], True
+            try:
+                items = json.loads(result.stdout).get("items", [])
+            except (ValueError, AttributeError):
+                return None, "unparseable kubectl output", False
+            return items, None, False
+
+        started = time.perf_counter()
+        items, error, retry = get(kinds)
+        snapshot = {"fetched_at": time.time(), "kinds": {}, "items": []}
+        if error and retry and len(kinds) > 1:
+            for kind in kinds:
+                kind_items, kind_error, _ = get([kind])
+                snapshot["kinds"][kind] = {"error": kind_error}
+                snapshot["items"].extend(kind_items or [])
+        else:
+            snapshot["kinds"] = {kind: {"error": error} for kind in kinds}
+            snapshot["items"] = items or []
+        unique = {}
+        for item in snapshot["items"]:
+            # Bulky bookkeeping no claim reads
+            metadata = item.get("metadata") or {}
+            metadata.pop("managedFields", None)
+            (metadata.get("annotations") or {}).pop("kubectl.kubernetes.io/last-applied-configuration", None)
+            # Aliases of one kind (node, nodes) list the same objects twice
+            unique[(item.get("apiVersion"), item.get("kind"), metadata.get("namespace"), metadata.get("name"))] = item
+        snapshot["items"] = list(unique.values())
+        snapshot["fetch_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return snapshot
+
+    def load_tcp_cache(self) -> dict:
+        try:
+            cache = json.loads(self.tcp_cache_file.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        return cache if isinstance(cache, dict) else {}
+
+    def save_tcp_cache(self, cache: dict, now: float) -> None:
+        """Save the TCP cache atomically, dropping expired entries."""
+        cache = {key: entry for key, entry in cache.items()
+                 if isinstance(entry, dict) and now - entry.get("checked_at", 0) < TCP_CACHE_TTL}
+        _atomic_write_json(self.tcp_cache_file, cache, indent=2)
+
+    @staticmethod
+    def content_keys(claim: Claim) -> list:
+        keys = []
+        if claim.evaluation.pattern:
+            keys.append(("re", claim.evaluation.pattern))
+        if claim.evaluation.expected:
+            keys.append(("lit", claim.evaluation.expected))
+        return keys
+
+    def search_content(self, full_path: Path, keys: list) -> dict:
+        """Matched line per key; in a pass, one scan covers every content claim on the file."""
+        path = str(full_path)
+        hits = self._content_hits.get(path)
+        if hits is None or any(key not in hits for key in keys):
+            wanted = list(dict.fromkeys(self._content_keys.pop(path, []) + keys))
+            hits = scan_content(full_path, wanted)
+            if self._dir_listings is not None:
+                self._content_hits[path] = hits
+        return {key: hits[key] for key in keys}
+
+    def _target_entry(self, target: str):
+        """
+        Path-like handle (is_file/is_dir/stat) for a literal target, or None if it does not exist.
+
+        Inside a measurement pass this is the DirEntry from the parent's listing;
+        otherwise a plain Path.
+        """
+        rel = os.path.normpath(target) if target else "."
+        if self._dir_listings is None or rel == "." or rel.startswith("..") or os.path.isabs(rel):
+            return self.repo_root / target
+        parent, name = os.path.split(rel)
+        listing = self._listing(os.path.join(self._root_dir, parent) if parent else self._root_dir,
+                                self._dir_listings)
+        return listing.get(name) if listing else None
+
+    def _glob_target(self, pattern: str) -> list:
+        """
+        (relative path, DirEntry) pairs matching a glob target.
+
+        ** matches any number of directories; a trailing ** matches everything
+        below, as with glob(recursive=True). Symlinked directories are not
+        descended into.
+        """
+        listings = self._dir_listings if self._dir_listings is not None else {}
+        root = self._root_dir
+        parts = [part for part in pattern.strip("/").split("/") if part and part != "."]
+        frontier = [(root, None)]
+        for index, part in enumerate(parts):
+            last = index == len(parts) - 1
+            matched = []
+            for directory, _ in frontier:
+                if part == "**":
+                    stack = [directory]
+                    while stack:
+                        current = stack.pop()
+                        if not last:
+                            matched.append((current, None))
+                        for entry in (self._listing(current, listings) or {}).values():
+                            if last:
+                                matched.append((entry.path, entry))
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                    continue
+                listing = self._listing(directory, listings) or {}
+                if GLOB_MAGIC_RE.search(part):
+                    names = [name for name in listing if fnmatch.fnmatchcase(name, part)]
+                else:
+                    names = [part] if part in listing else []
+                for name in names:
+                    entry = listing[name]
+                    if last or entry.is_dir():
+                        matched.append((entry.path, entry))
+            frontier = matched
+        results = {os.path.relpath(path, root): entry for path, entry in frontier if entry is not None}
+        return sorted(results.items())
+
+    def _evaluate_glob_claim(self, claim: Claim) -> None:
+        method = claim.evaluation.method
+        target = claim.evaluation.target
+        matches = self._glob_target(target)
+        if method == "file_exists":
+            hits = [rel for rel, entry in matches if entry.is_file()]
+            kind = "file"
+        elif method == "dir_exists":
+            hits = [rel for rel, entry in matches if entry.is_dir()]
+            kind = "directory"
+        elif method == "file_nonempty":
+            hits = [rel for rel, entry in matches if entry.is_file() and entry.stat().st_size > 0]
+            kind = "non-empty file"
+        else:
+            hits = [rel for rel, entry in matches if entry.is_file() or entry.is_dir()]
+            kind = "path"
+        if hits:
+            claim.status = ClaimStatus.PASS
+            shown = ", ".join(hits[:3]) + (f", ... (+{len(hits) - 3})" if len(hits) > 3 else "")
+            claim.evidence = f"{len(hits)} {kind}(s) match {target}: {shown}"
+        elif method in ("script_behavior", "test_exists"):
+            claim.status = ClaimStatus.UNKNOWN
+            claim.evidence = f"Cannot evaluate operational claim: no match for {target}"
+        else:
+            claim.status = ClaimStatus.FAIL
+            claim.evidence = f"No {kind} matches: {target}"
+
+    def build_implication_graph(self, claims: list[Claim]) -> dict[int, list[int]]:
+        """
+        Map claim index -> indexes of the claims whose failure implies it, shallowest first.
+
+        Only literal path targets take part: dir_exists claims imply every
+        claim below their directory, file_exists claims imply the
+        FILE_READ_METHODS claims on the same file.
+        """
+        dirs: dict[str, list[int]] = {}
+        files: dict[str, list[int]] = {}
+        targets: dict[int, str] = {}
+        for index, claim in enumerate(claims):
+            target = claim.evaluation.target
+            if claim.evaluation.method not in IMPLIED_STATUS or not target or GLOB_MAGIC_RE.search(target):
+                continue
+            norm = os.path.normpath(target)
+            if norm == "." or norm.startswith("..") or os.path.isabs(norm):
+                continue
+            targets[index] = norm
+            if claim.evaluation.method == "dir_exists":
+                dirs.setdefault(norm, []).append(index)
+            elif claim.evaluation.method == "file_exists":
+                files.setdefault(norm, []).append(index)
+
+        graph: dict[int, list[int]] = {}
+        for index, norm in targets.items():
+            ancestors = []
+            parts = norm.split(os.sep)
+            for depth in range(1, len(parts)):
+                ancestors.extend(dirs.get(os.sep.join(parts[:depth]), []))
+            if claims[index].evaluation.method in FILE_READ_METHODS:
+                ancestors.extend(files.get(norm, []))
+            if ancestors:
+                graph[index] = ancestors
+        return graph
+
+    def evaluate_claims(self, claims: list[Claim], only: Optional[set] = None,
+                        deadline: Optional[float] = None) -> list[Claim]:
+        """
+        Evaluate claims in place, pruning the ones a failing ancestor already settles.
+
+        Root candidates (dir_exists/file_exists claims with dependents) are
+        evaluated first, shallowest first. A dependent of a failing ancestor
+        gets the status its evaluator would report for a missing path and
+        derived evidence naming the root cause (implied_by), without being
+        probed. With `only`, just those claim ids are (re)evaluated and the
+        rest keep their current status; otherwise this is a full
+        measurement pass over shared directory listings.
+
+        With a deadline (time.perf_counter() value), the remaining claims
+        are taken in budget_order() and a claim whose worst case no longer
+        fits keeps its previous status and is marked carried_over.
+        """
+        graph = self.build_implication_graph(claims)
+        roots = sorted({a for ancestors in graph.values() for a in ancestors},
+                       key=lambda i: (os.path.normpath(claims[i].evaluation.target).count(os.sep), i))
+        root_set = set(roots)
+        rest = [i for i in range(len(claims)) if i not in root_set]
+        if deadline is not None:
+            rest = self.budget_order(claims, rest)
+        order = roots + rest
+        full_pass = only is None
+
+        def settle(indexes: list[int]) -> None:
+            for position, index in enumerate(indexes):
+                claim = claims[index]
+                if not full_pass and claim.id not in only:
+                    continue
+                failing = [a for a in graph.get(index, []) if claims[a].status == ClaimStatus.FAIL]
+                if failing:
+                    root = claims[failing[0]]
+                    claim.status = IMPLIED_STATUS[claim.evaluation.method]
+                    claim.evidence = f"Implied by {root.id} ({root.evaluation.method} {root.evaluation.target}): {root.evidence}"
+                    claim.implied_by = root.id
+                    claim.carried_over = False
+                    claim.last_evaluated = datetime.now(timezone.utc).isoformat()
+                elif deadline is not None and not self.fits_budget(
+                        claim, [claims[i] for i in indexes[position:]], deadline):
+                    claim.carried_over = True
+                else:
+                    self.evaluate_claim(claim)
+
+        if not full_pass:
+            try:
+                self.prefetch_network_probes([claim for claim in claims if claim.id in only])
+                settle(order)
+            finally:
+                self.end_measurement_pass()
+            return claims
+        try:
+            # Network claims never take part in implication; probe them all at
+            # once (under a budget, lazily: see fits_budget)
+            if deadline is None:
+                self.prefetch_network_probes(claims)
+            # Roots first, then list directories only for dependents they did not settle
+            self.prefetch_claim_targets([claims[i] for i in roots])
+            settle(roots)
+            self.prefetch_claim_targets([
+                claims[i] for i in rest
+                if not any(claims[a].status == ClaimStatus.FAIL for a in graph.get(i, []))
+            ])
+            settle(rest)
+        finally:
+            self.end_measurement_pass()
+        return claims
+
+    def expected_cost(self, claim: Claim) -> float:
+        """Expected evaluation seconds: the latency EWMA, else the timeout of command/network claims."""
+        if claim.latency_ms is not None:
+            return max(claim.latency_ms / 1000, 0.001)
+        if claim.evaluation.method in TIMEOUT_METHODS:
+            return self.claim_timeout(claim)
+        return 0.001
+
+    def budget_order(self, claims: list[Claim], indexes: list[int]) -> list[int]:
+        """
+        Claims carried over last time first (so none starves), then by
+        value per expected second, value being safety x impact against the
+        drift lanes of the previous measurement (floored at BUDGET_MIN_VALUE).
+        """
+        lanes = self.compute_drift(claims)
+        structural, operational = lanes.structural_drift.score, lanes.operational_drift.score
+
+        def key(index: int):
+            claim = claims[index]
+            value = max(self.compute_safety_score(claim) * self.compute_impact_score(claim, structural, operational),
+                        BUDGET_MIN_VALUE)
+            return (not claim.carried_over, -value / self.expected_cost(claim), claim.id)
+
+        return sorted(indexes, key=key)
+
+    def network_ready(self, claim: Claim) -> bool:
+        """Whether a network claim's probe result is already held for this pass."""
+        method = claim.evaluation.method
+        if method == "http_ok":
+            return (claim.evaluation.target, self.claim_timeout(claim)) in self._http_results
+        if method == "tcp_reachable":
+            return all(t in self._tcp_results for t in self.tcp_targets(claim))
+        if method == "cluster_resource":
+            return self._cluster_snapshot is not None and self.cluster_kind(claim) in self._cluster_snapshot["kinds"]
+        return True
+
+    def fits_budget(self, claim: Claim, pending: list[Claim], deadline: float) -> bool:
+        """
+        Whether a claim can still be evaluated before the deadline. The first
+        unprobed network claim probes, in one batch, every pending network
+        claim whose timeout fits in the time left.
+
+        A carried-over command/network claim whose timeout exceeds the time
+        left runs anyway with its timeout capped to it; otherwise a claim
+        slower than the budget would be carried over forever and its
+        adaptive timeout would never learn.
+        """
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return False
+        method = claim.evaluation.method
+        if method in NETWORK_METHODS:
+            if not self.network_ready(claim):
+                batch = [c for c in pending if c.evaluation.method in NETWORK_METHODS and not self.network_ready(c)]
+                self.cap_carried_over(batch, remaining)
+                self.prefetch_network_probes([c for c in batch if self.claim_timeout(c) <= remaining])
+            return self.network_ready(claim)
+        if method == "command_succeeds":
+            self.cap_carried_over([claim], remaining)
+            return self.claim_timeout(claim) <= remaining
+        return (claim.latency_ms or 0) / 1000 <= remaining
+
+    def cap_carried_over(self, claims: list[Claim], remaining: float) -> None:
+        """Cap the timeout of carried-over claims that would not fit to the time left, for this pass."""
+        for claim in claims:
+            if claim.carried_over and claim.id not in self._budget_caps and self.claim_timeout(claim) > remaining:
+                self._budget_caps[claim.id] = remaining
+
+    def _kustomize_parse_node(self, directory: str) -> dict:
+        """
+        Parse one kustomization directory: its sub-kustomizations, the stamps
+        of every file it reads, and the problems found at this level.
+        """
+        node = {"stamp": _path_stamp(directory), "dirs": [], "files": {}, "problems": []}
+        kfile = next((os.path.join(directory, name) for name in KUSTOMIZATION_FILES
+                      if os.path.isfile(os.path.join(directory, name))), None)
+        rel_dir = os.path.relpath(directory, self._root_dir)
+        if kfile is None:
+            node["problems"].append(f"{rel_dir}: no kustomization.yaml")
+            return node
+        import yaml_io
+        rel_kfile = os.path.relpath(kfile, self._root_dir)
+        node["files"][kfile] = _path_stamp(kfile)
+        try:
+            doc = yaml_io.loads(Path(kfile).read_text())
+        except (yaml_io.YAMLError, UnicodeDecodeError) as e:
+            node["problems"].append(f"{rel_kfile}: unparseable ({str(e).splitlines()[0][:80]})")
+            return node
+        if not isinstance(doc, dict):
+            node["problems"].append(f"{rel_kfile}: not a mapping")
+            return node
+
+        def entries(key: str) -> list:
+            value = doc.get(key) or []
+            return value if isinstance(value, list) else [value]
+
+        refs = []  # (path, kind): kind "resource" may be a directory, "yaml" must parse, "file" must exist
+        for key in KUSTOMIZE_RESOURCE_KEYS:
+            refs += [(ref, "resource") for ref in entries(key) if isinstance(ref, str)]
+        for key in KUSTOMIZE_PATCH_KEYS:
+            for ref in entries(key):
+                path = ref.get("path") if isinstance(ref, dict) else ref
+                # Inline patches are YAML text, not paths
+                if isinstance(path, str) and "\n" not in path:
+                    refs.append((path, "yaml"))
+        for key in KUSTOMIZE_GENERATOR_KEYS:
+            for generator in entries(key):
+                if not isinstance(generator, dict):
+                    continue
+                for ref in (generator.get("files") or []) + (generator.get("envs") or []) + [generator.get("env")]:
+                    if isinstance(ref, str):
+                        refs.append((ref.split("=", 1)[-1], "file"))
+
+        for ref, kind in refs:
+            if REMOTE_REF_RE.search(ref):
+                continue
+            path = os.path.normpath(os.path.join(directory, ref))
+            if kind == "resource" and os.path.isdir(path):
+                node["dirs"].append(path)
+                continue
+            stamp = node["files"][path] = _path_stamp(path)
+            if stamp is None:
+                node["problems"].append(f"{rel_kfile}: missing {ref}")
+            elif kind != "file":
+                if (path, stamp) not in self._manifest_errors:
+                    try:
+                        yaml_io.loads_all(Path(path).read_text())
+                        error = None
+                    except (yaml_io.YAMLError, UnicodeDecodeError) as e:
+                        error = str(e).splitlines()[0][:80]
+                    self._manifest_errors[(path, stamp)] = error
+                if self._manifest_errors[(path, stamp)]:
+                    rel = os.path.relpath(path, self._root_dir)
+                    node["problems"].append(f"{rel}: unparseable ({self._manifest_errors[(path, stamp)]})")
+        return node
+
+    def check_kustomization(self, target: str) -> dict:
+        """
+        Walk the kustomization graph rooted at target (a directory or its kustomization file).
+
+        Each directory's parse result is cached with its directory stamp and the
+        stamps of the files it read; unchanged nodes are reused, so after one
+        app changes only that subtree is parsed again.
+        """
+        if self._kustomize_nodes is None:
+            try:
+                cached = json.loads(self.kustomize_cache_file.read_text())
+            except (OSError, json.JSONDecodeError):
+                cached = {}
+            self._kustomize_nodes = cached if isinstance(cached, dict) else {}
+        nodes = self._kustomize_nodes
+
+        root = os.path.normpath(os.path.join(self._root_dir, target))
+        if os.path.basename(root) in KUSTOMIZATION_FILES:
+            root = os.path.dirname(root)
+        problems, seen, reparsed, files = [], set(), 0, set()
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            if directory in seen:
+                continue
+            seen.add(directory)
+            node = nodes.get(directory)
+            if (node is None or node.get("stamp") != _path_stamp(directory)
+                    or any(_path_stamp(path) != stamp for path, stamp in node["files"].items())):
+                node = nodes[directory] = self._kustomize_parse_node(directory)
+                reparsed += 1
+            problems.extend(node["problems"])
+            files.update(node["files"])
+            stack.extend(reversed(node["dirs"]))
+
+        if reparsed:
+            _atomic_write_json(self.kustomize_cache_file, nodes)
+        return {"nodes": len(seen), "files": len(files), "reparsed": reparsed,
+                "problems": list(dict.fromkeys(problems))}
+
+    def check_yaml_tree(self, pattern: str) -> dict:
+        """
+        Parse every file matching a glob; returns counts and per-file errors.
+
+        Files whose stamp is unchanged since the last pass are not read;
+        changed ones are re-hashed and only parsed when their content hash
+        differs. Batches of YAML_TREE_POOL_MIN or more are parsed across
+        YAML_TREE_WORKERS processes.
+        """
+        try:
+            cache = json.loads(self.yaml_tree_cache_file.read_text())
+        except (OSError, json.JSONDecodeError):
+            cache = {}
+        if not isinstance(cache, dict):
+            cache = {}
+
+        files = [rel for rel, entry in self._glob_target(pattern) if entry.is_file()]
+        stale = []
+        for rel in files:
+            stamp = _path_stamp(os.path.join(self._root_dir, rel))
+            known = cache.get(rel)
+            if not (isinstance(known, dict) and known.get("stamp") == stamp):
+                stale.append((rel, stamp, known.get("sha") if isinstance(known, dict) else None))
+
+        paths = [os.path.join(self._root_dir, rel) for rel, _, _ in stale]
+        known_shas = [sha for _, _, sha in stale]
+        if len(stale) >= YAML_TREE_POOL_MIN and YAML_TREE_WORKERS > 1:
+            workers = min(YAML_TREE_WORKERS, len(stale))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(yaml_file_status, paths, known_shas,
+                                        chunksize=max(1, len(stale) // (workers * 4))))
+        else:
+            results = [yaml_file_status(path, sha) for path, sha in zip(paths, known_shas)]
+
+        parsed = 0
+        for (rel, stamp, _), (sha, error, did_parse) in zip(stale, results):
+            if did_parse:
+                parsed += 1
+                cache[rel] = {"stamp": stamp, "sha": sha, "error": error}
+            else:
+                cache[rel]["stamp"] = stamp
+        if stale:
+            cache = {rel: entry for rel, entry in cache.items() if os.path.exists(os.path.join(self._root_dir, rel))}
+            _atomic_write_json(self.yaml_tree_cache_file, cache)
+        errors = {rel: cache[rel]["error"] for rel in files if cache[rel].get("error")}
+        return {"files": len(files), "rehashed": len(stale), "parsed": parsed, "errors": errors}
+
     def evaluate_claim(self, claim: Claim) -> Claim:
         """Evaluate a single claim against repository state."""
+        previous = (claim.status, claim.evidence, claim.last_evaluated)
         claim.last_evaluated = datetime.now(timezone.utc).isoformat()
+        claim.implied_by = None
+        claim.carried_over = False
+        started = time.perf_counter()
+        observed_ms = None  # network claims: the probe's own latency, not the cache lookup
+        probed = True  # False when a network claim was answered from a cache: no latency sample
+        timed_out = False
+        timeout, timeout_note = None, None
+        if claim.evaluation.method in TIMEOUT_METHODS:
+            timeout, timeout_note = self.adaptive_timeout(claim)
 
         try:
             method = claim.evaluation.method
             target = claim.evaluation.target
             full_path = self.repo_root / target
+            is_glob = method in STAT_METHODS and bool(GLOB_MAGIC_RE.search(target))
+            entry = self._target_entry(target) if method in STAT_METHODS and not is_glob else None
 
-            if method == "file_exists":
-                if full_path.is_file():
+            if is_glob:
+                self._evaluate_glob_claim(claim)
+
+            elif method == "file_exists":
+                if entry is not None and entry.is_file():
                     claim.status = ClaimStatus.PASS
                     claim.evidence = f"File exists: {target}"
                 else:
@@ -463,7 +2135,7 @@ class DriftEngine:
                     claim.evidence = f"File not found: {target}"
 
             elif method == "dir_exists":
-                if full_path.is_dir():
+                if entry is not None and entry.is_dir():
                     claim.status = ClaimStatus.PASS
                     claim.evidence = f"Directory exists: {target}"
                 else:
@@ -472,16 +2144,19 @@ class DriftEngine:
 
             elif method == "file_content":
                 if full_path.is_file():
-                    content = full_path.read_text()
                     pattern = claim.evaluation.pattern
                     expected = claim.evaluation.expected
+                    hits = self.search_content(full_path, self.content_keys(claim))
+                    for hit in hits.values():
+                        if isinstance(hit, re.error):
+                            raise hit
 
-                    if pattern and re.search(pattern, content):
+                    if pattern and hits[("re", pattern)] is not None:
                         claim.status = ClaimStatus.PASS
-                        claim.evidence = f"Pattern matched in {target}"
-                    elif expected and expected in content:
+                        claim.evidence = f"Pattern matched in {target}: {hits[('re', pattern)]}"
+                    elif expected and hits[("lit", expected)] is not None:
                         claim.status = ClaimStatus.PASS
-                        claim.evidence = f"Expected content found in {target}"
+                        claim.evidence = f"Expected content found in {target}: {hits[('lit', expected)]}"
                     else:
                         claim.status = ClaimStatus.FAIL
                         claim.evidence = f"Content not matched in {target}"
@@ -491,7 +2166,7 @@ class DriftEngine:
 
             elif method in ("script_behavior", "test_exists"):
                 # Operational claims - best-effort evaluation
-                if full_path.exists():
+                if entry is not None and (entry.is_file() or entry.is_dir()):
                     claim.status = ClaimStatus.PASS
                     claim.evidence = f"Script/test exists: {target}"
                 else:
@@ -500,8 +2175,8 @@ class DriftEngine:
 
             # v7 P0: Stronger evaluators for gating claims
             elif method == "file_nonempty":
-                if full_path.is_file():
-                    size = full_path.stat().st_size
+                if entry is not None and entry.is_file():
+                    size = entry.stat().st_size
                     if size > 0:
                         claim.status = ClaimStatus.PASS
                         claim.evidence = f"File exists and is non-empty ({size} bytes): {target}"
@@ -515,16 +2190,16 @@ class DriftEngine:
             elif method == "yaml_parseable":
                 if full_path.is_file():
                     try:
-                        import yaml
+                        import yaml_io
                         content = full_path.read_text()
                         if not content.strip():
                             claim.status = ClaimStatus.FAIL
                             claim.evidence = f"YAML file is empty: {target}"
                         else:
-                            yaml.safe_load(content)
+                            yaml_io.loads(content)
                             claim.status = ClaimStatus.PASS
                             claim.evidence = f"YAML file is valid and parseable: {target}"
-                    except yaml.YAMLError as e:
+                    except yaml_io.YAMLError as e:
                         claim.status = ClaimStatus.FAIL
                         claim.evidence = f"YAML parse error in {target}: {str(e)[:100]}"
                 else:
@@ -563,8 +2238,8 @@ class DriftEngine:
                             data = json.loads(content)
                         except json.JSONDecodeError:
                             try:
-                                import yaml
-                                data = yaml.safe_load(content)
+                                import yaml_io
+                                data = yaml_io.loads(content)
                             except:
                                 pass
 
@@ -596,7 +2271,6 @@ class DriftEngine:
 
             elif method == "command_succeeds":
                 command = claim.evaluation.command
-                timeout = claim.evaluation.timeout or 10
                 if not command:
                     claim.status = ClaimStatus.FAIL
                     claim.evidence = "command_succeeds requires command parameter"
@@ -618,8 +2292,9 @@ class DriftEngine:
                             claim.status = ClaimStatus.FAIL
                             claim.evidence = f"Command failed (rc={result.returncode}): {stderr}"
                     except subprocess.TimeoutExpired:
+                        timed_out = True
                         claim.status = ClaimStatus.FAIL
-                        claim.evidence = f"Command timed out after {timeout}s: {command[:50]}"
+                        claim.evidence = f"Command timed out after {timeout:g}s: {command[:50]}"
                     except Exception as e:
                         claim.status = ClaimStatus.FAIL
                         claim.evidence = f"Command error: {str(e)[:100]}"
@@ -648,6 +2323,136 @@ class DriftEngine:
                         claim.status = ClaimStatus.FAIL
                         claim.evidence = "artifacts.json not found"
 
+            elif method == "kustomize_resolves":
+                report = self.check_kustomization(target)
+                # Cache hit counts stay out of the evidence: they change run to run with the same result
+                summary = f"{report['nodes']} kustomization(s), {report['files']} file(s)"
+                if report["problems"]:
+                    shown = "; ".join(report["problems"][:KUSTOMIZE_EVIDENCE_PROBLEMS])
+                    more = len(report["problems"]) - KUSTOMIZE_EVIDENCE_PROBLEMS
+                    claim.status = ClaimStatus.FAIL
+                    claim.evidence = (f"{len(report['problems'])} problem(s) in {target} ({summary}): {shown}"
+                                      + (f"; +{more} more" if more > 0 else ""))
+                else:
+                    claim.status = ClaimStatus.PASS
+                    claim.evidence = f"Kustomization graph resolves: {target} ({summary})"
+
+            elif method == "yaml_tree_valid":
+                report = self.check_yaml_tree(target)
+                summary = f"{report['files']} file(s)"
+                if not report["files"]:
+                    claim.status = ClaimStatus.FAIL
+                    claim.evidence = f"No files match: {target}"
+                elif report["errors"]:
+                    failures = list(report["errors"].items())
+                    shown = "; ".join(f"{rel}: {error}" for rel, error in failures[:YAML_TREE_EVIDENCE_FILES])
+                    more = len(failures) - YAML_TREE_EVIDENCE_FILES
+                    claim.status = ClaimStatus.FAIL
+                    claim.evidence = (f"{len(failures)} invalid YAML file(s) in {target} ({summary}): {shown}"
+                                      + (f"; +{more} more" if more > 0 else ""))
+                else:
+                    claim.status = ClaimStatus.PASS
+                    claim.evidence = f"All YAML files valid: {target} ({summary})"
+
+            elif method == "http_ok":
+                import net_probe
+                key = (target, timeout)
+                result = self._http_results.get(key) or net_probe.probe_http([key])[key]
+                observed_ms = result.latency_ms
+                timed_out = (result.error or "").startswith("timed out")
+                expected = str(claim.evaluation.expected) if claim.evaluation.expected is not None else None
+                pattern = claim.evaluation.pattern
+                if result.error:
+                    claim.status = ClaimStatus.FAIL
+                    claim.evidence = f"HTTP GET {target} failed after {result.latency_ms} ms: {result.error}"
+                elif not net_probe.status_matches(result.status, expected):
+                    claim.status = ClaimStatus.FAIL
+                    claim.evidence = (f"HTTP {result.status} from {target} in {result.latency_ms} ms "
+                                      f"(expected {expected or '2xx/3xx'})")
+                elif pattern and not re.search(pattern.encode(), result.body):
+                    claim.status = ClaimStatus.FAIL
+                    claim.evidence = (f"HTTP {result.status} from {target} in {result.latency_ms} ms, "
+                                      f"body does not match: {pattern}")
+                else:
+                    claim.status = ClaimStatus.PASS
+                    claim.evidence = (f"HTTP {result.status} from {target} in {result.latency_ms} ms"
+                                      + (f", body matches: {pattern}" if pattern else ""))
+
+            elif method == "tcp_reachable":
+                targets = self.tcp_targets(claim)
+                pending = [t for t in targets if t not in self._tcp_results]
+                if pending:
+                    self.prefetch_network_probes([claim])
+                results = [(port, self._tcp_results[(host, port)]) for host, port in targets]
+                connected = [r for _, r in results if not r.get("cached")]
+                probed = bool(connected)
+                observed_ms = max((r["latency_ms"] for r in connected), default=None)
+                timed_out = any((r["error"] or "").startswith("timed out") for r in connected)
+                for host_port in pending:
+                    self._tcp_results.pop(host_port, None)  # outside a pass: keep only the file cache
+                ports = ", ".join(
+                    f"{port} {r['error'] or 'open'} ({r['latency_ms']} ms{', cached' if r.get('cached') else ''})"
+                    for port, r in results
+                )
+                closed = sum(1 for _, r in results if r["error"])
+                if not targets:
+                    claim.status = ClaimStatus.FAIL
+                    claim.evidence = "tcp_reachable requires a host target and ports (or a HOST:PORT target)"
+                elif closed:
+                    claim.status = ClaimStatus.FAIL
+                    claim.evidence = f"TCP {targets[0][0]} unreachable on {closed}/{len(results)} port(s): {ports}"
+                else:
+                    claim.status = ClaimStatus.PASS
+                    claim.evidence = f"TCP {targets[0][0]} reachable: {ports}"
+
+            elif method == "cluster_resource":
+                kind = self.cluster_kind(claim)
+                name = target.strip().partition("/")[2]
+                namespace = claim.evaluation.namespace
+                selector = claim.evaluation.selector
+                key_path = claim.evaluation.key_path
+                expected = str(claim.evaluation.expected) if claim.evaluation.expected is not None else None
+                snapshot = self._cluster_snapshot
+                if snapshot is None or kind not in snapshot["kinds"]:
+                    snapshot = self.cluster_snapshot([kind], timeout)
+                probed = bool(snapshot.get("probed"))
+                observed_ms = snapshot.get("fetch_ms") if probed else None
+                age = f"snapshot {round(time.time() - snapshot['fetched_at'])}s old"
+                scope = (f"{kind}/{name}" if name else kind) + (f" in {namespace}" if namespace else "") \
+                    + (f" [{selector}]" if selector else "")
+                error = snapshot["kinds"].get(kind, {}).get("error")
+                timed_out = probed and (error or "").startswith("timed out")
+                objects = [] if error else [
+                    item for item in snapshot["items"]
+                    if resource_matches(kind, item)
+                    and (not name or (item.get("metadata") or {}).get("name") == name)
+                    and (not namespace or (item.get("metadata") or {}).get("namespace") == namespace)
+                    and selector_matches(selector, (item.get("metadata") or {}).get("labels") or {})
+                ]
+                if error:
+                    claim.status = ClaimStatus.FAIL
+                    claim.evidence = f"kubectl get {kind} failed: {error}"
+                elif not objects:
+                    claim.status = ClaimStatus.FAIL
+                    claim.evidence = f"No {scope} in cluster ({age})"
+                elif key_path:
+                    values = [((obj.get("metadata") or {}).get("name"), resolve_key_path(obj, key_path))
+                              for obj in objects]
+                    wrong = [(obj_name, value) for obj_name, value in values
+                             if (value is None if expected is None else str(value) != expected)]
+                    wanted = f"{key_path}={expected}" if expected is not None else f"{key_path} set"
+                    # "any": one good object is enough (a replaced pod may linger as Failed)
+                    if wrong and (claim.evaluation.match != "any" or len(wrong) == len(objects)):
+                        shown = ", ".join(f"{obj_name}={value}" for obj_name, value in wrong[:CLUSTER_EVIDENCE_OBJECTS])
+                        claim.status = ClaimStatus.FAIL
+                        claim.evidence = f"{len(wrong)}/{len(objects)} {scope} lack {wanted}: {shown} ({age})"
+                    else:
+                        claim.status = ClaimStatus.PASS
+                        claim.evidence = f"{len(objects) - len(wrong)}/{len(objects)} {scope} have {wanted} ({age})"
+                else:
+                    claim.status = ClaimStatus.PASS
+                    claim.evidence = f"{len(objects)} {scope} found ({age})"
+
             else:
                 claim.status = ClaimStatus.UNKNOWN
                 claim.evidence = f"Unknown evaluation method: {method}"
@@ -656,6 +2461,22 @@ class DriftEngine:
             claim.status = ClaimStatus.UNKNOWN
             claim.evidence = f"Evaluation error: {str(e)}"
 
+        elapsed = time.perf_counter() - started
+        self._eval_latencies.setdefault(claim.evaluation.method, []).append(elapsed)
+        sample = observed_ms if observed_ms is not None else elapsed * 1000
+        if timed_out and timeout is not None and self._budget_caps.get(claim.id) == timeout:
+            # Cut short by the budget, not by its own timeout: keep the previous
+            # result and let the raised EWMA rank it behind the claims that fit
+            claim.status, claim.evidence, claim.last_evaluated = previous
+            claim.latency_ms = round(max(claim.latency_ms or 0, sample), 3)
+            return claim
+        claim.latency_ms = round(sample if claim.latency_ms is None
+                                 else LATENCY_EWMA_ALPHA * sample + (1 - LATENCY_EWMA_ALPHA) * claim.latency_ms, 3)
+        if timeout is not None:
+            if probed:
+                self.record_latency(claim, sample, timed_out)
+            if timeout_note:
+                claim.evidence = f"{claim.evidence} [{timeout_note}]"
         return claim
 
     # =========================================================================
@@ -667,8 +2488,9 @@ class DriftEngine:
         if not self.stage_contracts_file.is_file():
             return {}
         try:
-            import yaml
-            return yaml.safe_load(self.stage_contracts_file.read_text()) or {}
+            import yaml_io
+            # Cached by mtime: gating, evidence and watch re-read this file many times per process.
+            return yaml_io.load(self.stage_contracts_file, {}, copy=True)
         except Exception:
             return {}
 
@@ -700,6 +2522,10 @@ class DriftEngine:
                     command=eval_cfg.get("command"),
                     timeout=eval_cfg.get("timeout", 10),
                     artifact_name=eval_cfg.get("artifact_name"),
+                    ports=eval_cfg.get("ports"),
+                    namespace=eval_cfg.get("namespace"),
+                    selector=eval_cfg.get("selector"),
+                    match=eval_cfg.get("match", "all"),
                 ),
                 episode=episode,
                 priority="gating",
@@ -709,34 +2535,112 @@ class DriftEngine:
 
         return claims
 
-    def check_stage_gating(self, stage: str, episode: str) -> dict:
+    def gating_snapshot_file(self, stage: str) -> Path:
+        return self.state_dir / f"gating_{stage}.json"
+
+    def load_gating_snapshot(self, stage: str) -> dict:
+        """Per-claim results persisted by the last check_stage_gating for a stage."""
+        try:
+            data = json.loads(self.gating_snapshot_file(stage).read_text())
+        except (OSError, json.JSONDecodeError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def save_gating_snapshot(self, stage: str, snapshot: dict) -> None:
+        """Save a gating snapshot atomically (concurrent loops may read it)."""
+        _atomic_write_json(self.gating_snapshot_file(stage), snapshot, indent=2)
+
+    def gating_fingerprint(self, claim: Claim) -> str:
+        """Hash of what a gating claim result depends on: its evaluation config and target file stamp."""
+        target = claim.evaluation.target
+        stamp = "none"
+        if claim.evaluation.method == "artifact_valid":
+            # Answered from artifacts.json, whatever the target says
+            stamp = _path_stamp(str(self.artifacts_file)) or "missing"
+        elif target and claim.evaluation.method not in NETWORK_METHODS:
+            try:
+                st = (self.repo_root / target).stat()
+                stamp = f"{st.st_mtime_ns}:{st.st_size}:{st.st_ino}"
+            except OSError:
+                stamp = "missing"
+        composite = json.dumps(asdict(claim.evaluation), sort_keys=True) + "|" + stamp
+        return hashlib.sha256(composite.encode()).hexdigest()[:16]
+
+    def check_stage_gating(self, stage: str, episode: str, refresh: bool = False) -> dict:
         """
         Check if all gating claims for a stage pass.
         Returns a detailed report with pass/fail status and evidence.
+
+        Results are persisted to the stage's gating snapshot and reused on
+        the next call while still fresh (see GATING_SNAPSHOT_TTL), so slow
+        probes run once per decision point; refresh=True re-evaluates all.
         """
         gating_claims = self.get_stage_gating_claims(stage, episode)
 
         if not gating_claims:
-            return {
+            result = {
                 "stage": stage,
                 "gating_pass": True,
                 "reason": "No gating claims defined",
                 "claims": [],
                 "failing_claims": [],
             }
+            self._gating_results[stage] = result
+            return result
 
         evaluated = []
         failing = []
+        cached = {} if refresh else self.load_gating_snapshot(stage).get("claims", {})
+        entries = {}
+        reused = 0
+        now = time.time()
 
+        fingerprints = {}
         for claim in gating_claims:
-            claim = self.evaluate_claim(claim)
-            evaluated.append(claim)
-            if claim.status != ClaimStatus.PASS:
-                failing.append(claim)
+            fingerprint = fingerprints[claim.id] = self.gating_fingerprint(claim)
+            entry = cached.get(claim.id)
+            if (isinstance(entry, dict)
+                    and entry.get("fingerprint") == fingerprint
+                    and entry.get("status") in {s.value for s in ClaimStatus}
+                    and (claim.evaluation.method not in GATING_VOLATILE_METHODS
+                         or now - entry.get("evaluated_at", 0) < GATING_SNAPSHOT_TTL)):
+                entries[claim.id] = entry
+
+        try:
+            # Stale network claims are probed together, not one request at a time
+            self.prefetch_network_probes([c for c in gating_claims if c.id not in entries], refresh=refresh)
+            for claim in gating_claims:
+                entry = entries.get(claim.id)
+                if entry is not None:
+                    claim.status = ClaimStatus(entry["status"])
+                    claim.evidence = entry.get("evidence")
+                    claim.last_evaluated = entry.get("last_evaluated")
+                    reused += 1
+                else:
+                    claim = self.evaluate_claim(claim)
+                    entries[claim.id] = {
+                        "fingerprint": fingerprints[claim.id],
+                        "evaluated_at": now,
+                        "last_evaluated": claim.last_evaluated,
+                        "status": claim.status.value,
+                        "evidence": claim.evidence,
+                    }
+                evaluated.append(claim)
+                if claim.status != ClaimStatus.PASS:
+                    failing.append(claim)
+        finally:
+            self.end_measurement_pass()
+
+        if reused < len(gating_claims) or set(entries) != set(cached):
+            self.save_gating_snapshot(stage, {
+                "stage": stage,
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+                "claims": entries,
+            })
 
         all_pass = len(failing) == 0
 
-        return {
+        result = {
             "stage": stage,
             "gating_pass": all_pass,
             "total_gating_claims": len(gating_claims),
@@ -758,7 +2662,14 @@ class DriftEngine:
                 if all_pass
                 else f"{len(failing)} gating claim(s) failed"
             ),
+            "snapshot": {
+                "path": str(self.gating_snapshot_file(stage)),
+                "reused_claims": reused,
+                "evaluated_claims": len(gating_claims) - reused,
+            },
         }
+        self._gating_results[stage] = result
+        return result
 
     def update_cluster_identity(self, updates: dict) -> bool:
         """
@@ -781,7 +2692,7 @@ class DriftEngine:
             identity["last_updated"] = datetime.now(timezone.utc).isoformat()
 
             # Write back
-            self.cluster_identity_file.write_text(json.dumps(identity, indent=2))
+            _atomic_write_json(self.cluster_identity_file, identity, indent=2)
             return True
         except Exception:
             return False
@@ -810,18 +2721,24 @@ class DriftEngine:
             artifacts["last_updated"] = datetime.now(timezone.utc).isoformat()
 
             # Write back
-            self.artifacts_file.write_text(json.dumps(artifacts, indent=2))
+            _atomic_write_json(self.artifacts_file, artifacts, indent=2)
             return True
         except Exception:
             return False
 
-    def get_stage_evidence_capsule(self, stage: str, error_log_path: Optional[str] = None) -> dict:
+    def get_stage_evidence_capsule(self, stage: str, error_log_path: Optional[str] = None,
+                                   gating_result: Optional[dict] = None, refresh: bool = False) -> dict:
         """
         Generate an evidence capsule for give_up that includes all required info.
         This prevents "Logs: unknown" scenarios.
+
+        Gating results come from this process or the stage's gating snapshot
+        when fresh; the log excerpt comes from read_error_excerpt().
         """
-        episode = self.generate_episode_id()
-        gating_result = self.check_stage_gating(stage, episode)
+        if gating_result is None and not refresh:
+            gating_result = self._gating_results.get(stage)
+        if gating_result is None:
+            gating_result = self.check_stage_gating(stage, self.generate_episode_id(), refresh=refresh)
 
         # Find the most relevant failing claim
         failing_claim = None
@@ -834,15 +2751,8 @@ class DriftEngine:
             log_path = Path(error_log_path)
             if log_path.is_file():
                 try:
-                    content = log_path.read_text()
-                    # Get last 500 chars or find first error
-                    lines = content.split("\n")
-                    error_lines = [l for l in lines if "error" in l.lower() or "fatal" in l.lower() or "failed" in l.lower()]
-                    if error_lines:
-                        error_excerpt = "\n".join(error_lines[:5])[:500]
-                    else:
-                        error_excerpt = content[-500:]
-                except Exception:
+                    error_excerpt = read_error_excerpt(log_path)
+                except OSError:
                     error_excerpt = "[Could not read log file]"
 
         # Determine suggested next action based on failing claim
@@ -968,6 +2878,7 @@ class DriftEngine:
         fail_count = sum(1 for c in claims if c.status == ClaimStatus.FAIL)
         unknown_count = sum(1 for c in claims if c.status == ClaimStatus.UNKNOWN)
         blocked_count = sum(1 for c in claims if c.status == ClaimStatus.BLOCKED)
+        carried_over = sum(1 for c in claims if c.carried_over)
 
         drift_score = round(fail_count / total, 3) if total > 0 else 0.0
 
@@ -980,6 +2891,7 @@ class DriftEngine:
             fail_claims=fail_count,
             unknown_claims=unknown_count,
             blocked_claims=blocked_count,
+            carried_over_claims=carried_over,
             drift_score=drift_score,
             structural_drift=structural,
             operational_drift=operational,
@@ -1011,27 +2923,41 @@ class DriftEngine:
             claim.safety_score = self.compute_safety_score(claim)
             claim.impact_score = self.compute_impact_score(claim, structural_drift, operational_drift)
 
+        # Claims implied by a failing ancestor are symptoms: rank them after
+        # every root cause, and root causes with more dependents first on ties
+        dependents: dict[str, int] = {}
+        for c in fail_claims:
+            if c.implied_by:
+                dependents[c.implied_by] = dependents.get(c.implied_by, 0) + 1
+
         # Sort by combined score (descending), then tie-breaking
         def sort_key(c: Claim):
             combined = c.safety_score * c.impact_score
             # Tie-breaking: structural before operational, lower ID, earlier evaluation
             type_priority = 0 if c.type == ClaimType.STRUCTURAL else 1
-            return (-combined, type_priority, c.id, c.last_evaluated or "")
+            return (c.implied_by is not None, -combined, -dependents.get(c.id, 0), type_priority, c.id,
+                    c.last_evaluated or "")
 
         fail_claims.sort(key=sort_key)
 
         return fail_claims
 
-    def measure_drift(self, memo_path: str) -> DriftState:
+    def measure_drift(self, memo_path: str, budget: Optional[float] = None,
+                      patch_claim: Optional[str] = None) -> DriftState:
         """
         Main entry point: measure drift against a memo.
 
         1. Check memo hash (if changed, start new episode)
         2. Extract or load claims
-        3. Evaluate all claims
+        3. Evaluate all claims (with a budget in seconds: as many as fit,
+           cheapest and most valuable first; see evaluate_claims)
         4. Compute drift per lane
-        5. Persist state
+        5. Persist state (drift.json, now.json, timeline, Prometheus metrics)
+
+        patch_claim marks the timeline entry as the measurement right after a
+        patch for that claim was applied, so history can judge the patch.
         """
+        deadline = time.perf_counter() + budget if budget is not None else None
         memo_hash = self.compute_memo_hash(memo_path)
         if not memo_hash:
             raise ValueError(f"Memo not found: {memo_path}")
@@ -1051,16 +2977,30 @@ class DriftEngine:
             claims = self.extract_claims_from_memo(memo_path, memo_hash, episode)
             print(f"[drift-engine] New episode: {episode} ({len(claims)} claims extracted)", file=sys.stderr)
 
-        # Evaluate all claims
-        for i, claim in enumerate(claims):
-            claims[i] = self.evaluate_claim(claim)
+        # Evaluate all claims; stat-style claims share one listing per directory
+        # and claims below a failing directory are settled without probing
+        self.evaluate_claims(claims, deadline=deadline)
+
+        previous_score = existing_state.drift_score if existing_state else None
+        return self.persist_measurement(claims, memo_path, memo_hash, episode, previous_score, budget,
+                                        patch_claim)
+
+    def persist_measurement(self, claims: list[Claim], memo_path: str, memo_hash: str, episode: str,
+                            previous_score: Optional[float] = None,
+                            budget: Optional[float] = None,
+                            patch_claim: Optional[str] = None) -> DriftState:
+        """
+        Compute drift from already-evaluated claims and persist it.
 
+        Shared by measure_drift (full pass) and watch mode (incremental pass).
+        """
         # Compute drift
         state = self.compute_drift(claims)
         state.memo = memo_path
         state.memo_hash = memo_hash
         state.episode = episode
         state.last_measured = datetime.now(timezone.utc).isoformat()
+        state.budget_seconds = budget
 
         # Check bootstrap window
         bootstrap_window = state.structural_drift.score > 0.5
@@ -1082,17 +3022,36 @@ class DriftEngine:
             active_claim=ranked_claims[0].id if ranked_claims else None,
             bootstrap_window=bootstrap_window,
         )
-        self.append_timeline(state)
+        if previous_score is None:
+            previous_score = state.drift_score
+        self.append_timeline(state, claim_id=patch_claim, patch_applied=patch_claim is not None,
+                             drift_delta=state.drift_score - previous_score)
+        self.write_metrics(state, state.drift_score - previous_score, bootstrap_window)
 
         return state
 
-    def select_next_claim(self) -> Optional[Claim]:
+    def select_next_claim(self, stage: Optional[str] = None, refresh: bool = False) -> Optional[Claim]:
         """Select next claim to converge based on current drift state.
 
         v7: Skips claims that are:
         - BLOCKED (failed solution attempts)
         - Deferred (infra issues like architect_unavailable)
+
+        With a stage, its failing gating claims (from the gating snapshot
+        while fresh) are selected before memo claims.
         """
+        if stage:
+            report = self.check_stage_gating(stage, self.generate_episode_id(), refresh=refresh)
+            failing_ids = {fc["id"] for fc in report["failing_claims"]}
+            for data in report["claims"]:
+                if data["id"] not in failing_ids:
+                    continue
+                claim = Claim.from_dict(data)
+                claim.safety_score = self.compute_safety_score(claim)
+                claim.impact_score = 1.0
+                if claim.safety_score > 0:
+                    return claim
+
         state = self.load_drift_state()
         if not state:
             return None
@@ -1241,6 +3200,223 @@ class DriftEngine:
         all_blocked, _, _ = self.all_fail_claims_blocked_or_deferred()
         return all_blocked
 
+    # =========================================================================
+    # Watch mode: event-driven incremental measurement
+    # =========================================================================
+
+    def claim_watch_dirs(self, claim: Claim) -> list[Path]:
+        """
+        Directories whose events can change a claim's result.
+
+        Path claims watch the target's parent (creation, deletion and content
+        changes all surface there); if the parent does not exist yet the nearest
+        existing ancestor is watched so the claim is revisited once it appears.
+        Glob targets (including yaml_tree_valid) watch every directory below
+        their literal prefix that the pattern can reach, all of them under
+        **; kustomize_resolves watches every directory of its kustomization
+        graph. Command-only and network claims have no watchable input.
+        """
+        method = claim.evaluation.method
+        if method == "artifact_valid":
+            return [self.artifacts_file.parent]
+        if method == "command_succeeds" or method in NETWORK_METHODS or not claim.evaluation.target:
+            return []
+        target = claim.evaluation.target
+        parts = [part for part in target.strip("/").split("/") if part and part != "."]
+        magic = next((i for i, part in enumerate(parts) if GLOB_MAGIC_RE.search(part)), None)
+        if magic is not None:
+            base = self._existing_ancestor(self.repo_root.joinpath(*parts[:magic]))
+            rest = parts[magic:]
+            depth = None if "**" in rest else len(rest) - 1
+            return self._watch_tree(base, depth)
+        dirs = [self._existing_ancestor((self.repo_root / target).parent)]
+        if method == "kustomize_resolves":
+            dirs += [Path(d) for d in self.kustomization_dirs(target)]
+        return list(dict.fromkeys(dirs))
+
+    def _existing_ancestor(self, directory: Path) -> Path:
+        while not directory.is_dir() and directory != self.repo_root and directory != directory.parent:
+            directory = directory.parent
+        return directory
+
+    @staticmethod
+    def _watch_tree(base: Path, depth: Optional[int]) -> list[Path]:
+        """base and its subdirectories down to depth levels (all for None); symlinks are not followed."""
+        dirs, level = [base], [base]
+        while level and (depth is None or depth > 0):
+            below = []
+            for directory in level:
+                try:
+                    with os.scandir(directory) as it:
+                        below += [Path(e.path) for e in it
+                                  if e.is_dir(follow_symlinks=False) and e.name not in {".git", "__pycache__"}]
+                except OSError:
+                    continue
+            dirs += below
+            level = below
+            depth = None if depth is None else depth - 1
+        return dirs
+
+    def kustomization_dirs(self, target: str) -> list[str]:
+        """
+        Directories of the kustomization graph rooted at target, including
+        those holding referenced patch/generator files, from the parse cache.
+        """
+        self.check_kustomization(target)
+        root = os.path.normpath(os.path.join(self._root_dir, target))
+        if os.path.basename(root) in KUSTOMIZATION_FILES:
+            root = os.path.dirname(root)
+        dirs, stack = {}, [root]
+        while stack:
+            directory = stack.pop()
+            node = self._kustomize_nodes.get(directory)
+            if directory in dirs or node is None:
+                continue
+            dirs[directory] = None
+            dirs.update(dict.fromkeys(os.path.dirname(path) for path in node["files"]))
+            stack.extend(node["dirs"])
+        return [d for d in dirs if os.path.isdir(d)]
+
+    def watch(self, memo_path: str, debounce: float = 0.5, poll_interval: float = 2.0,
+              emit_events: bool = False, force_polling: bool = False) -> None:
+        """
+        Keep drift.json/now.json current by reacting to filesystem events.
+
+        Memo changes trigger a full measure (new episode); stage_contracts.yaml
+        changes are reported as events; any other change re-evaluates only the
+        claims whose watch directory saw activity. Nothing is written when a
+        batch of events leaves every claim unchanged.
+
+        The watch index is rebuilt (directory trees rescanned) only after a
+        full measure or when the watcher reports new or vanished directories;
+        kustomize_resolves claims that were re-evaluated refresh just their
+        own graph directories. A kernel queue overflow means events were lost,
+        so it triggers a full measure and re-adds every watch.
+        """
+        def emit(event: dict) -> None:
+            if emit_events:
+                event.setdefault("timestamp", datetime.now(timezone.utc).isoformat())
+                print(json.dumps(event), flush=True)
+
+        memo_file = self.repo_root / memo_path
+        state = self.measure_drift(memo_path)
+        emit({"event": "measured", "episode": state.episode, "drift_score": state.drift_score, "full": True})
+
+        watcher = None
+        if not force_polling:
+            try:
+                watcher = InotifyWatcher()
+            except OSError as e:
+                print(f"[drift-engine] inotify unavailable ({e}); falling back to polling", file=sys.stderr)
+        if watcher is None:
+            watcher = PollingWatcher(poll_interval)
+        print(f"[drift-engine] Watching with {type(watcher).__name__}", file=sys.stderr)
+
+        claim_dirs: dict[str, list[Path]] = {}
+
+        def rewatch(claims: list[Claim], only: Optional[set] = None) -> dict:
+            """
+            Recompute watch dirs (of all claims, or just `only`), sync the
+            watcher and return the index: watched directory -> claim ids.
+            """
+            if only is None:
+                claim_dirs.clear()
+            for claim in claims:
+                if only is None or claim.id in only:
+                    claim_dirs[claim.id] = self.claim_watch_dirs(claim)
+            index: dict[Path, set] = {}
+            for claim_id, dirs in claim_dirs.items():
+                for directory in dirs:
+                    index.setdefault(directory, set()).add(claim_id)
+            watcher.set_dirs(set(index) | {memo_file.parent, self.stage_contracts_file.parent})
+            return index
+
+        try:
+            index = rewatch(state.claims)
+            while True:
+                changed = watcher.wait(None)
+                if not changed and not watcher.overflowed:
+                    continue
+                # Debounce: keep absorbing events until the tree is quiet
+                while True:
+                    more = watcher.wait(debounce)
+                    if not more:
+                        break
+                    changed |= more
+
+                if watcher.overflowed:
+                    watcher.reset()
+                    state = self.measure_drift(memo_path)
+                    emit({"event": "measured", "episode": state.episode,
+                          "drift_score": state.drift_score, "full": True, "reason": "event_overflow"})
+                    index = rewatch(state.claims)
+                    continue
+
+                if memo_file.parent in changed and self.compute_memo_hash(memo_path) != state.memo_hash:
+                    watcher.tree_changed = False
+                    state = self.measure_drift(memo_path)
+                    emit({"event": "measured", "episode": state.episode,
+                          "drift_score": state.drift_score, "full": True})
+                    index = rewatch(state.claims)
+                    continue
+
+                affected = set()
+                for directory in changed:
+                    affected |= index.get(directory, set())
+                if watcher.tree_changed:
+                    # New or vanished directories: glob trees and missing parents may map differently
+                    watcher.tree_changed = False
+                    index = rewatch(state.claims)
+                    for directory in changed:
+                        affected |= index.get(directory, set())
+
+                if self.stage_contracts_file.parent in changed:
+                    emit({"event": "contracts_changed", "path": str(self.stage_contracts_file)})
+
+                if not affected:
+                    continue
+
+                # Reload so block/defer/attempt updates made by the loop are kept
+                current = self.load_drift_state() or state
+                previous_score = current.drift_score
+                # Claims settled by an affected root cause follow it
+                affected |= {c.id for c in current.claims if c.implied_by in affected}
+                before = {c.id: (c.status, c.evidence) for c in current.claims if c.id in affected}
+                self.evaluate_claims(current.claims, only=affected)
+                status_changes = [
+                    (claim, before[claim.id][0]) for claim in current.claims
+                    if claim.id in before and (claim.status, claim.evidence) != before[claim.id]
+                ]
+
+                kustomize = {c.id for c in current.claims
+                             if c.id in affected and c.evaluation.method == "kustomize_resolves"}
+                if kustomize:
+                    # An edited kustomization can reference new directories
+                    index = rewatch(current.claims, only=kustomize)
+
+                if not status_changes:
+                    state = current
+                    continue
+
+                state = self.persist_measurement(current.claims, current.memo, current.memo_hash,
+                                                 current.episode, previous_score)
+                for claim, previous_status in status_changes:
+                    emit({
+                        "event": "claim_changed",
+                        "claim_id": claim.id,
+                        "target": claim.evaluation.target,
+                        "previous": previous_status.value if isinstance(previous_status, ClaimStatus) else previous_status,
+                        "status": claim.status.value,
+                        "evidence": claim.evidence,
+                    })
+                emit({"event": "measured", "episode": state.episode, "drift_score": state.drift_score,
+                      "drift_delta": round(state.drift_score - previous_score, 3), "full": False,
+                      "reevaluated": len(affected)})
+        except KeyboardInterrupt:
+            pass
+        finally:
+            watcher.close()
+
 
 def main():
     """CLI interface for drift engine."""
@@ -1249,7 +3425,7 @@ def main():
     parser = argparse.ArgumentParser(description="Orchestrator v7 Drift Engine")
     parser.add_argument("command", choices=[
         "measure", "select", "status", "block", "increment", "defer", "clear-defer",
-        "check-gating", "evidence", "update-identity", "update-artifact"
+        "check-gating", "evidence", "update-identity", "update-artifact", "watch", "history"
     ])
     parser.add_argument("--memo", default="docs/master_memo.txt", help="Path to architecture memo")
     parser.add_argument("--repo-root", default=".", help="Repository root directory")
@@ -1260,17 +3436,34 @@ def main():
     # v7 P0: Stage gating arguments
     parser.add_argument("--stage", help="Stage name for gating checks (vms, k3s, infra, apps, ingress, obs)")
     parser.add_argument("--log-path", help="Path to error log for evidence capsule")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Re-evaluate gating claims instead of reusing a fresh gating snapshot (check-gating, evidence, select)")
     # v7 P0: Artifact/identity update arguments
     parser.add_argument("--artifact", help="Artifact name (kubeconfig, etc.)")
     parser.add_argument("--key", help="Key to update")
     parser.add_argument("--value", help="Value to set")
+    # Watch mode arguments
+    parser.add_argument("--debounce", type=float, default=0.5, help="Seconds of quiet before re-evaluating (watch)")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="Polling fallback interval in seconds (watch)")
+    parser.add_argument("--polling", action="store_true", help="Force the polling watcher instead of inotify (watch)")
+    parser.add_argument("--events", action="store_true", help="Emit change events on stdout as JSON lines (watch)")
+    parser.add_argument("--budget", type=float,
+                        help="Seconds measure may spend evaluating claims; the rest keep their status (carried over)")
+    parser.add_argument("--patch-claim",
+                        help="Record the measurement as following a patch applied for this claim (measure)")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Recompute history aggregates by streaming timeline.json (history)")
+    parser.add_argument("--metrics-file",
+                        help="Prometheus textfile output (default: $DRIFT_METRICS_FILE or ai/state/drift.prom)")
 
     args = parser.parse_args()
 
     engine = DriftEngine(args.repo_root)
+    if args.metrics_file:
+        engine.metrics_file = Path(args.metrics_file)
 
     if args.command == "measure":
-        state = engine.measure_drift(args.memo)
+        state = engine.measure_drift(args.memo, budget=args.budget, patch_claim=args.patch_claim)
         if args.json:
             print(json.dumps(state.to_dict(), indent=2))
         else:
@@ -1283,9 +3476,53 @@ def main():
             print(f"  Operational: {state.operational_drift.score:.3f} ({state.operational_drift.fail_claims}/{state.operational_drift.total_claims} fail)")
             bootstrap = "active" if state.structural_drift.score > 0.5 else "inactive"
             print(f"Bootstrap window: {bootstrap}")
+            if state.budget_seconds is not None:
+                print(f"Budget: {state.budget_seconds:g}s, {state.carried_over_claims} claim(s) carried over")
+
+    elif args.command == "watch":
+        engine.watch(
+            args.memo,
+            debounce=args.debounce,
+            poll_interval=args.poll_interval,
+            emit_events=args.events,
+            force_polling=args.polling,
+        )
+
+    elif args.command == "history":
+        report = engine.drift_history(rebuild=args.rebuild)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        elif not report["entries"]:
+            print("No drift timeline found")
+            sys.exit(1)
+        else:
+            def fmt(value):
+                return "n/a" if value is None else f"{value:+.4f}"
+
+            moving = report["moving_average"]
+            print(f"Measurements: {report['entries']} across {report['episodes']} episode(s)")
+            print(f"Drift: {report['first']['drift_score']:.3f} -> {report['last']['drift_score']:.3f}")
+            print(f"Velocity (drift/hour): overall {fmt(report['velocity_per_hour'])}, "
+                  f"last {moving['window']} {fmt(report['recent_velocity_per_hour'])}")
+            print(f"Moving average (last {moving['window']}): {moving['drift']:.3f}; "
+                  + ", ".join(f"EWMA {lane} {value:.3f}" for lane, value in moving["ewma"].items()))
+            patches = report["patches"]
+            print(f"Patches: {patches.get('applied', 0)} applied, {patches.get('zero_delta', 0)} zero delta, "
+                  f"{patches.get('regressed', 0)} raised drift")
+            for patch in patches.get("recent_ineffective", []):
+                print(f"  - {patch['timestamp']} {patch['claim_id']}: {patch['drift_delta']:+.4f}")
+            if report["time_to_pass"]:
+                print("Time to pass:")
+                for claim_id, ttp in report["time_to_pass"].items():
+                    print(f"  - {claim_id}: mean {ttp['mean_seconds']:.0f}s over {ttp['passes']} pass(es)")
+            if report["stalled_episodes"]:
+                print(f"Stalled episodes (no new best drift in {STALL_ENTRIES}+ measurements):")
+                for episode in report["stalled_episodes"]:
+                    print(f"  - {episode['episode']}: {episode['since_improvement']} measurements, "
+                          f"best {episode['best_score']:.3f}, last {episode['last_score']:.3f}")
 
     elif args.command == "select":
-        claim = engine.select_next_claim()
+        claim = engine.select_next_claim(args.stage, refresh=args.refresh)
         if claim:
             if args.json:
                 print(json.dumps(claim.to_dict(), indent=2))
@@ -1363,7 +3600,7 @@ def main():
             print("Error: --stage required for check-gating command", file=sys.stderr)
             sys.exit(1)
         episode = engine.generate_episode_id()
-        result = engine.check_stage_gating(args.stage, episode)
+        result = engine.check_stage_gating(args.stage, episode, refresh=args.refresh)
         if args.json:
             print(json.dumps(result, indent=2))
         else:
@@ -1381,7 +3618,7 @@ def main():
         if not args.stage:
             print("Error: --stage required for evidence command", file=sys.stderr)
             sys.exit(1)
-        capsule = engine.get_stage_evidence_capsule(args.stage, args.log_path)
+        capsule = engine.get_stage_evidence_capsule(args.stage, args.log_path, refresh=args.refresh)
         if args.json:
             print(json.dumps(capsule, indent=2))
         else:
@@ -1,17 +1,19 @@
 #!/usr/bin/env bash
 set -euo pipefail
 
+# Rules live in ai/config/error_rules.yaml (error_types); the hash is taken over the
+# normalized tail (timestamps, IPs, PIDs and temp paths stripped), so repeats of one
+# root cause share an ERROR_HASH.
+: "${ERROR_CLASSIFIER:=$(cd "$(dirname "${BASH_SOURCE[0]}")/../scripts" && pwd)/error_classifier.py}"
+
 classify_error(){
   local tail="$1"
-  local lower
-  lower="$(printf '%s' "$tail" | tr '[:upper:]' '[:lower:]')"
-  ERROR_HASH="$(printf '%s' "$tail" | shasum | awk '{print $1}')"
-  if [[ "$lower" == *"permission"* ]]; then ERROR_TYPE="permission_denied"; return; fi
-  if [[ "$lower" == *"no such file"* || "$lower" == *"cannot open"* ]]; then ERROR_TYPE="missing_file"; return; fi
-  if [[ "$lower" == *"command not found"* ]]; then ERROR_TYPE="command_not_found"; return; fi
-  if [[ "$lower" == *"timeout"* || "$lower" == *"network"* || "$lower" == *"connection"* ]]; then ERROR_TYPE="network_error"; return; fi
-  if [[ "$lower" == *"yaml"* || "$lower" == *"kustomize"* ]]; then ERROR_TYPE="yaml_parse_error"; return; fi
-  if [[ "$lower" == *"k3s"* ]]; then ERROR_TYPE="k3s_error"; return; fi
-  if [[ "$lower" == *"proxmox"* ]]; then ERROR_TYPE="proxmox_error"; return; fi
-  ERROR_TYPE="unknown"
+  local result
+  result="$(printf '%s' "$tail" | python3 "$ERROR_CLASSIFIER" error-type -)" || result=""
+  ERROR_TYPE="${result%% *}"
+  ERROR_HASH="${result##* }"
+  if [ -z "$result" ]; then
+    ERROR_TYPE="unknown"
+    ERROR_HASH=""
+  fi
 }
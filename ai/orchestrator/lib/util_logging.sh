@@ -4,6 +4,7 @@ set -euo pipefail
 : "${CURRENT_TASK_FILE:=ai/state/CURRENT_TASK_FILE}"
 : "${LAST_ERROR_FILE:=ai/state/last_error.json}"
 : "${STAGE0_LOG:=ai/logs/stage0.log}"
+: "${ERROR_CLASSIFIER:=$(cd "$(dirname "${BASH_SOURCE[0]}")/../../scripts" && pwd)/error_classifier.py}"
 
 log_stage0_event(){
   local stage="$1"
@@ -70,7 +71,8 @@ record_last_error(){
     signature_source="$(tail -n 200 "$log_path" 2>/dev/null)"
   fi
   local failure_signature
-  failure_signature="sha256:$(printf '%s' "$signature_source" | shasum -a 256 | awk '{print $1}')"
+  # Normalized (timestamps/IPs/PIDs/temp paths stripped) so repeats of one failure share a signature
+  failure_signature="sha256:$(printf '%s' "$signature_source" | python3 "$ERROR_CLASSIFIER" hash --algo sha256 -)"
   jq -n --arg task_id "$task_id" --arg persona "$persona" --arg command "$command" --arg log_path "$log_path" \
     --arg stderr "$stderr_tail" --arg classification "$classification" --arg confidence "$classification_confidence" \
     --arg failed_at "$ts" --arg signature "$failure_signature" \
@@ -1,6 +1,9 @@
 #!/usr/bin/env bash
 set -euo pipefail
 
+: "${BACKLOG_ENGINE:=$(cd "$(dirname "${BASH_SOURCE[0]}")/../../scripts" && pwd)/backlog_engine.py}"
+: "${STATE_TOOLKIT:=$(cd "$(dirname "${BASH_SOURCE[0]}")/../../scripts" && pwd)/state_toolkit.py}"
+
 # ============================================================================
 # TASK STATE MACHINE
 # ============================================================================
@@ -48,16 +51,9 @@ _is_valid_transition(){
 # Returns: status string or empty if task not found
 get_task_status(){
   local tid="$1"
-  python3 - "$BACKLOG_YAML" "$tid" <<'PY'
-import sys, yaml
-path, tid = sys.argv[1:3]
-data = yaml.safe_load(open(path, encoding="utf-8")) or []
-for entry in data:
-    if entry.get("id") == tid:
-        print(entry.get("status", ""))
-        sys.exit(0)
-sys.exit(1)
-PY
+  local status
+  status="$(python3 "$BACKLOG_ENGINE" --backlog "$BACKLOG_YAML" status "$tid")" || return 1
+  printf '%s\n' "$status"
 }
 
 # Update task status with validation.
@@ -72,68 +68,7 @@ set_task_status(){
     *e*) old_errexit=1 ;;
   esac
   set +e
-  python3 - "$BACKLOG_YAML" "$tid" "$next_status" "$note" "$next_retry_at" "$skip_validation" <<'PY'
-import sys, yaml, os
-path, tid, next_status, note, next_retry_at, skip_validation = sys.argv[1:7]
-allowed = {"pending","running","waiting_retry","review","blocked","success","failed","escalated","completed"}  # Note: "completed" is deprecated, normalized to "success" below
-if next_status not in allowed:
-    sys.exit(1)
-data = yaml.safe_load(open(path, encoding="utf-8")) or []
-found=False
-current = None
-for entry in data:
-    if entry.get("id") == tid:
-        current = entry.get("status")
-        found=True
-        break
-if not found:
-    sys.exit(1)
-# Normalize status values: completed <-> success are equivalent
-# Map completed -> success for consistency with backlog format
-if current == "completed":
-    current = "success"
-if next_status == "completed":
-    next_status = "success"
-sys.stderr.write(f"[set_task_status] {tid}: {current}->{next_status}\n")
-valid = {
-    ("pending","running"),
-    ("running","success"),
-    ("running","failed"),
-    ("running","review"),
-    ("running","blocked"),
-    ("failed","pending"),
-    ("failed","blocked"),
-    ("review","success"),
-    ("review","failed"),
-}
-if skip_validation != "1":
-    if next_status in {"waiting_retry", "escalated"}:
-        sys.stderr.write(f"Invalid transition {current}->{next_status} (reserved status)\n")
-        sys.exit(2)
-    if (current, next_status) not in valid:
-        sys.stderr.write(f"Invalid transition {current}->{next_status}\n")
-        sys.exit(2)
-if skip_validation == "1":
-    sys.stderr.write("[set_task_status] SKIP_VALIDATION=1 bypassing state checks\n")
-if skip_validation != "1" and current not in allowed:
-    sys.stderr.write(f"Invalid transition {current}->{next_status}\n")
-    sys.exit(2)
-for entry in data:
-    if entry.get("id") == tid:
-        entry["status"] = next_status
-        if note:
-            entry["note"] = note
-        if next_retry_at:
-            entry.setdefault("metadata", {})["next_retry_at"] = float(next_retry_at)
-        elif entry.get("metadata", {}).get("next_retry_at"):
-            entry["metadata"].pop("next_retry_at", None)
-        break
-tmp = f"{path}.tmp"
-with open(tmp, "w", encoding="utf-8") as f:
-    yaml.safe_dump(data, f, sort_keys=False)
-yaml.safe_load(open(tmp, encoding="utf-8"))
-os.replace(tmp, path)
-PY
+  python3 "$STATE_TOOLKIT" task-set-status "$BACKLOG_YAML" "$tid" "$next_status" "$note" "$next_retry_at" "$skip_validation"
   local rc=$?
   if [ "$old_errexit" -eq 1 ]; then
     set -e
@@ -145,18 +80,5 @@ PY
 
 set_task_note(){
   local tid="$1" note="$2"
-  python3 - "$BACKLOG_YAML" "$tid" "$note" <<'PY'
-import sys, yaml, os
-path, tid, note = sys.argv[1:4]
-data = yaml.safe_load(open(path, encoding="utf-8")) or []
-for entry in data:
-    if entry.get("id") == tid:
-        entry["note"] = note
-        break
-tmp=f"{path}.tmp"
-with open(tmp,"w",encoding="utf-8") as f:
-    yaml.safe_dump(data,f,sort_keys=False)
-yaml.safe_load(open(tmp,encoding="utf-8"))
-os.replace(tmp,path)
-PY
+  python3 "$STATE_TOOLKIT" task-set-note "$BACKLOG_YAML" "$tid" "$note"
 }
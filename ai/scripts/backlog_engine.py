@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""
+Shared backlog engine: parse ai/backlog.yaml once and answer queries from indexes.
+
+Used by backlog_summary.py, run_summary.py, stage1_backlog_sync.py and the
+shell helpers in ai/orchestrator/lib (util_yaml.sh, util_tasks.sh), which
+previously each re-parsed the YAML and scanned it linearly per lookup.
+
+Indexes:
+- by id, status, persona and stage (stage normalized to int)
+- reverse dependency graph (task id -> ids of tasks that depend on it)
+- DependencyScheduler: in-degree counters over that graph for incremental
+  runnable-task computation, with cycle and missing-dependency detection
+
+CLI (read-only; exit codes match the shell helpers it backs):
+  backlog_engine.py [--backlog PATH] exists ID        exit 0/1
+  backlog_engine.py [--backlog PATH] get ID           task JSON, exit 1 if missing
+  backlog_engine.py [--backlog PATH] status ID        status, "missing" + exit 1 if missing
+  backlog_engine.py [--backlog PATH] dependents ID    JSON list of dependent ids
+  backlog_engine.py [--backlog PATH] next-task STAGE  next runnable task JSON, exit 1 if none
+  backlog_engine.py [--backlog PATH] deadlock STAGE   deadlock report JSON
+  backlog_engine.py [--backlog PATH] next-runnable [STAGE] [--limit N] [--persona P]
+                                                      JSON list of dispatchable tasks (deps done, as next-task)
+  backlog_engine.py [--backlog PATH] check-graph      cycles + missing deps JSON, exit 1 if any
+  backlog_engine.py [--backlog PATH] batch            one op per stdin line -> one JSON result per line
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import heapq
+import json
+import re
+import shlex
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import yaml_io
+
+
+# Planner tasks whose dependencies are all executor tasks may run once those
+# executors have finished in any terminal state (recovery planning).
+PLANNER_TERMINAL_DEP_STATUSES = {"success", "failed", "blocked"}
+PERSONA_PRIORITY = {"planner": 0, "executor": 1}
+
+
+def parse_stage(value: Any) -> int:
+    """Normalize a requested stage ("1", 1, "stage_1") to an int; 0 when unknown."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        match = re.search(r"(\d+)", str(value or ""))
+        return int(match.group(1)) if match else 0
+
+
+def entry_stage(entry: Dict[str, Any]) -> int:
+    """Stage of a backlog entry; entries must carry a numeric stage, anything else is 0."""
+    try:
+        return int(entry.get("stage", 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def load_entries(path: Path) -> List[Dict[str, Any]]:
+    # Uncached: callers (schedulers, sync) mutate the entries they get back.
+    data = yaml_io.load(path, [], cache=False)
+    if not isinstance(data, list):
+        return []
+    return [entry for entry in data if isinstance(entry, dict)]
+
+
+class BacklogIndex:
+    """In-memory task graph over one parse of the backlog."""
+
+    def __init__(self, entries: List[Dict[str, Any]]) -> None:
+        self.entries = entries
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.by_status: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.by_persona: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.by_stage: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        self.dependents: Dict[str, List[str]] = defaultdict(list)
+        for entry in entries:
+            task_id = entry.get("id")
+            if task_id and task_id not in self.by_id:
+                self.by_id[task_id] = entry
+            self.by_status[str(entry.get("status", "unknown"))].append(entry)
+            self.by_persona[str(entry.get("persona", "unknown"))].append(entry)
+            self.by_stage[entry_stage(entry)].append(entry)
+            for dep in entry.get("depends_on") or []:
+                if task_id:
+                    self.dependents[dep].append(task_id)
+
+    @classmethod
+    def load(cls, path: Path) -> "BacklogIndex":
+        return cls(load_entries(path))
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        return self.by_id.get(task_id)
+
+    def has(self, task_id: str) -> bool:
+        return task_id in self.by_id
+
+    def status(self, task_id: str) -> Optional[str]:
+        entry = self.by_id.get(task_id)
+        return entry.get("status", "unknown") if entry else None
+
+    def dependents_of(self, task_id: str) -> List[str]:
+        return list(self.dependents.get(task_id, []))
+
+    def allowed_dep_statuses(self, entry: Dict[str, Any]) -> Set[str]:
+        deps = entry.get("depends_on") or []
+        if entry.get("persona") == "planner" and all(
+            (self.by_id.get(dep) or {}).get("persona") == "executor" for dep in deps
+        ):
+            return PLANNER_TERMINAL_DEP_STATUSES
+        return {"success"}
+
+    def unsatisfied_deps(self, entry: Dict[str, Any], allow_status: Optional[Set[str]] = None) -> List[str]:
+        allow = allow_status if allow_status is not None else self.allowed_dep_statuses(entry)
+        unsatisfied = []
+        for dep in entry.get("depends_on") or []:
+            target = self.by_id.get(dep)
+            if not target or target.get("status") not in allow:
+                unsatisfied.append(dep)
+        return unsatisfied
+
+    def deps_satisfied(self, entry: Dict[str, Any], allow_status: Optional[Set[str]] = None) -> bool:
+        return not self.unsatisfied_deps(entry, allow_status)
+
+    def pending_in_stage(self, stage: int) -> List[Dict[str, Any]]:
+        return [entry for entry in self.by_stage.get(stage, []) if entry.get("status") == "pending"]
+
+    def next_task(self, stage: int) -> Optional[Dict[str, Any]]:
+        """Highest-priority pending task in a stage whose dependencies are satisfied."""
+        candidates = []
+        for entry in self.pending_in_stage(stage):
+            if not self.deps_satisfied(entry):
+                continue
+            prio = PERSONA_PRIORITY.get(entry.get("persona", "executor"), 3)
+            candidates.append((prio, str(entry.get("id")), entry))
+        if not candidates:
+            return None
+        candidates.sort(key=lambda c: (c[0], c[1]))
+        return candidates[0][-1]
+
+    def deadlock_report(self, stage: int) -> Dict[str, Any]:
+        """Describe pending tasks in a stage that are held by unsatisfied dependencies."""
+        pending = self.pending_in_stage(stage)
+        pending_ids = {entry.get("id") for entry in pending if entry.get("id")}
+        blocked = []
+        top_blocker = None
+        for entry in pending:
+            deps = entry.get("depends_on") or []
+            persona = entry.get("persona", "executor")
+            unsatisfied = []
+            for dep in self.unsatisfied_deps(entry):
+                target = self.by_id.get(dep)
+                status = target.get("status") if target else "missing"
+                unsatisfied.append({
+                    "id": dep,
+                    "status": status or "unknown",
+                    "persona": target.get("persona") if target else "unknown",
+                    "note": target.get("note") if target else "",
+                })
+                if top_blocker is None:
+                    top_blocker = {
+                        "task_id": entry.get("id"),
+                        "persona": persona,
+                        "blocked_by": dep,
+                        "blocked_by_status": status or "unknown",
+                        "blocked_by_persona": target.get("persona") if target else "unknown",
+                        "blocked_by_note": target.get("note") if target else "",
+                    }
+            if unsatisfied:
+                blocked.append({
+                    "id": entry.get("id"),
+                    "persona": persona,
+                    "depends_on": deps,
+                    "unsatisfied": unsatisfied,
+                })
+
+        blocked_summary = ""
+        signature = ""
+        top_blocker_summary = ""
+        if blocked:
+            parts = []
+            sig_parts = []
+            for entry in sorted(blocked, key=lambda x: x["id"] or ""):
+                unsat_sorted = sorted(entry["unsatisfied"], key=lambda u: u["id"])
+                parts.append(f'{entry["id"]} blocked_by {",".join(u["id"] for u in unsat_sorted)}')
+                deps_sig = ",".join(f'{u["id"]}:{u["status"]}' for u in unsat_sorted)
+                sig_parts.append(f'{entry["id"]}|{deps_sig}')
+            blocked_summary = "; ".join(parts)
+            signature = hashlib.sha256("\n".join(sig_parts).encode()).hexdigest()
+        if top_blocker:
+            note = " ".join((top_blocker.get("blocked_by_note") or "").strip().split())
+            top_blocker_summary = (
+                f'{top_blocker["task_id"]} blocked_by {top_blocker["blocked_by"]} '
+                f'(status={top_blocker["blocked_by_status"]}'
+                + (f" note={note})" if note else ")")
+            )
+        cycle_detected = any(u.get("id") in pending_ids for entry in blocked for u in entry["unsatisfied"])
+        return {
+            "pending_count": len(pending),
+            "blocked_count": len(blocked),
+            "blocked": blocked,
+            "blocked_summary": blocked_summary,
+            "top_blocker": top_blocker,
+            "top_blocker_summary": top_blocker_summary,
+            "signature": signature,
+            "cycle_detected": cycle_detected,
+        }
+
+
+class DependencyScheduler:
+    """
+    Topological scheduler over the backlog dependency graph.
+
+    Each task keeps an in-degree counter of dependencies that are not yet
+    done, where "done" is the same per-task rule next_task applies
+    (BacklogIndex.allowed_dep_statuses: success, or any terminal status for
+    planners over executors). A status change adjusts its dependents'
+    counters (O(out-degree)); a pending task whose counter reaches zero
+    joins the ready heap. Cycles and references to unknown tasks are found
+    once, up front, and tasks caught in them are never reported as runnable.
+    """
+
+    def __init__(self, index: BacklogIndex, done_statuses: Optional[Iterable[str]] = None) -> None:
+        self.index = index
+        # Dependency statuses that count as done, per task (done_statuses overrides the index rule)
+        self.allowed: Dict[str, Set[str]] = {}
+        self.remaining: Dict[str, int] = {}
+        self.missing: Dict[str, List[str]] = {}
+        self._ready: List[str] = []
+        self._queued: Set[str] = set()
+        for task_id, entry in index.by_id.items():
+            allowed = self.allowed[task_id] = (
+                set(done_statuses) if done_statuses is not None else index.allowed_dep_statuses(entry)
+            )
+            deps = list(dict.fromkeys(entry.get("depends_on") or []))
+            missing = [dep for dep in deps if dep not in index.by_id]
+            if missing:
+                self.missing[task_id] = missing
+            self.remaining[task_id] = sum(
+                1 for dep in deps
+                if dep not in index.by_id or index.by_id[dep].get("status") not in allowed
+            )
+            self._maybe_ready(task_id)
+        self.cycles = self._find_cycles()
+
+    def _maybe_ready(self, task_id: str) -> None:
+        entry = self.index.by_id[task_id]
+        if self.remaining[task_id] == 0 and entry.get("status") == "pending" and task_id not in self._queued:
+            heapq.heappush(self._ready, task_id)
+            self._queued.add(task_id)
+
+    def _find_cycles(self) -> List[List[str]]:
+        """Strongly connected components with more than one task (or a self-loop), iterative Tarjan."""
+        graph = {
+            task_id: [dep for dep in (entry.get("depends_on") or []) if dep in self.index.by_id]
+            for task_id, entry in self.index.by_id.items()
+        }
+        order: Dict[str, int] = {}
+        low: Dict[str, int] = {}
+        stack: List[str] = []
+        on_stack: Set[str] = set()
+        cycles: List[List[str]] = []
+        counter = 0
+        for root in graph:
+            if root in order:
+                continue
+            work = [(root, 0)]
+            while work:
+                node, child_idx = work.pop()
+                if child_idx == 0:
+                    order[node] = low[node] = counter
+                    counter += 1
+                    stack.append(node)
+                    on_stack.add(node)
+                children = graph[node]
+                if child_idx < len(children):
+                    work.append((node, child_idx + 1))
+                    child = children[child_idx]
+                    if child not in order:
+                        work.append((child, 0))
+                    elif child in on_stack:
+                        low[node] = min(low[node], order[child])
+                    continue
+                if low[node] == order[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or node in graph[node]:
+                        cycles.append(sorted(component))
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+        return cycles
+
+    def _set_status(self, task_id: str, status: str) -> List[str]:
+        """Move a task to a new status; returns the dependents it released into the ready set."""
+        entry = self.index.by_id.get(task_id)
+        if entry is None:
+            return []
+        previous = entry.get("status")
+        entry["status"] = status
+        if status != "pending":
+            self._queued.discard(task_id)
+        if previous == status:
+            return []
+        released = []
+        for dependent in dict.fromkeys(self.index.dependents.get(task_id, [])):
+            if dependent not in self.remaining:
+                continue
+            allowed = self.allowed[dependent]
+            delta = (previous in allowed) - (status in allowed)
+            if not delta:
+                continue
+            self.remaining[dependent] += delta
+            if delta > 0:
+                # A dependency left a done status (retry): the dependent waits again
+                self._queued.discard(dependent)
+                continue
+            was_queued = dependent in self._queued
+            self._maybe_ready(dependent)
+            if not was_queued and dependent in self._queued:
+                released.append(dependent)
+        return released
+
+    def mark_success(self, task_id: str) -> List[str]:
+        """Record a task as succeeded; returns the ids it released into the ready set."""
+        return self._set_status(task_id, "success")
+
+    def mark_started(self, task_id: str, status: str = "running") -> List[str]:
+        """Take a task out of the ready set (dispatched, failed, blocked...); returns the ids it released."""
+        return self._set_status(task_id, status)
+
+    def requeue(self, task_id: str) -> bool:
+        """Put a task back to pending (retry); returns True when it is runnable again."""
+        if task_id not in self.index.by_id:
+            return False
+        self._set_status(task_id, "pending")
+        self._maybe_ready(task_id)
+        return task_id in self._queued
+
+    def next_runnable(self, limit: Optional[int] = None, persona: Optional[str] = None,
+                      stage: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Pending tasks whose dependencies are done, in id order."""
+        result = []
+        kept: List[str] = []
+        seen: Set[str] = set()
+        # Pop in id order only as far as needed. Stale entries (left the ready
+        # set, or a second push of a requeued task) are dropped for good;
+        # filtered and returned ones stay ready and go back on the heap.
+        while self._ready and (limit is None or len(result) < limit):
+            task_id = heapq.heappop(self._ready)
+            if task_id in seen or task_id not in self._queued:
+                continue
+            seen.add(task_id)
+            kept.append(task_id)
+            entry = self.index.by_id[task_id]
+            if persona and entry.get("persona") != persona:
+                continue
+            if stage is not None and entry_stage(entry) != stage:
+                continue
+            result.append(entry)
+        for task_id in kept:
+            heapq.heappush(self._ready, task_id)
+        return result
+
+    def graph_report(self) -> Dict[str, Any]:
+        return {"cycles": self.cycles, "missing_dependencies": self.missing}
+
+
+class OpError(Exception):
+    """Lookup miss: carries the output and exit code the shell helper expects."""
+
+    def __init__(self, output: str = "", code: int = 1) -> None:
+        super().__init__(output)
+        self.output = output
+        self.code = code
+
+
+def next_runnable_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="backlog_engine.py next-runnable", add_help=False)
+    parser.add_argument("stage", nargs="?", default=None, help="Restrict to one stage.")
+    parser.add_argument("--limit", type=int, default=1, help="Max tasks to return.")
+    parser.add_argument("--persona", default="executor", help="Persona filter (empty for any).")
+    return parser
+
+
+def run_op(index: BacklogIndex, op: str, args: List[str]) -> str:
+    """Execute one query; returns its stdout text or raises OpError."""
+    if op in ("exists", "get", "status", "dependents") and len(args) != 1:
+        raise OpError(f"{op} requires a task id", 2)
+    if op == "exists":
+        if not index.has(args[0]):
+            raise OpError()
+        return ""
+    if op == "get":
+        entry = index.get(args[0])
+        if entry is None:
+            raise OpError()
+        return json.dumps(entry)
+    if op == "status":
+        status = index.status(args[0])
+        if status is None:
+            raise OpError("missing")
+        return str(status)
+    if op == "dependents":
+        return json.dumps(index.dependents_of(args[0]))
+    if op == "next-task":
+        entry = index.next_task(parse_stage(args[0] if args else 1))
+        if entry is None:
+            raise OpError()
+        return json.dumps(entry)
+    if op == "deadlock":
+        return json.dumps(index.deadlock_report(parse_stage(args[0] if args else 1)))
+    if op == "next-runnable":
+        opts = next_runnable_parser().parse_args(args)
+        scheduler = DependencyScheduler(index)
+        stage = parse_stage(opts.stage) if opts.stage is not None else None
+        persona = opts.persona or None
+        return json.dumps(scheduler.next_runnable(opts.limit, persona, stage))
+    if op == "check-graph":
+        report = DependencyScheduler(index).graph_report()
+        if report["cycles"] or report["missing_dependencies"]:
+            raise OpError(json.dumps(report))
+        return json.dumps(report)
+    raise OpError(f"unknown op: {op}", 2)
+
+
+def run_batch(index: BacklogIndex, lines: Iterable[str]) -> None:
+    """One JSON result per line; a malformed line gets rc 2 and the batch carries on."""
+    for line in lines:
+        try:
+            words = shlex.split(line)
+        except ValueError as e:
+            print(json.dumps({"op": "", "args": [], "rc": 2, "output": f"unparseable line: {e}"}), flush=True)
+            continue
+        if not words:
+            continue
+        try:
+            output, code = run_op(index, words[0], words[1:]), 0
+        except OpError as e:
+            output, code = e.output, e.code
+        except SystemExit as e:
+            # argparse (next-runnable) has already printed its usage error on stderr
+            output, code = f"invalid arguments for {words[0]}", e.code if isinstance(e.code, int) and e.code else 2
+        print(json.dumps({"op": words[0], "args": words[1:], "rc": code, "output": output}), flush=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Query the backlog from a single indexed parse.")
+    parser.add_argument("--backlog", default="ai/backlog.yaml", help="Path to backlog YAML.")
+    parser.add_argument("op", help="exists|get|status|dependents|next-task|deadlock|next-runnable|check-graph|batch")
+    parser.add_argument("args", nargs="*")
+    args, extra = parser.parse_known_args(argv)
+    args.args += extra
+
+    index = BacklogIndex.load(Path(args.backlog))
+    if args.op == "batch":
+        run_batch(index, sys.stdin)
+        return 0
+    try:
+        output = run_op(index, args.op, args.args)
+    except OpError as e:
+        if e.output:
+            print(e.output, file=sys.stdout if e.code == 1 else sys.stderr)
+        return e.code
+    if output:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -6,9 +6,9 @@ from __future__ import annotations
 import argparse
 from collections import Counter
 from pathlib import Path
-from typing import Any, Dict, Iterable, List
+from typing import Any, Dict, List
 
-import yaml
+from backlog_engine import BacklogIndex, DependencyScheduler, load_entries
 
 
 def parse_args() -> argparse.Namespace:
@@ -17,35 +17,15 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def load_backlog(path: Path) -> List[Dict[str, Any]]:
-    if not path.exists():
-        return []
+def load_backlog(path: Path) -> BacklogIndex:
     try:
-        data = yaml.safe_load(path.read_text(encoding="utf-8")) or []
+        return BacklogIndex(load_entries(path))
     except Exception:
-        return []
-    if isinstance(data, list):
-        return data
-    return []
+        return BacklogIndex([])
 
 
-def count_by(field: str, entries: Iterable[Dict[str, Any]]) -> Counter:
-    counter: Counter = Counter()
-    for entry in entries:
-        value = entry.get(field, "unknown")
-        counter[str(value)] += 1
-    return counter
-
-
-def deps_satisfied(entry: Dict[str, Any], id_map: Dict[str, Dict[str, Any]]) -> bool:
-    deps = entry.get("depends_on") or []
-    if not deps:
-        return True
-    for dep in deps:
-        target = id_map.get(dep)
-        if not target or target.get("status") != "success":
-            return False
-    return True
+def count_by(groups: Dict[str, List[Dict[str, Any]]]) -> Counter:
+    return Counter({key: len(entries) for key, entries in groups.items()})
 
 
 def format_counter(counter: Counter, preferred: List[str]) -> str:
@@ -59,22 +39,16 @@ def format_counter(counter: Counter, preferred: List[str]) -> str:
 
 
 def summarize(backlog_path: Path) -> str:
-    entries = load_backlog(backlog_path)
-    id_map = {entry.get("id"): entry for entry in entries if entry.get("id")}
-
-    status_counts = count_by("status", entries)
-    persona_counts = count_by("persona", entries)
-
-    runnable = [
-        entry
-        for entry in entries
-        if entry.get("persona") == "executor"
-        and entry.get("status") == "pending"
-        and deps_satisfied(entry, id_map)
-    ]
-    runnable.sort(key=lambda e: str(e.get("id", "")))
-
-    blocked = [entry for entry in entries if entry.get("status") == "blocked"]
+    index = load_backlog(backlog_path)
+    entries = index.entries
+
+    status_counts = count_by(index.by_status)
+    persona_counts = count_by(index.by_persona)
+
+    scheduler = DependencyScheduler(index)
+    runnable = scheduler.next_runnable(persona="executor")
+
+    blocked = list(index.by_status.get("blocked", []))
     blocked.sort(key=lambda e: str(e.get("id", "")))
 
     lines: List[str] = []
@@ -95,6 +69,11 @@ def summarize(backlog_path: Path) -> str:
         else:
             lines.append(f"- {task_id}")
 
+    for cycle in scheduler.cycles:
+        lines.append(f"Dependency cycle among: {', '.join(cycle)}")
+    for task_id, missing in sorted(scheduler.missing.items()):
+        lines.append(f"Missing dependencies: {task_id} -> {', '.join(missing)}")
+
     lines.append(f"Blocked tasks: {len(blocked)}")
     for entry in blocked:
         task_id = entry.get("id", "unknown")
@@ -17,6 +17,9 @@ cd "$REPO_ROOT"
 : "${BACKLOG_VALIDATOR:=ai/scripts/validate_backlog_yaml.sh}"
 : "${DEADLOCK_THROTTLE_FILE:=ai/state/deadlock_throttle.json}"
 : "${DEADLOCK_COOLDOWN_SECONDS:=60}"
+: "${PARALLEL_DISPATCH:=ai/scripts/executor/parallel_dispatch.py}"
+: "${EXECUTOR_WORKERS:=1}"
+: "${EXECUTOR_TASK_TIMEOUT:=0}"
 STAGE="${STAGE:-1}"
 export STAGE
 STAGE_COMPLETE_MARKER="${STAGE_COMPLETE_DIR}/stage_${STAGE}_complete"
@@ -372,6 +375,73 @@ handle_deadlock_if_needed(){
   return 0
 }
 
+# Decide the next state of a failed executor task whose attempt count is already
+# persisted: external block, retry, VM provisioning, or planner recovery.
+# Sets final_status, final_note and escalation.
+resolve_executor_failure(){
+  local task_id="$1" stage_num="$2" attempts_next="$3" max_attempts="$4" classification="$5"
+  # Check if this is an EXTERNAL blocker (SSH/DNS/network unreachable)
+  # External blockers should NOT trigger planner recovery - they require human intervention
+  if is_external_block_classification "$classification"; then
+    set_task_status "$task_id" "blocked" "Blocked: ${classification} (external - requires human intervention)"
+    yaml_update_task "$task_id" "{\"metadata\":{\"blocked_mode\":\"external\",\"classification\":\"${classification}\"}}"
+    final_status="blocked"
+    final_note="Blocked: ${classification} (external - no recovery possible until connectivity restored)"
+    escalation="external"
+    log_stage0_event "$STAGE" "$task_id" "executor" "blocked" "$classification" "external" "External blocker detected - SSH/network unreachable"
+  elif [ "$attempts_next" -lt "$max_attempts" ]; then
+    set_task_status "$task_id" "pending" "Retry attempt ${attempts_next}"
+    final_status="pending"
+    final_note="Retry attempt ${attempts_next}"
+  elif is_vm_provisioning_classification "$classification"; then
+    queue_vm_provisioning_tasks "$stage_num" "$classification" "$task_id"
+    set_task_status "$task_id" "blocked" "Blocked: VM provisioning queued (stage S${stage_num})"
+    yaml_update_task "$task_id" "{\"metadata\":{\"blocked_mode\":\"recovery\",\"classification\":\"${classification}\"}}"
+    final_status="blocked"
+    final_note="Blocked: VM provisioning queued (stage S${stage_num})"
+    escalation="inventory-provision"
+  else
+    escalation="$(create_planner_escalation "$task_id" "$classification" "$stage_num" || true)"
+    local blocked_mode="recovery"
+    if is_external_block_classification "$classification"; then
+      blocked_mode="external"
+    fi
+    set_task_status "$task_id" "blocked" "Blocked after ${attempts_next} failures (recovery queued)"
+    yaml_update_task "$task_id" "{\"metadata\":{\"blocked_mode\":\"${blocked_mode}\"}}"
+    final_status="blocked"
+    final_note="Blocked after ${attempts_next} failures (planner recovery queued)"
+  fi
+}
+
+# Run every runnable executor task of the stage through parallel_dispatch.py
+# (up to EXECUTOR_WORKERS at once). Escalations are applied after the
+# dispatcher exits so its locked backlog writes never race the shell helpers.
+dispatch_parallel_executors(){
+  local stage="$1"
+  local -a events=()
+  mapfile -t events < <(python3 "$PARALLEL_DISPATCH" --backlog "$BACKLOG_YAML" --stage "$stage" \
+    --workers "$EXECUTOR_WORKERS" --task-timeout "$EXECUTOR_TASK_TIMEOUT" || true)
+  local line task_id stage_num attempts max_attempts classification
+  for line in "${events[@]}"; do
+    [ "$(printf '%s' "$line" | jq -r '.event // ""')" = "finished" ] || continue
+    task_id="$(printf '%s' "$line" | jq -r '.id')"
+    stage_num="$(printf '%s' "$line" | jq -r '.stage // 0')"
+    attempts="$(printf '%s' "$line" | jq -r '.attempts // 0')"
+    max_attempts="$(printf '%s' "$line" | jq -r '.max_attempts // 3')"
+    classification="$(printf '%s' "$line" | jq -r '.classification // ""')"
+    final_status="$(printf '%s' "$line" | jq -r '.status')"
+    final_note="Executor ${final_status} in $(printf '%s' "$line" | jq -r '.wall_seconds')s"
+    if [ "$final_status" = "pending" ]; then
+      final_note="Retry attempt ${attempts}"
+    fi
+    escalation="none"
+    if [ "$(printf '%s' "$line" | jq -r '.escalate')" = "true" ]; then
+      resolve_executor_failure "$task_id" "$stage_num" "$attempts" "$max_attempts" "${classification:-ERR_UNKNOWN}"
+    fi
+    log_loop "$STAGE" "$task_id" "executor" "$final_status" "$attempts" "$escalation" "${classification:-UNKNOWN}" "$final_note"
+  done
+}
+
 ensure_environment
 if [ "${1:-}" = "deadlock-detect" ]; then
   requested_stage="${2:-}"
@@ -438,6 +508,12 @@ while true; do
   attempts="$(echo "$task_json" | jq -r '.attempts // 0')"
   max_attempts="$(echo "$task_json" | jq -r '.max_attempts // 3')"
 
+  if [ "$persona" = "executor" ] && [ "$EXECUTOR_WORKERS" -gt 1 ]; then
+    dispatch_parallel_executors "$STAGE"
+    sleep "$LOOP_SLEEP_SECONDS"
+    continue
+  fi
+
   update_current_task "$task_id" "$persona" "running" "$summary" "{\"stage\":$stage_num,\"target\":\"$target\"}"
 
   set +e
@@ -466,37 +542,7 @@ while true; do
     attempts_next=$((attempts + 1))
     yaml_update_task "$task_id" "{\"attempts\":$attempts_next}"
 
-    # Check if this is an EXTERNAL blocker (SSH/DNS/network unreachable)
-    # External blockers should NOT trigger planner recovery - they require human intervention
-    if is_external_block_classification "$final_classification"; then
-      set_task_status "$task_id" "blocked" "Blocked: ${final_classification} (external - requires human intervention)"
-      yaml_update_task "$task_id" "{\"metadata\":{\"blocked_mode\":\"external\",\"classification\":\"${final_classification}\"}}"
-      final_status="blocked"
-      final_note="Blocked: ${final_classification} (external - no recovery possible until connectivity restored)"
-      escalation="external"
-      log_stage0_event "$STAGE" "$task_id" "$persona" "blocked" "$final_classification" "external" "External blocker detected - SSH/network unreachable"
-    elif [ "$attempts_next" -lt "$max_attempts" ]; then
-      set_task_status "$task_id" "pending" "Retry attempt ${attempts_next}"
-      final_status="pending"
-      final_note="Retry attempt ${attempts_next}"
-    elif is_vm_provisioning_classification "$final_classification"; then
-      queue_vm_provisioning_tasks "$stage_num" "$final_classification" "$task_id"
-      set_task_status "$task_id" "blocked" "Blocked: VM provisioning queued (stage S${stage_num})"
-      yaml_update_task "$task_id" "{\"metadata\":{\"blocked_mode\":\"recovery\",\"classification\":\"${final_classification}\"}}"
-      final_status="blocked"
-      final_note="Blocked: VM provisioning queued (stage S${stage_num})"
-      escalation="inventory-provision"
-    else
-      escalation="$(create_planner_escalation "$task_id" "$final_classification" "$stage_num" || true)"
-      blocked_mode="recovery"
-      if is_external_block_classification "$final_classification"; then
-        blocked_mode="external"
-      fi
-      set_task_status "$task_id" "blocked" "Blocked after ${attempts_next} failures (recovery queued)"
-      yaml_update_task "$task_id" "{\"metadata\":{\"blocked_mode\":\"${blocked_mode}\"}}"
-      final_status="blocked"
-      final_note="Blocked after ${attempts_next} failures (planner recovery queued)"
-    fi
+    resolve_executor_failure "$task_id" "$stage_num" "$attempts_next" "$max_attempts" "$final_classification"
     final_attempts="$attempts_next"
   fi
 
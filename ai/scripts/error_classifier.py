@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Error classification and signature hashing for orchestrator logs.
+
+Replaces the grep/substring chains in ai/orchestrator/lib/util_errors.sh and
+ai/orchestrator/error_classifier.sh, and the sed/md5 pipeline behind
+compute_error_hash in bootstrap_loop.sh.
+
+- Rules come from ai/config/error_rules.yaml. Each table (classifications,
+  error_types) is compiled into one alternation regex; a log is scanned once
+  per distinct matching pattern at most (a found pattern is dropped from the
+  automaton and the scan resumes where it matched), and the scan stops as
+  soon as no higher-priority rule can still complete.
+- Error tails are normalized before hashing: ANSI colors, secrets,
+  timestamps, IPs, PIDs, temp paths and attempt/retry counters are replaced
+  by placeholders, so the same root cause always hashes the same and
+  attempt/escalation accounting groups repeats instead of fragmenting them.
+
+CLI:
+  error_classifier.py classify LOG                 "<ERR_CLASS> <confidence>"
+  error_classifier.py error-type [TEXT|-]          "<error_type> <sha1 of normalized tail>"
+  error_classifier.py signature-hash --stage S --exit-code N LOG
+                                                   8-char stage error hash (compute_error_hash)
+  error_classifier.py hash [--algo sha256] [TEXT|-]
+  error_classifier.py normalize [TEXT|-]
+  error_classifier.py batch                        JSON lines in ({"id", "path"|"text"}) -> JSON lines out
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import hashlib
+import json
+import os
+import re
+import socket
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+import yaml_io
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_RULES = REPO_ROOT / "ai" / "config" / "error_rules.yaml"
+
+UNKNOWN_CLASSIFICATION = "ERR_UNKNOWN"
+UNKNOWN_TYPE = "unknown"
+
+# Lines that start an error signature (bootstrap_loop.sh v5: first fatal line + last 60 lines)
+FATAL_LINE_RE = re.compile(r"(error:|fatal:|failed:|panic:|exited with code [1-9])", re.I)
+SIGNATURE_TAIL_LINES = 60
+SIGNATURE_FALLBACK_LINES = 100
+
+# Applied in order; later patterns see the placeholders of earlier ones.
+NORMALIZERS: Sequence[Tuple[re.Pattern, str]] = [
+    (re.compile(r"\x1b\[[0-9;]*m"), ""),
+    # secrets (same set as redact_secrets in bootstrap_loop.sh)
+    (re.compile(r"sk-[a-zA-Z0-9]+"), "[REDACTED]"),
+    (re.compile(r"Bearer [a-zA-Z0-9._-]+"), "Bearer [REDACTED]"),
+    (re.compile(r"-----BEGIN [A-Z ]+ PRIVATE KEY-----[^-]*-----END [A-Z ]+ PRIVATE KEY-----"), "[REDACTED PEM BLOCK]"),
+    (re.compile(r"(certificate-authority-data|client-certificate-data|client-key-data):\s*\S+"), r"\1: [REDACTED]"),
+    (re.compile(r"token:\s*[a-zA-Z0-9._-]+"), "token: [REDACTED]"),
+    (re.compile(r"(password|secret)[=:]\S+", re.I), r"\1=[REDACTED]"),
+    # timestamps: ISO 8601, syslog, bare clock times, epoch-like run ids
+    (re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?"), "<ts>"),
+    (re.compile(r"\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec) +\d{1,2} \d{2}:\d{2}:\d{2}\b"), "<ts>"),
+    (re.compile(r"\b\d{2}:\d{2}:\d{2}(?:[.,]\d+)?\b"), "<ts>"),
+    (re.compile(r"\b\d{8}[-T]\d{6}Z?\b"), "<ts>"),
+    # addresses
+    (re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}(?::\d+)?\b"), "<ip>"),
+    (re.compile(r"\b(?:[0-9a-fA-F]{1,4}:){3,7}[0-9a-fA-F]{1,4}\b"), "<ip>"),
+    # process ids
+    (re.compile(r"\b(pid|PID|process)([=: ]+)\d+"), r"\1\2<pid>"),
+    (re.compile(r"(\w)\[\d+\]"), r"\1[<pid>]"),
+    # temp paths
+    (re.compile(r"(?:/private)?/(?:tmp|var/tmp|var/folders)/\S*"), "<tmp>"),
+    (re.compile(r"\btmp\.[A-Za-z0-9]{6,}\b"), "<tmp>"),
+    # retry bookkeeping
+    (re.compile(r"attempt[ _]?\d+", re.I), "attempt"),
+    (re.compile(r"retry[ _#]?\d+", re.I), "retry"),
+    (re.compile(r"[ \t\r\f\v]+"), " "),
+]
+
+
+@dataclass(frozen=True)
+class Rule:
+    id: str
+    patterns: Tuple[str, ...]
+    confidence: str = "low"
+    resolve: Optional[str] = None
+
+
+@dataclass
+class RuleTable:
+    rules: List[Rule]
+    flags: int = 0
+
+    def __post_init__(self) -> None:
+        # (rule index, pattern index, pattern) in priority order
+        self.slots = [(i, j, p) for i, rule in enumerate(self.rules) for j, p in enumerate(rule.patterns)]
+        self.needs = [frozenset((i, j) for j in range(len(rule.patterns))) for i, rule in enumerate(self.rules)]
+
+    def match(self, text: str) -> Optional[Rule]:
+        """First rule (in table order) whose patterns all occur in text."""
+        found: set = set()
+        active = frozenset((i, j) for i, j, _ in self.slots)
+        winner = len(self.rules)
+        pos = 0
+        while active:
+            m = _automaton(tuple((i, j, p) for i, j, p in self.slots if (i, j) in active), self.flags).search(text, pos)
+            if m is None:
+                break
+            i, j = map(int, m.lastgroup[1:].split("_"))
+            found.add((i, j))
+            if i < winner and self.needs[i] <= found:
+                winner = i
+            # Only patterns of rules that could still beat the current winner matter.
+            active = frozenset(s for s in active if s[0] < winner and s not in found)
+            pos = m.start()
+        return self.rules[winner] if winner < len(self.rules) else None
+
+
+@functools.lru_cache(maxsize=256)
+def _automaton(slots: Tuple[Tuple[int, int, str], ...], flags: int) -> re.Pattern:
+    return re.compile("|".join(f"(?P<r{i}_{j}>{p})" for i, j, p in slots), flags | re.M)
+
+
+@dataclass
+class RuleSet:
+    classifications: RuleTable
+    error_types: RuleTable
+    external: FrozenSet[str]
+
+
+@functools.lru_cache(maxsize=8)
+def _load_rules(path: str, stamp: Tuple[int, int]) -> RuleSet:
+    data = yaml_io.load(path, {}) or {}
+
+    def table(name: str, flags: int = 0) -> RuleTable:
+        rules = []
+        for entry in data.get(name) or []:
+            patterns = entry.get("patterns") or []
+            if isinstance(patterns, str):
+                patterns = [patterns]
+            rules.append(Rule(
+                id=str(entry["id"]),
+                patterns=tuple(str(p) for p in patterns),
+                confidence=str(entry.get("confidence", "low")),
+                resolve=entry.get("resolve"),
+            ))
+        return RuleTable(rules, flags)
+
+    return RuleSet(
+        classifications=table("classifications"),
+        error_types=table("error_types", re.I),
+        external=frozenset(data.get("external") or []),
+    )
+
+
+def load_rules(path: Optional[os.PathLike] = None) -> RuleSet:
+    path = str(path or os.environ.get("ERROR_RULES_FILE") or DEFAULT_RULES)
+    try:
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+    except FileNotFoundError:
+        stamp = (0, 0)
+    return _load_rules(path, stamp)
+
+
+# ============================================================================
+# Normalization / hashing
+# ============================================================================
+
+def normalize(text: str) -> str:
+    for pattern, replacement in NORMALIZERS:
+        text = pattern.sub(replacement, text)
+    return "\n".join(line.strip() for line in text.splitlines())
+
+
+def signature_hash(text: str, algo: str = "sha1") -> str:
+    return hashlib.new(algo, normalize(text).encode("utf-8")).hexdigest()
+
+
+def error_signature(log_text: str) -> str:
+    """First fatal line plus the last 60 lines (last 100 when there is no fatal line)."""
+    lines = log_text.splitlines()
+    fatal = FATAL_LINE_RE.search(log_text)
+    if fatal is None:
+        return "\n".join(lines[-SIGNATURE_FALLBACK_LINES:])
+    start = log_text.rfind("\n", 0, fatal.start()) + 1
+    end = log_text.find("\n", fatal.end())
+    fatal_line = log_text[start:end if end != -1 else len(log_text)]
+    return fatal_line + "\n" + "\n".join(lines[-SIGNATURE_TAIL_LINES:])
+
+
+def stage_error_hash(stage: str, exit_code: str, log_text: str) -> str:
+    """compute_error_hash: md5 over stage, exit code and normalized signature; first 8 hex chars."""
+    payload = f"{stage}\n{exit_code}\n{normalize(error_signature(log_text))}"
+    return hashlib.md5(payload.encode("utf-8")).hexdigest()[:8]
+
+
+# ============================================================================
+# Classification
+# ============================================================================
+
+# Long-running callers (parallel_dispatch) re-probe after this many seconds.
+REACHABILITY_TTL = 60.0
+_reachability: Dict[Tuple[str, int], Tuple[float, bool]] = {}
+
+
+def proxmox_host_reachable() -> bool:
+    host = os.environ.get("PROXMOX_HOST", "192.168.1.214")
+    port = int(os.environ.get("PROXMOX_SSH_PORT", "22"))
+    cached = _reachability.get((host, port))
+    if cached is not None and time.monotonic() - cached[0] < REACHABILITY_TTL:
+        return cached[1]
+    try:
+        with socket.create_connection((host, port), timeout=2.0):
+            reachable = True
+    except OSError:
+        reachable = False
+    _reachability[(host, port)] = (time.monotonic(), reachable)
+    return reachable
+
+
+RESOLVERS = {
+    "proxmox_reachability": lambda rule: "ERR_VM_UNREACHABLE" if proxmox_host_reachable() else rule.id,
+}
+
+
+@dataclass
+class Classification:
+    classification: str
+    confidence: str
+    external: bool
+    error_type: str
+    error_hash: str
+
+
+def classify_text(text: str, rules: Optional[RuleSet] = None, tail: Optional[str] = None) -> Classification:
+    """Classify a whole log; error_type/error_hash use `tail` (default: the log's error signature)."""
+    rules = rules or load_rules()
+    rule = rules.classifications.match(text)
+    if rule is None:
+        classification, confidence = UNKNOWN_CLASSIFICATION, "low"
+    else:
+        resolver = RESOLVERS.get(rule.resolve or "")
+        classification, confidence = (resolver(rule) if resolver else rule.id), rule.confidence
+    tail = error_signature(text) if tail is None else tail
+    type_rule = rules.error_types.match(tail)
+    return Classification(
+        classification=classification,
+        confidence=confidence,
+        external=classification in rules.external,
+        error_type=type_rule.id if type_rule else UNKNOWN_TYPE,
+        error_hash=signature_hash(tail),
+    )
+
+
+def classify_log(path: os.PathLike, rules: Optional[RuleSet] = None) -> Classification:
+    try:
+        text = Path(path).read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return Classification(UNKNOWN_CLASSIFICATION, "low", False, UNKNOWN_TYPE, "")
+    return classify_text(text, rules)
+
+
+def error_type(tail: str, rules: Optional[RuleSet] = None) -> Tuple[str, str]:
+    """error_classifier.sh contract: (ERROR_TYPE, ERROR_HASH) for an error tail."""
+    rule = (rules or load_rules()).error_types.match(tail)
+    return (rule.id if rule else UNKNOWN_TYPE), signature_hash(tail)
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def _text_arg(value: Optional[str]) -> str:
+    return sys.stdin.read() if value in (None, "-") else value
+
+
+def run_batch(rules: RuleSet) -> None:
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError:
+            request = None
+        if not isinstance(request, dict):
+            request = {"path": line}
+        if "text" in request:
+            result = classify_text(request["text"], rules)
+        else:
+            result = classify_log(request.get("path", ""), rules)
+        print(json.dumps({"id": request.get("id", request.get("path")), **asdict(result)}), flush=True)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Classify orchestrator errors and hash normalized signatures.")
+    parser.add_argument("--rules", help="Rules file (default: $ERROR_RULES_FILE or ai/config/error_rules.yaml).")
+    sub = parser.add_subparsers(dest="command", required=True)
+    classify = sub.add_parser("classify", help="Print '<classification> <confidence>' for a log file.")
+    classify.add_argument("log")
+    classify.add_argument("--json", action="store_true")
+    etype = sub.add_parser("error-type", help="Print '<error_type> <hash>' for an error tail.")
+    etype.add_argument("text", nargs="?")
+    sig = sub.add_parser("signature-hash", help="8-char stage error hash for a log file.")
+    sig.add_argument("--stage", required=True)
+    sig.add_argument("--exit-code", required=True)
+    sig.add_argument("log")
+    hsh = sub.add_parser("hash", help="Hash of the normalized text.")
+    hsh.add_argument("--algo", default="sha1")
+    hsh.add_argument("text", nargs="?")
+    norm = sub.add_parser("normalize", help="Print the normalized text.")
+    norm.add_argument("text", nargs="?")
+    sub.add_parser("batch", help="Classify JSON lines from stdin ({'id', 'path'} or {'id', 'text'}).")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    rules = load_rules(args.rules)
+    if args.command == "classify":
+        result = classify_log(args.log, rules)
+        print(json.dumps(asdict(result)) if args.json else f"{result.classification} {result.confidence}")
+    elif args.command == "error-type":
+        print(" ".join(error_type(_text_arg(args.text), rules)))
+    elif args.command == "signature-hash":
+        try:
+            log_text = Path(args.log).read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            print("no_log_file")
+            return 0
+        print(stage_error_hash(args.stage, args.exit_code, log_text))
+    elif args.command == "hash":
+        print(signature_hash(_text_arg(args.text), args.algo))
+    elif args.command == "normalize":
+        print(normalize(_text_arg(args.text)))
+    else:
+        run_batch(rules)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Parallel executor dispatch over the backlog dependency graph.
+
+codex_loop.sh runs one task per iteration, so independent branches of the
+depends_on graph (e.g. S1-PROXMOX-INVENTORY and S1-LINT-BACKLOG, both only
+after S1-PREFLIGHT-HOST) run back to back. This dispatcher keeps up to
+--workers executor tasks of a stage running at once: DependencyScheduler
+hands out runnable tasks and releases dependents as soon as a task
+succeeds, so bring-up time follows the critical path instead of the task
+count.
+
+Per task it does what persona_executor.sh does (run ai_harness.sh with the
+TASK_* environment, log to ai/logs/executor/<id>-<ts>.log) and applies the
+codex_loop attempt policy:
+- success                                   -> success
+- failure, attempts left, not external      -> pending (retried in this run)
+- failure, max_attempts reached or external -> failed, reported with
+  "escalate": true so codex_loop can block / queue recovery as usual
+
+Every status transition is persisted to ai/backlog.yaml under an flock on
+ai/backlog.yaml.lock: the file is re-read and only the task's item is
+re-emitted (yaml_io.update_entry), then renamed into place. Wall time
+per task is stored in the entry metadata (wall_seconds).
+
+Output: one JSON event per line on stdout (started, finished, summary).
+"""
+
+from __future__ import annotations
+
+import argparse
+import fcntl
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+BACKLOG_PATH = REPO_ROOT / "ai" / "backlog.yaml"
+HARNESS = REPO_ROOT / "ai" / "scripts" / "ai_harness.sh"
+EXECUTOR_LOG_DIR = REPO_ROOT / "ai" / "logs" / "executor"
+sys.path.insert(0, str(REPO_ROOT / "ai" / "scripts"))
+
+from backlog_engine import BacklogIndex, DependencyScheduler, parse_stage  # noqa: E402
+import error_classifier  # noqa: E402
+import yaml_io  # noqa: E402
+
+DEFAULT_MAX_ATTEMPTS = 3
+KILL_GRACE_SECONDS = 10
+
+
+def utc_stamp() -> str:
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def repo_relative(path: Path) -> str:
+    try:
+        return str(path.relative_to(REPO_ROOT))
+    except ValueError:
+        return str(path)
+
+
+def emit(event: str, **fields: Any) -> None:
+    print(json.dumps({"event": event, **fields}), flush=True)
+
+
+class BacklogWriter:
+    """Locked read-modify-write of single backlog entries."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.lock_path = path.with_name(path.name + ".lock")
+        self._thread_lock = threading.Lock()
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        with self._thread_lock, self.lock_path.open("a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def update(self, task_id: str, mutate: Callable[[Dict[str, Any]], Any]) -> Any:
+        """Apply mutate() to the task's current entry and persist; None if the task is gone."""
+        outcome: Dict[str, Any] = {}
+
+        def apply(entry: Dict[str, Any]) -> bool:
+            outcome["result"] = mutate(entry)
+            return outcome["result"] is not None
+
+        with self.locked():
+            # Only this task's item is re-emitted; the rest of the file is untouched.
+            if yaml_io.update_entry(self.path, task_id, apply) is None:
+                return None
+        return outcome.get("result")
+
+
+@dataclass
+class TaskResult:
+    task_id: str
+    rc: int
+    wall_seconds: float
+    log_path: Path
+    timed_out: bool = False
+
+
+def classify_failure(log_path: Path) -> tuple[str, bool]:
+    """Classify the task log in-process (same rules as util_errors.sh classify_error); returns (classification, external)."""
+    result = error_classifier.classify_log(log_path)
+    return result.classification, result.external
+
+
+class Dispatcher:
+    def __init__(self, backlog_path: Path, stage: int, workers: int, task_timeout: Optional[float],
+                 harness: Path = HARNESS, max_tasks: Optional[int] = None) -> None:
+        self.backlog_path = backlog_path
+        self.stage = stage
+        self.workers = max(1, workers)
+        self.task_timeout = task_timeout or None
+        self.harness = harness
+        self.max_tasks = max_tasks
+        self.writer = BacklogWriter(backlog_path)
+        self.scheduler = DependencyScheduler(BacklogIndex.load(backlog_path))
+        self._procs: Dict[str, subprocess.Popen] = {}
+        self._procs_lock = threading.Lock()
+        self.counts = {"dispatched": 0, "success": 0, "retried": 0, "escalated": 0}
+        self.task_seconds = 0.0
+
+    # -- task execution (worker threads) -----------------------------------
+
+    def run_task(self, entry: Dict[str, Any]) -> TaskResult:
+        task_id = str(entry["id"])
+        EXECUTOR_LOG_DIR.mkdir(parents=True, exist_ok=True)
+        log_path = EXECUTOR_LOG_DIR / f"{task_id}-{utc_stamp()}.log"
+        target = entry.get("target") or ""
+        start = time.monotonic()
+        if not target:
+            log_path.write_text("[executor] Executor task missing target\n", encoding="utf-8")
+            return TaskResult(task_id, 1, 0.0, log_path)
+
+        env = dict(os.environ)
+        env.update({
+            "TASK_ID": task_id,
+            "TASK_STAGE": str(entry.get("stage", 1)),
+            "TASK_TARGET": str(target),
+            "TASK_DETAIL": str(entry.get("detail") or ""),
+            "LOG_FILE": str(log_path),
+        })
+        timed_out = False
+        with log_path.open("ab") as log:
+            proc = subprocess.Popen(
+                [str(self.harness)], cwd=REPO_ROOT, env=env,
+                stdout=log, stderr=subprocess.STDOUT, start_new_session=True,
+            )
+            with self._procs_lock:
+                self._procs[task_id] = proc
+            try:
+                rc = proc.wait(timeout=self.task_timeout)
+            except subprocess.TimeoutExpired:
+                timed_out = True
+                self.kill(proc)
+                rc = 124
+                log.write(f"[dispatch] task exceeded wall-time limit of {self.task_timeout:g}s\n".encode())
+            finally:
+                with self._procs_lock:
+                    self._procs.pop(task_id, None)
+        return TaskResult(task_id, rc, round(time.monotonic() - start, 3), log_path, timed_out)
+
+    @staticmethod
+    def kill(proc: subprocess.Popen) -> None:
+        """Terminate the harness and everything it spawned (own process group)."""
+        for sig, grace in ((signal.SIGTERM, KILL_GRACE_SECONDS), (signal.SIGKILL, None)):
+            try:
+                os.killpg(proc.pid, sig)
+            except ProcessLookupError:
+                return
+            try:
+                proc.wait(timeout=grace)
+                return
+            except subprocess.TimeoutExpired:
+                continue
+
+    # -- state transitions (dispatcher thread) -----------------------------
+
+    def start(self, entry: Dict[str, Any]) -> bool:
+        task_id = str(entry["id"])
+        summary = entry.get("summary") or "executor task"
+
+        def to_running(current: Dict[str, Any]) -> Optional[bool]:
+            # Someone else (codex_loop, a second dispatcher) may have taken it.
+            if current.get("status") != "pending":
+                return None
+            current["status"] = "running"
+            current["note"] = summary
+            return True
+
+        self.scheduler.mark_started(task_id)
+        if not self.writer.update(task_id, to_running):
+            return False
+        self.counts["dispatched"] += 1
+        emit("started", id=task_id, stage=entry.get("stage"), summary=summary)
+        return True
+
+    def finish(self, entry: Dict[str, Any], result: TaskResult) -> None:
+        task_id = result.task_id
+        self.task_seconds += result.wall_seconds
+        classification, external = ("", False)
+        if result.rc != 0:
+            classification, external = classify_failure(result.log_path)
+
+        def record(current: Dict[str, Any]) -> Dict[str, Any]:
+            metadata = current.get("metadata") if isinstance(current.get("metadata"), dict) else {}
+            metadata.update({"wall_seconds": result.wall_seconds, "log_path": repo_relative(result.log_path)})
+            current["metadata"] = metadata
+            if result.rc == 0:
+                current["status"] = "success"
+                current["note"] = "Executor succeeded"
+                return {"status": "success", "attempts": int(current.get("attempts", 0) or 0)}
+            attempts = int(current.get("attempts", 0) or 0) + 1
+            max_attempts = int(current.get("max_attempts", DEFAULT_MAX_ATTEMPTS) or DEFAULT_MAX_ATTEMPTS)
+            current["attempts"] = attempts
+            if not external and attempts < max_attempts:
+                current["status"] = "pending"
+                current["note"] = f"Retry attempt {attempts}"
+            else:
+                current["status"] = "failed"
+                reason = "timed out" if result.timed_out else f"rc={result.rc}"
+                current["note"] = f"Executor failed ({reason})"
+            return {"status": current["status"], "attempts": attempts, "max_attempts": max_attempts}
+
+        outcome = self.writer.update(task_id, record)
+        if outcome is None:
+            self.scheduler.mark_started(task_id, "missing")
+            emit("finished", id=task_id, status="missing", rc=result.rc, wall_seconds=result.wall_seconds)
+            return
+
+        released = []
+        escalate = False
+        if outcome["status"] == "success":
+            self.counts["success"] += 1
+            released = self.scheduler.mark_success(task_id)
+        elif outcome["status"] == "pending":
+            self.counts["retried"] += 1
+            self.scheduler.requeue(task_id)
+        else:
+            self.counts["escalated"] += 1
+            escalate = True
+            self.scheduler.mark_started(task_id, "failed")
+        emit(
+            "finished",
+            id=task_id,
+            stage=entry.get("stage"),
+            status=outcome["status"],
+            rc=result.rc,
+            timed_out=result.timed_out,
+            wall_seconds=result.wall_seconds,
+            attempts=outcome["attempts"],
+            max_attempts=outcome.get("max_attempts", entry.get("max_attempts", DEFAULT_MAX_ATTEMPTS)),
+            classification=classification,
+            external=external,
+            escalate=escalate,
+            released=released,
+            log_path=repo_relative(result.log_path),
+        )
+
+    def requeue_interrupted(self, task_id: str) -> None:
+        def to_pending(current: Dict[str, Any]) -> Optional[bool]:
+            if current.get("status") != "running":
+                return None
+            current["status"] = "pending"
+            current["note"] = "Dispatcher interrupted; requeued"
+            return True
+
+        self.writer.update(task_id, to_pending)
+
+    # -- main loop ----------------------------------------------------------
+
+    def run(self) -> Dict[str, Any]:
+        started_at = time.monotonic()
+        running: Dict[Future, Dict[str, Any]] = {}
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="executor")
+        try:
+            while True:
+                free = self.workers - len(running)
+                if self.max_tasks is not None:
+                    free = min(free, self.max_tasks - self.counts["dispatched"])
+                if free > 0:
+                    for entry in self.scheduler.next_runnable(free, persona="executor", stage=self.stage):
+                        if self.start(entry):
+                            running[pool.submit(self.run_task, entry)] = entry
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self.finish(running.pop(future), future.result())
+        except KeyboardInterrupt:
+            with self._procs_lock:
+                procs = list(self._procs.values())
+            for proc in procs:
+                self.kill(proc)
+            for entry in running.values():
+                self.requeue_interrupted(str(entry["id"]))
+            raise
+        finally:
+            pool.shutdown(wait=True)
+        wall = round(time.monotonic() - started_at, 3)
+        summary = {
+            **self.counts,
+            "workers": self.workers,
+            "wall_seconds": wall,
+            "task_seconds": round(self.task_seconds, 3),
+        }
+        emit("summary", stage=self.stage, **summary)
+        return summary
+
+
+def parse_args(argv: Optional[list] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run independent executor tasks of a stage concurrently.")
+    parser.add_argument("--backlog", default=str(BACKLOG_PATH), help="Path to backlog YAML.")
+    parser.add_argument("--stage", default=os.environ.get("STAGE", "1"), help="Stage to dispatch.")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("EXECUTOR_WORKERS", "2")),
+                        help="Max executor tasks running at once.")
+    parser.add_argument("--task-timeout", type=float, default=float(os.environ.get("EXECUTOR_TASK_TIMEOUT", "0")),
+                        help="Per-task wall-time limit in seconds (0 = none).")
+    parser.add_argument("--harness", default=os.environ.get("EXECUTOR_HARNESS", str(HARNESS)),
+                        help="Command run per task (TASK_* env as for persona_executor.sh).")
+    parser.add_argument("--max-tasks", type=int, default=None, help="Stop dispatching after N tasks.")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list] = None) -> int:
+    args = parse_args(argv)
+    backlog_path = Path(args.backlog)
+    if not backlog_path.exists():
+        print(f"Backlog not found: {backlog_path}", file=sys.stderr)
+        return 1
+    dispatcher = Dispatcher(
+        backlog_path,
+        parse_stage(args.stage),
+        args.workers,
+        args.task_timeout,
+        Path(args.harness),
+        args.max_tasks,
+    )
+    try:
+        dispatcher.run()
+    except KeyboardInterrupt:
+        return 130
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
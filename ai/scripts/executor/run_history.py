@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Indexed history of CLI loop run summaries.
+
+run_summary.py records every run here in addition to the per-run
+logs/ai/runs/run-<label>.json/.txt files, so history questions ("which
+stage failed most this week?") are answered by an indexed SQLite query
+instead of globbing and parsing every summary file.
+
+Store:
+- logs/ai/runs/history.sqlite3 (one row per run, keyed by run_label)
+
+Commands:
+- query   list runs matching filters (target, component, stage, status, time range)
+- stats   aggregates over the same filters: status counts, failure rate per
+          group (stage by default) and the most frequent stuck_on lines
+- rebuild backfill the index from existing run-*.json files
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+RUNS_DIR = REPO_ROOT / "logs" / "ai" / "runs"
+HISTORY_DB = RUNS_DIR / "history.sqlite3"
+
+FAILED_STATUSES = ("failed", "blocked_stage1")
+GROUP_FIELDS = ("stage", "target", "component", "status")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_label TEXT PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    recorded_at REAL NOT NULL,
+    target TEXT,
+    component TEXT,
+    stage TEXT,
+    status TEXT,
+    stuck_on TEXT,
+    suggested_next_step TEXT,
+    tasks_attempted TEXT,
+    tasks_completed TEXT,
+    summary_path TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_recorded_at ON runs (recorded_at);
+CREATE INDEX IF NOT EXISTS runs_stage_status ON runs (stage, status);
+CREATE INDEX IF NOT EXISTS runs_target ON runs (target, recorded_at);
+CREATE INDEX IF NOT EXISTS runs_component ON runs (component, recorded_at);
+"""
+INSERT_RUN = "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+
+def connect(db_path: Path = HISTORY_DB) -> sqlite3.Connection:
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(db_path), timeout=10)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def run_timestamp(run_id: str) -> Optional[float]:
+    """Epoch seconds for an ISO-like run id; None when it does not parse."""
+    try:
+        parsed = datetime.fromisoformat(run_id.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def run_row(summary: Dict[str, Any], run_label: str, recorded_at: float,
+            summary_path: Optional[Path] = None) -> Tuple[Any, ...]:
+    return (
+        run_label,
+        summary.get("run_id") or run_label,
+        recorded_at,
+        summary.get("target"),
+        summary.get("component"),
+        summary.get("stage"),
+        summary.get("status"),
+        summary.get("stuck_on") or "",
+        summary.get("suggested_next_step") or "",
+        json.dumps(summary.get("tasks_attempted") or []),
+        json.dumps(summary.get("tasks_completed") or []),
+        str(summary_path) if summary_path else None,
+    )
+
+
+def record_run(summary: Dict[str, Any], run_label: str, summary_path: Optional[Path] = None,
+               db_path: Path = HISTORY_DB) -> None:
+    """Insert (or replace) one run summary; a run id that is no timestamp is recorded as of now."""
+    recorded_at = run_timestamp(summary.get("run_id") or run_label)
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.execute(INSERT_RUN, run_row(summary, run_label,
+                                             time.time() if recorded_at is None else recorded_at, summary_path))
+    finally:
+        conn.close()
+
+
+def rebuild(runs_dir: Path = RUNS_DIR, db_path: Path = HISTORY_DB) -> int:
+    """
+    Backfill the index from run-*.json files in one transaction; returns the
+    number of runs indexed. Summaries whose run id is not a timestamp are
+    skipped (and reported on stderr): "now" would misplace old runs.
+    """
+    rows, skipped = [], []
+    for path in sorted(runs_dir.glob("run-*.json")):
+        try:
+            summary = json.loads(path.read_text())
+        except (OSError, json.JSONDecodeError):
+            continue
+        if not isinstance(summary, dict):
+            continue
+        run_label = path.stem[len("run-"):]
+        recorded_at = run_timestamp(summary.get("run_id") or run_label)
+        if recorded_at is None:
+            skipped.append(path.name)
+            continue
+        rows.append(run_row(summary, run_label, recorded_at, path))
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.executemany(INSERT_RUN, rows)
+    finally:
+        conn.close()
+    if skipped:
+        more = f" (+{len(skipped) - 5} more)" if len(skipped) > 5 else ""
+        print(f"[run_history] Skipped {len(skipped)} summaries without a timestamp run_id: "
+              f"{', '.join(skipped[:5])}{more}", file=sys.stderr)
+    return len(rows)
+
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """Accept ISO timestamps or relative ages such as 30m, 24h, 7d."""
+    if not value:
+        return None
+    m = re.fullmatch(r"(\d+)([smhd])", value.strip())
+    if m:
+        seconds = int(m.group(1)) * {"s": 1, "m": 60, "h": 3600, "d": 86400}[m.group(2)]
+        return time.time() - seconds
+    timestamp = run_timestamp(value)
+    if timestamp is None:
+        raise argparse.ArgumentTypeError(f"not an ISO timestamp or an age like 7d: {value!r}")
+    return timestamp
+
+
+def build_filters(args: argparse.Namespace) -> Tuple[str, List[Any]]:
+    clauses: List[str] = []
+    params: List[Any] = []
+    for column in ("target", "component", "stage", "status"):
+        value = getattr(args, column)
+        if value:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if args.since is not None:
+        clauses.append("recorded_at >= ?")
+        params.append(args.since)
+    if args.until is not None:
+        clauses.append("recorded_at < ?")
+        params.append(args.until)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+
+def query_runs(conn: sqlite3.Connection, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    where, params = build_filters(args)
+    rows = conn.execute(
+        f"SELECT run_label, run_id, target, component, stage, status, stuck_on FROM runs {where} "
+        "ORDER BY recorded_at DESC LIMIT ?",
+        params + [args.limit],
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def run_stats(conn: sqlite3.Connection, args: argparse.Namespace) -> Dict[str, Any]:
+    where, params = build_filters(args)
+    failed = ", ".join("?" for _ in FAILED_STATUSES)
+
+    total = conn.execute(f"SELECT COUNT(*) FROM runs {where}", params).fetchone()[0]
+    by_status = {
+        row["status"]: row["n"]
+        for row in conn.execute(f"SELECT status, COUNT(*) AS n FROM runs {where} GROUP BY status", params)
+    }
+    groups = [
+        {
+            args.group_by: row["grp"],
+            "runs": row["runs"],
+            "failed": row["failed"],
+            "failure_rate": round(row["failed"] / row["runs"], 3) if row["runs"] else 0.0,
+        }
+        for row in conn.execute(
+            f"SELECT {args.group_by} AS grp, COUNT(*) AS runs, "
+            f"SUM(CASE WHEN status IN ({failed}) THEN 1 ELSE 0 END) AS failed "
+            f"FROM runs {where} GROUP BY grp ORDER BY failed DESC, runs DESC",
+            list(FAILED_STATUSES) + params,
+        )
+    ]
+    stuck_where = f"{where} AND stuck_on != ''" if where else "WHERE stuck_on != ''"
+    top_stuck = [
+        {"stuck_on": row["stuck_on"], "count": row["n"]}
+        for row in conn.execute(
+            f"SELECT stuck_on, COUNT(*) AS n FROM runs {stuck_where} "
+            "GROUP BY stuck_on ORDER BY n DESC LIMIT ?",
+            params + [args.top],
+        )
+    ]
+    return {
+        "total_runs": total,
+        "by_status": by_status,
+        "failure_rate": round(sum(by_status.get(s, 0) for s in FAILED_STATUSES) / total, 3) if total else 0.0,
+        "groups": groups,
+        "top_stuck_on": top_stuck,
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Query the indexed run summary history.")
+    parser.add_argument("command", choices=["query", "stats", "rebuild"])
+    parser.add_argument("--db", default=str(HISTORY_DB), help="History database path.")
+    parser.add_argument("--runs-dir", default=str(RUNS_DIR), help="Run summary directory (rebuild).")
+    parser.add_argument("--target", help="Filter by target cluster/host.")
+    parser.add_argument("--component", help="Filter by component (orchestrator, ai_harness, ...).")
+    parser.add_argument("--stage", help="Filter by stage.")
+    parser.add_argument("--status", help="Filter by run status.")
+    parser.add_argument("--since", type=parse_time, help="Start of time range (ISO timestamp or age like 7d, 24h).")
+    parser.add_argument("--until", type=parse_time, help="End of time range (ISO timestamp or age like 1d).")
+    parser.add_argument("--group-by", choices=GROUP_FIELDS, default="stage", help="Grouping for stats.")
+    parser.add_argument("--top", type=int, default=5, help="Number of stuck_on lines to report.")
+    parser.add_argument("--limit", type=int, default=20, help="Max runs to list for query.")
+    parser.add_argument("--json", action="store_true", help="Output as JSON.")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    db_path = Path(args.db)
+
+    if args.command == "rebuild":
+        count = rebuild(Path(args.runs_dir), db_path)
+        print(f"Indexed {count} run summaries into {db_path}")
+        return 0
+
+    conn = connect(db_path)
+    try:
+        if args.command == "query":
+            runs = query_runs(conn, args)
+            if args.json:
+                print(json.dumps(runs, indent=2))
+            else:
+                for run in runs:
+                    line = f"{run['run_id']}  {run['status']:<15} {run['stage']} {run['target']} {run['component']}"
+                    if run["stuck_on"]:
+                        line += f"  stuck_on={run['stuck_on']}"
+                    print(line)
+        else:
+            stats = run_stats(conn, args)
+            if args.json:
+                print(json.dumps(stats, indent=2))
+            else:
+                print(f"Runs: {stats['total_runs']} (failure rate {stats['failure_rate']:.1%})")
+                print("By status: " + " ".join(f"{k}={v}" for k, v in sorted(stats["by_status"].items())))
+                print(f"By {args.group_by}:")
+                for group in stats["groups"]:
+                    print(f"  {group[args.group_by]}: {group['failed']}/{group['runs']} failed "
+                          f"({group['failure_rate']:.1%})")
+                print("Top stuck_on:")
+                for item in stats["top_stuck_on"]:
+                    print(f"  {item['count']}x {item['stuck_on']}")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -15,6 +15,7 @@ Inputs:
 Outputs:
 - logs/ai/runs/run-<run_label>.json (machine-readable summary)
 - logs/ai/runs/run-<run_label>.txt (human-readable summary)
+- logs/ai/runs/history.sqlite3 (indexed run history; query with run_history.py)
 - ai/state/last_run.log (updated with the same human summary when provided)
 """
 
@@ -24,15 +25,19 @@ import argparse
 import json
 import os
 import re
+import sqlite3
 import sys
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Sequence
-import yaml
+from typing import Iterable, Iterator, List, Sequence, Tuple
+from run_history import record_run
 
 
 REPO_ROOT = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT / "ai" / "scripts"))
+
+from backlog_engine import load_entries  # noqa: E402
 
 
 def parse_args() -> argparse.Namespace:
@@ -67,7 +72,7 @@ def parse_backlog(path: Path, limit: int) -> List[dict]:
     if not path.exists():
         return items
     try:
-        entries = yaml.safe_load(path.read_text()) or []
+        entries = load_entries(path)
     except Exception:
         return items
     for entry in entries:
@@ -82,62 +87,248 @@ def parse_backlog(path: Path, limit: int) -> List[dict]:
     return items
 
 
-def extract_summary_lines(lines: Sequence[str], limit: int) -> List[str]:
-    bullets: List[str] = []
-    # Prefer explicit SUMMARY bullets.
-    for idx, line in enumerate(lines):
-        if line.strip().upper().startswith("SUMMARY"):
-            for follow in lines[idx + 1 :]:
-                if follow.strip().startswith("-"):
-                    bullets.append(follow.strip().lstrip("- ").strip())
-                elif bullets and follow.strip():
-                    break
-                elif not follow.strip():
-                    if bullets:
-                        break
-            if bullets:
-                return bullets[:limit]
-    # Fall back to FILE lines for quick change notes.
-    for line in lines:
-        if line.startswith("FILE "):
-            bullets.append(line.split("FILE ", 1)[1].strip())
-        if len(bullets) >= limit:
-            return bullets
-    # As a last resort, pick notable RES failures.
+FAILURE_WORDS = ("fail", "error", "blocked", "missing", "timeout", "denied")
+REVERSE_BLOCK_SIZE = 64 * 1024
+
+
+def iter_lines(path: Path) -> Iterator[str]:
+    """Stream a log file line by line without holding it in memory."""
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            yield line.rstrip("\r\n")
+
+
+def iter_lines_reverse(path: Path, block_size: int = REVERSE_BLOCK_SIZE) -> Iterator[str]:
+    """Yield lines from the end of a file backwards, reading fixed-size blocks."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        remainder = b""
+        while pos > 0:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step) + remainder
+            parts = chunk.split(b"\n")
+            # The first part may continue in the previous block.
+            remainder = parts[0]
+            for raw in reversed(parts[1:]):
+                yield raw.decode("utf-8", errors="ignore").rstrip("\r")
+        yield remainder.decode("utf-8", errors="ignore").rstrip("\r")
+
+
+def is_failure_line(line: str) -> bool:
+    lower = line.lower()
+    return any(word in lower for word in FAILURE_WORDS)
+
+
+class LogScanner:
+    """
+    Evaluate every summary detector in one pass over a stream of lines.
+
+    Memory is bounded by `limit`: only the bullets that can end up in the
+    summary are kept, plus the most recent failure line.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self._summary_state = "search"  # search -> seek -> collect -> done
+        self._summary_bullets: List[str] = []
+        self._file_bullets: List[str] = []
+        self._res_bullets: List[str] = []
+        self.next_step = ""
+        self.stuck_on = ""
+
+    @property
+    def done(self) -> bool:
+        """True once later lines can no longer change summary or next step."""
+        return self._summary_state == "done" and bool(self.next_step)
+
+    def feed(self, line: str) -> None:
+        stripped = line.strip()
+
+        # Prefer explicit SUMMARY bullets: the first bullet run after a SUMMARY header.
+        if self._summary_state == "search":
+            if stripped.upper().startswith("SUMMARY"):
+                self._summary_state = "seek"
+        elif self._summary_state in ("seek", "collect"):
+            if stripped.startswith("-"):
+                if len(self._summary_bullets) < self.limit:
+                    self._summary_bullets.append(stripped.lstrip("- ").strip())
+                self._summary_state = "collect"
+            elif self._summary_state == "collect":
+                self._summary_state = "done"
+
+        # Fall back to FILE lines, then notable RES failures.
+        if self._summary_state != "done":
+            if line.startswith("FILE ") and len(self._file_bullets) < self.limit:
+                self._file_bullets.append(line.split("FILE ", 1)[1].strip())
+            if (line.startswith("RES ") and len(self._res_bullets) < self.limit
+                    and any(w in line.lower() for w in ("fail", "error", "blocked"))):
+                self._res_bullets.append(stripped)
+
+        if not self.next_step:
+            lower = line.lower()
+            if "next step" in lower or "next steps" in lower:
+                self.next_step = line.strip("- ").strip()
+
+        if is_failure_line(line):
+            self.stuck_on = stripped
+
+    def summary_lines(self) -> List[str]:
+        if self._summary_bullets:
+            return self._summary_bullets[: self.limit]
+        return (self._file_bullets + self._res_bullets)[: self.limit]
+
+
+def scan_lines(lines: Iterable[str], limit: int, stop_early: bool = False) -> LogScanner:
+    scanner = LogScanner(limit)
     for line in lines:
-        if line.startswith("RES ") and any(w in line.lower() for w in ("fail", "error", "blocked")):
-            bullets.append(line.strip())
-        if len(bullets) >= limit:
+        scanner.feed(line)
+        if stop_early and scanner.done:
             break
-    return bullets[:limit]
+    return scanner
+
+
+def extract_summary_lines(lines: Sequence[str], limit: int) -> List[str]:
+    return scan_lines(lines, limit).summary_lines()
 
 
 def detect_stuck_on(lines: Sequence[str]) -> str:
     for line in reversed(lines):
-        lower = line.lower()
-        if any(word in lower for word in ("fail", "error", "blocked", "missing", "timeout", "denied")):
+        if is_failure_line(line):
             return line.strip()
     return ""
 
 
-def detect_next_step(lines: Sequence[str]) -> str:
-    for line in lines:
-        if "next step" in line.lower() or "next steps" in line.lower():
-            return line.strip("- ").strip()
+def detect_stuck_on_file(path: Path) -> str:
+    """Find the last failure line by reading the file backwards from the end."""
+    for line in iter_lines_reverse(path):
+        if is_failure_line(line):
+            return line.strip()
     return ""
 
 
-def gather_logs(primary: Path) -> List[str]:
+def detect_next_step(lines: Sequence[str]) -> str:
+    return scan_lines(lines, 0).next_step
+
+
+def scan_log(path: Path, limit: int) -> Tuple[List[str], str, str]:
+    """
+    Return (changes_summary, stuck_on, next_step) for a log file.
+
+    The forward pass stops as soon as the summary and next step are settled;
+    in that case the last failure line is found with a reverse block read so
+    the rest of a large log is never touched.
+    """
+    scanner = LogScanner(limit)
+    complete = True
+    for line in iter_lines(path):
+        scanner.feed(line)
+        if scanner.done:
+            complete = False
+            break
+    stuck_on = scanner.stuck_on if complete else detect_stuck_on_file(path)
+    return scanner.summary_lines(), stuck_on, scanner.next_step
+
+
+LOG_STAMP_RE = re.compile(r"(20\d{6}-\d{6})")
+LOG_INDEX_FILE = REPO_ROOT / "ai" / "state" / "log_index.json"
+# Stamps kept per directory; older runs drop out of the index
+LOG_INDEX_MAX_STAMPS = 512
+
+
+def load_log_index(path: Path = LOG_INDEX_FILE) -> dict:
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_log_index(index: dict, path: Path = LOG_INDEX_FILE) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(index, indent=2, sort_keys=True))
+    os.replace(tmp_path, path)
+
+
+def index_log_name(entry: dict, name: str) -> bool:
+    """Add one log name under its stamp(s) and learn its name template; True if the entry changed."""
+    changed = False
+    stamps = set(LOG_STAMP_RE.findall(name))
+    for stamp in stamps:
+        names = entry["stamps"].setdefault(stamp, [])
+        if name not in names:
+            names.append(name)
+            names.sort()
+            changed = True
+    if len(stamps) == 1:
+        template = name.replace(stamps.pop(), "{stamp}")
+        if template not in entry["templates"]:
+            entry["templates"].append(template)
+            entry["templates"].sort()
+            changed = True
+    return changed
+
+
+def refresh_dir_index(directory: Path, index: dict, primary: str = "") -> Tuple[dict, bool]:
+    """
+    Return the stamp -> log names map for one directory, updating it in place.
+
+    The directory is listed once, when it has no entry yet. After that the
+    primary log is added from its own name, and siblings of its stamp are
+    found by probing the name templates seen so far (one stat each), so a
+    new run never relists the directory. Vanished logs are dropped lazily
+    when a lookup misses them (see gather_logs).
+    """
+    key = str(directory.resolve())
+    entry = index.get(key)
+    changed = False
+    if not isinstance(entry, dict) or "templates" not in entry:
+        entry = {"stamps": {}, "templates": []}
+        try:
+            with os.scandir(directory) as it:
+                for dirent in it:
+                    if dirent.name.endswith(".log") and not dirent.name.startswith("."):
+                        index_log_name(entry, dirent.name)
+        except OSError:
+            return {}, index.pop(key, None) is not None
+        changed = True
+    if primary:
+        changed |= index_log_name(entry, primary)
+        for stamp in set(LOG_STAMP_RE.findall(primary)):
+            for template in entry["templates"]:
+                name = template.replace("{stamp}", stamp)
+                if name not in entry["stamps"].get(stamp, []) and (directory / name).is_file():
+                    changed |= index_log_name(entry, name)
+    if len(entry["stamps"]) > LOG_INDEX_MAX_STAMPS:
+        for stamp in sorted(entry["stamps"])[:-LOG_INDEX_MAX_STAMPS]:
+            del entry["stamps"][stamp]
+        changed = True
+    index[key] = entry
+    return entry["stamps"], changed
+
+
+def gather_logs(primary: Path, index_path: Path = LOG_INDEX_FILE) -> List[str]:
     logs = [str(primary)]
-    stamp = None
-    m = re.search(r"(20\d{6}-\d{6})", primary.name)
-    if m:
-        stamp = m.group(1)
-    if stamp:
-        sibling_dir = primary.parent
-        for candidate in sorted(sibling_dir.glob(f"*{stamp}*.log")):
-            if candidate != primary and candidate.is_file():
-                logs.append(str(candidate))
+    m = LOG_STAMP_RE.search(primary.name)
+    if not m:
+        return logs
+    index = load_log_index(index_path)
+    stamps, changed = refresh_dir_index(primary.parent, index, primary.name)
+    names = stamps.get(m.group(1), [])
+    for name in list(names):
+        candidate = primary.parent / name
+        if not candidate.is_file():
+            names.remove(name)  # rotated or deleted since it was indexed
+            if not names:
+                stamps.pop(m.group(1), None)
+            changed = True
+        elif candidate != primary:
+            logs.append(str(candidate))
+    if changed:
+        save_log_index(index, index_path)
     return logs
 
 
@@ -174,24 +365,24 @@ class RunSummary:
     suggested_next_step: str = ""
     log_files: List[str] = field(default_factory=list)
 
+    def to_dict(self) -> dict:
+        return {
+            "run_id": self.run_id,
+            "target": self.target,
+            "component": self.component,
+            "stage": self.stage,
+            "status": self.status,
+            "tasks_attempted": self.tasks_attempted,
+            "tasks_completed": self.tasks_completed,
+            "backlog_snapshot": self.backlog_snapshot,
+            "changes_summary": self.changes_summary,
+            "stuck_on": self.stuck_on,
+            "suggested_next_step": self.suggested_next_step,
+            "log_files": self.log_files,
+        }
+
     def to_json(self) -> str:
-        return json.dumps(
-            {
-                "run_id": self.run_id,
-                "target": self.target,
-                "component": self.component,
-                "stage": self.stage,
-                "status": self.status,
-                "tasks_attempted": self.tasks_attempted,
-                "tasks_completed": self.tasks_completed,
-                "backlog_snapshot": self.backlog_snapshot,
-                "changes_summary": self.changes_summary,
-                "stuck_on": self.stuck_on,
-                "suggested_next_step": self.suggested_next_step,
-                "log_files": self.log_files,
-            },
-            indent=2,
-        )
+        return json.dumps(self.to_dict(), indent=2)
 
     def to_text(self) -> str:
         lines = [
@@ -246,7 +437,6 @@ def main() -> int:
         print(f"ERROR: log file not found: {log_file}", file=sys.stderr)
         return 1
 
-    log_lines = log_file.read_text(errors="ignore").splitlines()
     state = load_status(Path(args.status_file))
     status = determine_status(args.exit_code, state)
     stage = args.stage or state.get("stage") or "stage_1"
@@ -257,9 +447,8 @@ def main() -> int:
     if not tasks_completed and state.get("task") and status == "success":
         tasks_completed = [state["task"]]
     backlog_snapshot = parse_backlog(Path(args.backlog_file), args.summary_limit)
-    changes_summary = extract_summary_lines(log_lines, args.summary_limit)
-    stuck_on = detect_stuck_on(log_lines)
-    suggested_next_step = detect_next_step(log_lines) or ("Check log and rerun." if stuck_on else "")
+    changes_summary, stuck_on, next_step = scan_log(log_file, args.summary_limit)
+    suggested_next_step = next_step or ("Check log and rerun." if stuck_on else "")
     log_files = gather_logs(log_file)
 
     if status == "blocked_stage1":
@@ -291,6 +480,10 @@ def main() -> int:
     text_path = runs_dir / f"run-{run_label}.txt"
     json_path.write_text(summary.to_json())
     text_path.write_text(summary.to_text())
+    try:
+        record_run(summary.to_dict(), run_label, json_path)
+    except sqlite3.Error as exc:
+        print(f"WARN: run history not updated: {exc}", file=sys.stderr)
 
     if args.last_run_file:
         Path(args.last_run_file).write_text(summary.to_text())
@@ -1,12 +1,16 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
-import os
+import sys
 from pathlib import Path
 from typing import Any
 
 REPO_ROOT = Path(__file__).resolve().parents[3]
 BACKLOG_PATH = REPO_ROOT / "ai" / "backlog.yaml"
+sys.path.insert(0, str(REPO_ROOT / "ai" / "scripts"))
+
+from backlog_engine import BacklogIndex  # noqa: E402
+import yaml_io  # noqa: E402
 
 BASE_ENTRIES = [
     {
@@ -65,23 +69,18 @@ BASE_ENTRIES = [
 
 
 def yaml_safe_load() -> list[dict[str, Any]]:
-    import yaml
-
-    if not BACKLOG_PATH.exists():
-        return []
-    data = yaml.safe_load(BACKLOG_PATH.read_text() or "[]") or []
+    data = yaml_io.load(BACKLOG_PATH, [], cache=False)
     if not isinstance(data, list):
         return []
     return data
 
 
 def yaml_safe_dump(entries: list[dict[str, Any]]) -> None:
-    import yaml
+    yaml_io.dump(BACKLOG_PATH, entries)
+
 
-    tmp_path = BACKLOG_PATH.with_suffix(".tmp")
-    with open(tmp_path, "w", encoding="utf-8") as f:
-        yaml.safe_dump(entries, f, sort_keys=False)
-    os.replace(tmp_path, BACKLOG_PATH)
+def backlog_sort_key(entry: dict[str, Any]) -> tuple[int, str]:
+    return (int(entry.get("stage", 0)), str(entry.get("id", "")))
 
 
 def normalize(entry: dict[str, Any]) -> None:
@@ -96,28 +95,38 @@ def normalize(entry: dict[str, Any]) -> None:
         entry["status"] = "pending"
 
 
-def ensure_entry(entries: list[dict[str, Any]], payload: dict[str, Any]) -> bool:
-    for entry in entries:
-        if entry.get("id") == payload.get("id"):
-            return False
+def ensure_entry(index: BacklogIndex, payload: dict[str, Any]) -> bool:
+    if index.has(payload.get("id")):
+        return False
     entry = {**payload}
     normalize(entry)
-    entries.append(entry)
+    index.entries.append(entry)
+    index.by_id[entry["id"]] = entry
     return True
 
 
 def sync() -> None:
     backlog = yaml_safe_load()
-    changed = False
+    normalized = False
     for entry in backlog:
+        before = dict(entry)
         normalize(entry)
+        normalized = normalized or entry != before
+    index = BacklogIndex(backlog)
+    existing = len(index.entries)
     for template in BASE_ENTRIES:
-        if ensure_entry(backlog, template):
-            changed = True
-    if changed:
-        backlog.sort(key=lambda e: (int(e.get("stage", 0)), str(e.get("id", ""))))
+        ensure_entry(index, template)
+    added = index.entries[existing:]
+    if not added:
+        return
+    if normalized:
+        # Existing entries gained defaults too: rewrite the whole file in canonical order.
+        backlog.sort(key=backlog_sort_key)
         yaml_safe_dump(backlog)
-        print("SYNC: changed; ensured stage 1 backlog entries")
+    else:
+        # Only new entries: splice them in without re-emitting the rest of the file.
+        yaml_io.insert_entries(BACKLOG_PATH, added, sort_key=backlog_sort_key)
+    print("SYNC: changed; ensured stage 1 backlog entries")
 
 
 def main() -> None:
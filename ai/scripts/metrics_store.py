@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Failure-count metrics store: append-only counter log + compacted snapshot.
+
+Increments never rewrite shared JSON. Each one appends
+"<ts>\\t<counter>\\t<key>\\t<delta>" lines in a single O_APPEND write(2)
+(the kernel positions it at end of file, so concurrent loops cannot
+overwrite each other's lines) while holding a *shared* flock, so any number
+of loops can count at once. Reads take no lock at all: the value of a
+counter is the snapshot total plus the lines of the snapshot's current
+event log.
+
+Files (base = METRICS_FILE, e.g. ai/state/metrics.json):
+- base                    snapshot; keeps the legacy metrics.json fields
+                          (tasks_completed, failure_counts, failure_totals, ...)
+                          plus "counters", "recent" events and "events_file"
+- base.events.<token>     append-only log of increments since the snapshot
+- base.lock               shared for appends, exclusive for compaction
+
+Compaction (exclusive lock, automatic once the log passes COMPACT_BYTES)
+folds the log into the snapshot, keeps events younger than the retention
+window in "recent" for windowed queries, starts a fresh log and deletes the
+old one. A reader that races a compaction finds its log gone and retries.
+
+CLI:
+  metrics_store.py --file PATH incr COUNTER KEY [--delta N]   prints the new total
+  metrics_store.py --file PATH get COUNTER KEY
+  metrics_store.py --file PATH window COUNTER --hours N [--key K] [--json]
+  metrics_store.py --file PATH compact
+  metrics_store.py --file PATH dump
+"""
+
+from __future__ import annotations
+
+import argparse
+import fcntl
+import json
+import os
+import sys
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+# Counters mirrored to the top-level maps older metrics.json readers use.
+LEGACY_COUNTERS = ("failure_counts", "failure_totals")
+LEGACY_DEFAULTS = {"tasks_completed": 0, "tasks_failed": 0, "last_run": None, "failure_counts": {}, "failure_totals": {}}
+
+COMPACT_BYTES = int(os.environ.get("METRICS_COMPACT_BYTES", 64 * 1024))
+RETENTION_HOURS = float(os.environ.get("METRICS_RETENTION_HOURS", 7 * 24))
+READ_RETRIES = 5
+
+Event = Tuple[float, str, str, int]
+PathLike = Union[str, Path]
+
+
+def _clean(field: str) -> str:
+    """Counter/key names go into a tab-separated line."""
+    return field.replace("\t", " ").replace("\n", " ")
+
+
+def _parse_events(text: str) -> Iterable[Event]:
+    for line in text.splitlines():
+        parts = line.split("\t")
+        if len(parts) != 4:
+            continue  # torn tail of a crashed writer
+        try:
+            yield float(parts[0]), parts[1], parts[2], int(parts[3])
+        except ValueError:
+            continue
+
+
+class MetricsStore:
+    def __init__(self, path: PathLike, compact_bytes: int = COMPACT_BYTES,
+                 retention_hours: float = RETENTION_HOURS) -> None:
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.compact_bytes = compact_bytes
+        self.retention_seconds = retention_hours * 3600
+
+    # -- snapshot / log primitives ---------------------------------------------
+
+    def _snapshot(self) -> Dict[str, Any]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = {}
+        return data if isinstance(data, dict) else {}
+
+    def _events_path(self, snapshot: Dict[str, Any]) -> Optional[Path]:
+        name = snapshot.get("events_file")
+        return self.path.with_name(name) if name else None
+
+    def _lock(self, mode: int) -> int:
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(fd, mode)
+        return fd
+
+    @staticmethod
+    def _unlock(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    def _read_state(self) -> Tuple[Dict[str, Any], List[Event]]:
+        """Snapshot plus the events logged since it, without locking."""
+        for _ in range(READ_RETRIES):
+            snapshot = self._snapshot()
+            events_path = self._events_path(snapshot)
+            if events_path is None:
+                return snapshot, []
+            try:
+                text = events_path.read_text(encoding="utf-8")
+            except FileNotFoundError:
+                continue  # compacted between the two reads
+            return snapshot, list(_parse_events(text))
+        # Compactions kept winning the race: read under the lock instead.
+        fd = self._lock(fcntl.LOCK_SH)
+        try:
+            snapshot = self._snapshot()
+            events_path = self._events_path(snapshot)
+            text = events_path.read_text(encoding="utf-8") if events_path and events_path.exists() else ""
+            return snapshot, list(_parse_events(text))
+        finally:
+            self._unlock(fd)
+
+    # -- writes ---------------------------------------------------------------------
+
+    def increment(self, counter: str, key: str, delta: int = 1, ts: Optional[float] = None) -> None:
+        self.record([(counter, key, delta)], ts)
+
+    def record(self, increments: Iterable[Tuple[str, str, int]], ts: Optional[float] = None) -> None:
+        """Append several increments in one write, so they land together."""
+        stamp = f"{time.time() if ts is None else ts:.3f}"
+        line = "".join(f"{stamp}\t{_clean(counter)}\t{_clean(key)}\t{int(delta)}\n"
+                       for counter, key, delta in increments)
+        fd = self._lock(fcntl.LOCK_SH)
+        try:
+            events_path = self._events_path(self._snapshot())
+            if events_path is None:
+                # First use (or a legacy metrics.json): start a log under the exclusive lock.
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                events_path = self._events_path(self._compact_locked())
+            out = os.open(events_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(out, line.encode("utf-8"))
+            finally:
+                os.close(out)
+            oversized = os.path.getsize(events_path) > self.compact_bytes
+        finally:
+            self._unlock(fd)
+        if oversized:
+            self.compact(blocking=False)
+
+    def compact(self, blocking: bool = True) -> bool:
+        """Fold the event log into the snapshot; False if another process holds the lock."""
+        mode = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fd = self._lock(mode)
+        except BlockingIOError:
+            return False
+        try:
+            self._compact_locked()
+        finally:
+            self._unlock(fd)
+        return True
+
+    def _compact_locked(self, now: Optional[float] = None) -> Dict[str, Any]:
+        now = time.time() if now is None else now
+        snapshot = self._snapshot()
+        old_events = self._events_path(snapshot)
+        events: List[Event] = []
+        if old_events is not None and old_events.exists():
+            events = list(_parse_events(old_events.read_text(encoding="utf-8")))
+
+        counters = snapshot.get("counters")
+        if not isinstance(counters, dict):
+            # Adopt counts kept by the pre-store read-modify-write helpers.
+            counters = {name: dict(snapshot.get(name) or {}) for name in LEGACY_COUNTERS}
+        for _, counter, key, delta in events:
+            bucket = counters.setdefault(counter, {})
+            bucket[key] = bucket.get(key, 0) + delta
+
+        cutoff = now - self.retention_seconds
+        recent = [list(e) for e in snapshot.get("recent", []) if e and e[0] >= cutoff]
+        recent.extend(list(e) for e in events if e[0] >= cutoff)
+
+        new_events = self.path.with_name(f"{self.path.name}.events.{uuid.uuid4().hex[:12]}")
+        new_events.touch()
+        for field, default in LEGACY_DEFAULTS.items():
+            snapshot.setdefault(field, json.loads(json.dumps(default)))
+        for name in LEGACY_COUNTERS:
+            snapshot[name] = dict(counters.get(name, {}))
+        snapshot.update({
+            "counters": counters,
+            "recent": recent,
+            "events_file": new_events.name,
+            "compacted_at": now,
+        })
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(snapshot, indent=2) + "\n", encoding="utf-8")
+        os.replace(tmp, self.path)
+        if old_events is not None and old_events.exists():
+            old_events.unlink()
+        return snapshot
+
+    # -- queries ----------------------------------------------------------------------
+
+    def totals(self) -> Dict[str, Dict[str, int]]:
+        """Every counter's per-key totals."""
+        snapshot, events = self._read_state()
+        counters = snapshot.get("counters")
+        if not isinstance(counters, dict):
+            counters = {name: snapshot.get(name) or {} for name in LEGACY_COUNTERS}
+        result = {name: dict(values) for name, values in counters.items()}
+        for _, counter, key, delta in events:
+            bucket = result.setdefault(counter, {})
+            bucket[key] = bucket.get(key, 0) + delta
+        return result
+
+    def get(self, counter: str, key: str) -> int:
+        return self.totals().get(counter, {}).get(key, 0)
+
+    def window(self, counter: str, hours: float, key: Optional[str] = None,
+               now: Optional[float] = None) -> Dict[str, int]:
+        """Per-key sums of events in the last `hours` (bounded by the retention window)."""
+        snapshot, events = self._read_state()
+        cutoff = (time.time() if now is None else now) - hours * 3600
+        result: Dict[str, int] = defaultdict(int)
+        for ts, c, k, delta in [tuple(e) for e in snapshot.get("recent", [])] + events:
+            if c == counter and ts >= cutoff and (key is None or k == key):
+                result[k] += delta
+        return dict(result)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Append-only failure counter store.")
+    parser.add_argument("--file", default=os.environ.get("METRICS_FILE", "ai/state/metrics.json"),
+                        help="Snapshot path (default: $METRICS_FILE or ai/state/metrics.json).")
+    sub = parser.add_subparsers(dest="command", required=True)
+    incr = sub.add_parser("incr", help="Add to a counter and print its new total.")
+    incr.add_argument("counter")
+    incr.add_argument("key")
+    incr.add_argument("--delta", type=int, default=1)
+    get = sub.add_parser("get", help="Print a counter total.")
+    get.add_argument("counter")
+    get.add_argument("key")
+    window = sub.add_parser("window", help="Per-key sums over the last N hours.")
+    window.add_argument("counter")
+    window.add_argument("--hours", type=float, required=True)
+    window.add_argument("--key")
+    window.add_argument("--json", action="store_true")
+    sub.add_parser("compact", help="Fold the event log into the snapshot.")
+    sub.add_parser("dump", help="Print all counter totals as JSON.")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    store = MetricsStore(args.file)
+    if args.command == "incr":
+        store.increment(args.counter, args.key, args.delta)
+        print(store.get(args.counter, args.key))
+    elif args.command == "get":
+        print(store.get(args.counter, args.key))
+    elif args.command == "window":
+        counts = store.window(args.counter, args.hours, args.key)
+        if args.json:
+            print(json.dumps(counts, indent=2, sort_keys=True))
+        elif args.key is not None:
+            print(counts.get(args.key, 0))
+        else:
+            for key, count in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0])):
+                print(f"{count}\t{key}")
+    elif args.command == "compact":
+        store.compact()
+    else:
+        print(json.dumps(store.totals(), indent=2, sort_keys=True))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
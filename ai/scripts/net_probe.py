@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Network probes for drift-engine claims (http_ok, tcp_reachable), standard
+library only.
+
+- HTTP: a small asyncio HTTP/1.1 client. Connections are kept alive and
+  pooled per (scheme, host, port), at most PER_HOST_CONNECTIONS at a time;
+  a global semaphore caps requests in flight. Every request has its own
+  timeout (connect + response) and reports its latency, so dozens of
+  endpoint checks finish in about one round trip instead of running as
+  serial curl calls.
+- Bodies are read up to BODY_LIMIT bytes for pattern checks; a connection
+  whose body was cut short is closed instead of returned to the pool.
+- A request that fails on a reused keep-alive connection before any
+  response bytes arrive (the server closed it while idle) is retried once
+  on a fresh connection.
+- TCP: plain connects, all at once under a global cap (TCP_CONCURRENCY);
+  a port is reachable when the handshake completes within the timeout.
+  probe() runs HTTP and TCP probes in one event loop, so a pass with both
+  kinds still waits at most one timeout window.
+
+CLI:
+  net_probe.py http URL [URL ...] [--timeout S] [--concurrency N]         JSON line per URL
+  net_probe.py tcp HOST:PORT [HOST:PORT ...] [--timeout S] [--concurrency N]   JSON line per port
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import ssl
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+def _env_int(name: str, default: int) -> int:
+    """Positive DRIFT_* limit from the environment; anything else uses the default."""
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        value = 0
+    if value < 1:
+        print(f"net_probe: ignoring {name}={raw!r}; using {default}", file=sys.stderr)
+        return default
+    return value
+
+
+CONCURRENCY = _env_int("DRIFT_HTTP_CONCURRENCY", 32)
+PER_HOST_CONNECTIONS = _env_int("DRIFT_HTTP_PER_HOST", 4)
+TCP_CONCURRENCY = _env_int("DRIFT_TCP_CONCURRENCY", 64)
+BODY_LIMIT = 1024 * 1024
+# Homelab services often use self-signed certificates; set to 0 to skip verification.
+VERIFY_TLS = os.environ.get("DRIFT_HTTP_VERIFY_TLS", "1") != "0"
+USER_AGENT = "homelab-drift-engine"
+
+Key = Tuple[str, float]  # (url, timeout seconds)
+TcpKey = Tuple[str, int, float]  # (host, port, timeout seconds)
+
+
+@dataclass
+class HttpResult:
+    url: str
+    status: Optional[int] = None
+    latency_ms: float = 0.0
+    error: Optional[str] = None
+    reused: bool = False
+    body: bytes = field(default=b"", repr=False)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data.pop("body")
+        return data
+
+
+@dataclass
+class TcpResult:
+    host: str
+    port: int
+    latency_ms: float = 0.0
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class StaleConnection(Exception):
+    """A pooled connection was closed by the server before it answered."""
+
+
+def status_matches(status: int, expected: Optional[str] = None) -> bool:
+    """expected: "200", "2xx", "200-299" or a comma list of those; default any 2xx/3xx."""
+    if expected is None or str(expected).strip() == "":
+        return 200 <= status < 400
+    for part in str(expected).split(","):
+        part = part.strip().lower()
+        if part.endswith("xx") and part[:-2].isdigit():
+            if status // 100 == int(part[:-2]):
+                return True
+        elif "-" in part:
+            low, _, high = part.partition("-")
+            if low.strip().isdigit() and high.strip().isdigit() and int(low) <= status <= int(high):
+                return True
+        elif part.isdigit() and status == int(part):
+            return True
+    return False
+
+
+class HostPool:
+    """Idle keep-alive connections and a connection cap per (scheme, host, port)."""
+
+    def __init__(self, per_host: int = PER_HOST_CONNECTIONS) -> None:
+        self.per_host = per_host
+        self._idle: Dict[Tuple[str, str, int], List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]]] = {}
+        self._slots: Dict[Tuple[str, str, int], asyncio.Semaphore] = {}
+        self._ssl: Optional[ssl.SSLContext] = None
+
+    def slot(self, origin: Tuple[str, str, int]) -> asyncio.Semaphore:
+        if origin not in self._slots:
+            self._slots[origin] = asyncio.Semaphore(self.per_host)
+        return self._slots[origin]
+
+    def _tls(self) -> ssl.SSLContext:
+        if self._ssl is None:
+            self._ssl = ssl.create_default_context()
+            if not VERIFY_TLS:
+                self._ssl.check_hostname = False
+                self._ssl.verify_mode = ssl.CERT_NONE
+        return self._ssl
+
+    async def connect(self, origin: Tuple[str, str, int]):
+        """(reader, writer, reused) — an idle pooled connection when one is usable."""
+        idle = self._idle.get(origin, [])
+        while idle:
+            reader, writer = idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+        scheme, host, port = origin
+        reader, writer = await asyncio.open_connection(
+            host, port, ssl=self._tls() if scheme == "https" else None,
+            server_hostname=host if scheme == "https" else None)
+        return reader, writer, False
+
+    def release(self, origin: Tuple[str, str, int], reader, writer) -> None:
+        self._idle.setdefault(origin, []).append((reader, writer))
+
+    async def close(self) -> None:
+        writers = [writer for idle in self._idle.values() for _, writer in idle]
+        self._idle.clear()
+        for writer in writers:
+            writer.close()
+        for writer in writers:
+            try:
+                await writer.wait_closed()
+            except (OSError, ssl.SSLError):
+                pass
+
+
+async def _read_body(reader: asyncio.StreamReader, headers: Dict[str, str]) -> Tuple[bytes, bool]:
+    """(body up to BODY_LIMIT, complete?) — an incomplete body leaves the connection unusable."""
+    if headers.get("transfer-encoding", "").lower().endswith("chunked"):
+        chunks, size = [], 0
+        while True:
+            line = await reader.readline()
+            length = int(line.split(b";", 1)[0].strip() or b"0", 16)
+            if length == 0:
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass  # trailers
+                return b"".join(chunks), True
+            if size + length > BODY_LIMIT:
+                return b"".join(chunks), False
+            chunks.append(await reader.readexactly(length))
+            size += length
+            await reader.readline()
+    if "content-length" in headers:
+        length = int(headers["content-length"])
+        if length > BODY_LIMIT:
+            return await reader.readexactly(BODY_LIMIT), False
+        return await reader.readexactly(length), True
+    # Delimited by connection close: read() returns one segment at a time
+    chunks, size = [], 0
+    while size < BODY_LIMIT:
+        chunk = await reader.read(BODY_LIMIT - size)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size += len(chunk)
+    return b"".join(chunks), False
+
+
+async def _exchange(pool: HostPool, origin, request: bytes, head_only: bool) -> Tuple[int, bytes, bool]:
+    reader, writer, reused = await pool.connect(origin)
+    keep = False
+    try:
+        writer.write(request)
+        await writer.drain()
+        while True:
+            status_line = await reader.readline()
+            if not status_line:
+                if reused:
+                    raise StaleConnection()
+                raise ConnectionError("connection closed without a response")
+            version, _, rest = status_line.decode("latin-1").strip().partition(" ")
+            status = int(rest.split(" ", 1)[0])
+            headers: Dict[str, str] = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            if not 100 <= status < 200:
+                break  # skip interim (1xx) responses
+        if head_only or status in (204, 304):
+            body, complete = b"", True
+        else:
+            body, complete = await _read_body(reader, headers)
+        connection = headers.get("connection", "").lower()
+        keep = complete and connection != "close" and (version != "HTTP/1.0" or connection == "keep-alive")
+        return status, body, reused
+    except (ConnectionError, asyncio.IncompleteReadError) as e:
+        if reused and not isinstance(e, StaleConnection):
+            raise StaleConnection() from e
+        raise
+    finally:
+        if keep:
+            pool.release(origin, reader, writer)
+        else:
+            writer.close()
+
+
+async def http_get(pool: HostPool, url: str, timeout: float, method: str = "GET") -> HttpResult:
+    result = HttpResult(url=url)
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        result.error = f"unsupported URL: {url}"
+        return result
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    origin = (parts.scheme, parts.hostname, port)
+    target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+    host = parts.netloc.rpartition("@")[2]
+    request = (f"{method} {target} HTTP/1.1\r\nHost: {host}\r\nUser-Agent: {USER_AGENT}\r\n"
+               f"Accept: */*\r\nConnection: keep-alive\r\n\r\n").encode("latin-1")
+    async with pool.slot(origin):
+        started = time.perf_counter()
+        try:
+            try:
+                status, body, reused = await asyncio.wait_for(
+                    _exchange(pool, origin, request, method == "HEAD"), timeout)
+            except StaleConnection:
+                status, body, reused = await asyncio.wait_for(
+                    _exchange(pool, origin, request, method == "HEAD"), timeout)
+            result.status, result.body, result.reused = status, body, reused
+        except asyncio.TimeoutError:
+            result.error = f"timed out after {timeout:g}s"
+        except (OSError, ssl.SSLError, ValueError, StaleConnection, asyncio.IncompleteReadError) as e:
+            result.error = f"{type(e).__name__}: {e}"[:200]
+        result.latency_ms = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+async def tcp_connect(host: str, port: int, timeout: float) -> TcpResult:
+    result = TcpResult(host=host, port=port)
+    started = time.perf_counter()
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        result.latency_ms = round((time.perf_counter() - started) * 1000, 1)
+        writer.close()
+    except asyncio.TimeoutError:
+        result.error = f"timed out after {timeout:g}s"
+    except ConnectionRefusedError:
+        result.error = "refused"
+    except OSError as e:
+        # asyncio folds the errno into a "Connect call failed" message; report the errno's text
+        errno_text = os.strerror(e.errno) if e.errno and e.errno > 0 else None
+        result.error = (errno_text or e.strerror or type(e).__name__)[:200]
+    if result.error:
+        result.latency_ms = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+async def _probe(http_keys: List[Key], tcp_keys: List[TcpKey], concurrency: int,
+                 tcp_concurrency: int) -> Tuple[Dict[Key, HttpResult], Dict[TcpKey, TcpResult]]:
+    pool = HostPool()
+    http_gate = asyncio.Semaphore(max(1, concurrency))
+    tcp_gate = asyncio.Semaphore(max(1, tcp_concurrency))
+
+    async def http_one(key: Key) -> HttpResult:
+        async with http_gate:
+            return await http_get(pool, key[0], key[1])
+
+    async def tcp_one(key: TcpKey) -> TcpResult:
+        async with tcp_gate:
+            return await tcp_connect(*key)
+
+    try:
+        results = await asyncio.gather(*(http_one(key) for key in http_keys),
+                                       *(tcp_one(key) for key in tcp_keys))
+    finally:
+        await pool.close()
+    return dict(zip(http_keys, results)), dict(zip(tcp_keys, results[len(http_keys):]))
+
+
+def probe(http_keys: Iterable[Key] = (), tcp_keys: Iterable[TcpKey] = (), concurrency: int = CONCURRENCY,
+          tcp_concurrency: int = TCP_CONCURRENCY) -> Tuple[Dict[Key, HttpResult], Dict[TcpKey, TcpResult]]:
+    """Run HTTP and TCP probes concurrently in one event loop; duplicate keys are probed once."""
+    http_keys, tcp_keys = list(dict.fromkeys(http_keys)), list(dict.fromkeys(tcp_keys))
+    if not http_keys and not tcp_keys:
+        return {}, {}
+    return asyncio.run(_probe(http_keys, tcp_keys, concurrency, tcp_concurrency))
+
+
+def probe_http(keys: Iterable[Key], concurrency: int = CONCURRENCY) -> Dict[Key, HttpResult]:
+    """GET every (url, timeout) concurrently over pooled connections."""
+    return probe(http_keys=keys, concurrency=concurrency)[0]
+
+
+def probe_tcp(keys: Iterable[TcpKey], concurrency: int = TCP_CONCURRENCY) -> Dict[TcpKey, TcpResult]:
+    """Connect to every (host, port, timeout) concurrently."""
+    return probe(tcp_keys=keys, tcp_concurrency=concurrency)[1]
+
+
+def split_host_port(value: str) -> Tuple[str, Optional[int]]:
+    """"host", "host:22", "[fd00::1]:22" -> (host, port or None)."""
+    value = value.strip()
+    if value.startswith("["):
+        host, _, rest = value[1:].partition("]")
+        return host, int(rest[1:]) if rest.startswith(":") and rest[1:].isdigit() else None
+    host, sep, port = value.rpartition(":")
+    if sep and port.isdigit() and ":" not in host:
+        return host, int(port)
+    return value, None
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Network probes for drift-engine claims.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    http = sub.add_parser("http", help="GET URLs concurrently; one JSON line per URL.")
+    http.add_argument("urls", nargs="+")
+    http.add_argument("--timeout", type=float, default=10.0)
+    http.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    tcp = sub.add_parser("tcp", help="Connect to HOST:PORT targets concurrently; one JSON line per target.")
+    tcp.add_argument("targets", nargs="+")
+    tcp.add_argument("--timeout", type=float, default=3.0)
+    tcp.add_argument("--concurrency", type=int, default=TCP_CONCURRENCY)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.command == "http":
+        keys = [(url, args.timeout) for url in args.urls]
+        results = probe_http(keys, args.concurrency)
+    else:
+        keys = []
+        for target in args.targets:
+            host, port = split_host_port(target)
+            if port is None:
+                print(f"net_probe: {target}: expected HOST:PORT", file=sys.stderr)
+                return 2
+            keys.append((host, port, args.timeout))
+        results = probe_tcp(keys, args.concurrency)
+    failed = False
+    for key in keys:
+        result = results[key]
+        failed = failed or result.error is not None
+        print(json.dumps(result.to_dict()))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
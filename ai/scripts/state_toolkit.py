@@ -0,0 +1,704 @@
+#!/usr/bin/env python3
+"""
+Orchestrator state toolkit: the JSON/YAML state helpers that bootstrap_loop.sh,
+util_metrics.sh, util_yaml.sh and util_tasks.sh used to carry as inline
+`python3 - <<'PY'` snippets, as plain functions behind one CLI.
+
+State files:
+- ai/state/errors.json          per stage_errorhash counters (attempts, api_calls, api_outcomes, ...)
+- ai/state/stage_status.json    stage -> idle|running|green|failed|give_up
+- ai/state/give_up.json         give-up entries per stage
+- ai/state/status.json          orchestrator_status / safe mode reason
+- ai/state/safe_mode_summary.json
+- ai/state/router_state.json    sticky episode routes
+- METRICS_FILE                  failure counters (append-only store, see metrics_store.py)
+- ai/backlog.yaml               task writes (patch-style via yaml_io)
+
+Every read-modify-write holds an flock on "<file>.lock" and replaces the file
+atomically, so concurrent loops no longer lose updates. Paths are passed
+explicitly, in the same argument order the old heredocs used. When
+METRICS_FILE is set, the per-converge errors.json counters (provider
+failures, API outcomes, patch failures) are also appended to the metrics
+store so they can be queried over time windows after errors.json is reset.
+
+CLI:
+  state_toolkit.py OP ARGS...                    one op; output and exit code as the old helper
+  state_toolkit.py OP ARGS... :: OP ARGS... ...  several ops in one process, run in order,
+                                                 stopping at the first failure; every query op
+                                                 prints one line, except give-up-info (two:
+                                                 next_action, log_path)
+  state_toolkit.py json-get JSON FIELD[=DEFAULT]...  fields of a JSON document (JSON "-" reads
+                                                 stdin), one line each; dotted paths reach
+                                                 nested keys
+  state_toolkit.py batch                         one op per stdin line -> one JSON result per line
+  state_toolkit.py list                          available ops
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import shlex
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import yaml_io
+from metrics_store import MetricsStore
+
+ERROR_ENTRY_DEFAULTS = {
+    "attempts": 0,
+    "api_calls": 0,
+    "last_source": "none",
+    "last_transition": "",
+    "api_outcomes": [],
+    "no_effect_count": 0,
+    "no_new_evidence_count": 0,
+    "patch_failures": 0,
+    "provider_failures": {},
+}
+# errors.json fields that are also counted in the metrics store (counter name = field)
+STORED_ERROR_COUNTERS = {"patch_failures"}
+
+# v7.2 task state machine (mirrors the table in util_tasks.sh)
+TASK_STATUSES = {"pending", "running", "waiting_retry", "review", "blocked", "success", "failed", "escalated", "completed"}
+RESERVED_TASK_STATUSES = {"waiting_retry", "escalated"}
+TASK_TRANSITIONS = {
+    ("pending", "running"),
+    ("running", "success"),
+    ("running", "failed"),
+    ("running", "review"),
+    ("running", "blocked"),
+    ("failed", "pending"),
+    ("failed", "blocked"),
+    ("review", "success"),
+    ("review", "failed"),
+}
+GIVE_UP_RESET_COOLDOWN = 300
+# max_args of ops that take any number of trailing arguments
+VARIADIC = sys.maxsize
+
+
+class OpFailed(Exception):
+    """Non-zero exit of an op, with the stdout text the shell helper printed."""
+
+    def __init__(self, code: int = 1, output: Optional[str] = None) -> None:
+        super().__init__(output or "")
+        self.code = code
+        self.output = output
+
+
+class UsageError(OpFailed):
+    """Unknown op or wrong argument count (reported on stderr, exit 2)."""
+
+    def __init__(self, message: str) -> None:
+        super().__init__(2, message)
+
+
+# ============================================================================
+# File primitives
+# ============================================================================
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+@contextmanager
+def locked(path: str) -> Iterator[None]:
+    """Exclusive advisory lock on "<path>.lock" (shared with parallel_dispatch for the backlog)."""
+    lock_path = f"{path}.lock"
+    parent = os.path.dirname(lock_path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    with open(lock_path, "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def load_json(path: str, issues_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Read a JSON object; missing or unreadable files are {}.
+
+    With issues_path, a corrupted file is moved aside to
+    <path>.corrupted.<timestamp> and a warning is appended to the issues log.
+    """
+    try:
+        with open(path) as fh:
+            data = json.load(fh)
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError:
+        if issues_path is not None:
+            now = utc_now()
+            corrupt_path = f"{path}.corrupted.{now:%Y%m%d-%H%M%SZ}"
+            os.rename(path, corrupt_path)
+            parent = os.path.dirname(issues_path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            with open(issues_path, "a") as fh:
+                fh.write(f"[{now:%Y-%m-%dT%H:%M:%SZ}] WARNING: Corrupted JSON moved to {corrupt_path}\n")
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def write_json(path: str, data: Any) -> None:
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as fh:
+        fh.write(json.dumps(data, indent=2) + "\n")
+    os.replace(tmp, path)
+
+
+def update_json(path: str, mutate: Callable[[Dict[str, Any]], Any], issues_path: Optional[str] = None) -> Any:
+    """Locked read-modify-write; mutate returns the op's output."""
+    with locked(path):
+        data = load_json(path, issues_path)
+        result = mutate(data)
+        write_json(path, data)
+    return result
+
+
+def error_entry(data: Dict[str, Any], key: str) -> Dict[str, Any]:
+    return data.setdefault(key, json.loads(json.dumps(ERROR_ENTRY_DEFAULTS)))
+
+
+def scalar(value: Any) -> str:
+    return json.dumps(value) if isinstance(value, (dict, list)) else str(value)
+
+
+def record_metric(counter: str, key: str, delta: int = 1) -> None:
+    """Mirror an errors.json counter bump into the metrics store ($METRICS_FILE)."""
+    metrics_file = os.environ.get("METRICS_FILE")
+    if metrics_file:
+        MetricsStore(metrics_file).increment(counter, key, delta)
+
+
+# ============================================================================
+# Ops
+# ============================================================================
+
+OPS: Dict[str, Tuple[Callable[..., Optional[str]], int, int]] = {}
+
+
+def op(name: str, min_args: int, max_args: Optional[int] = None) -> Callable:
+    def register(func: Callable[..., Optional[str]]) -> Callable[..., Optional[str]]:
+        OPS[name] = (func, min_args, max_args if max_args is not None else min_args)
+        return func
+    return register
+
+
+# -- errors.json --------------------------------------------------------------
+
+@op("errors-get", 3, 4)
+def errors_get(path: str, key: str, field: str, default: str = "0") -> str:
+    """One field of an error entry (dicts/lists as JSON); default when absent."""
+    try:
+        with open(path) as fh:
+            entry = json.load(fh).get(key)
+    except Exception:
+        return default
+    if not entry or field not in entry:
+        return default
+    return scalar(entry[field])
+
+
+@op("errors-increment", 3, 5)
+def errors_increment(path: str, key: str, field: str, delta: str = "1", issues_path: str = "ai/issues.yaml") -> None:
+    def mutate(data: Dict[str, Any]) -> None:
+        entry = error_entry(data, key)
+        entry[field] = entry.get(field, 0) + int(delta)
+    update_json(path, mutate, issues_path)
+    if field in STORED_ERROR_COUNTERS:
+        record_metric(field, key, int(delta))
+
+
+@op("errors-set", 4, 5)
+def errors_set(path: str, key: str, field: str, value: str, issues_path: str = "ai/issues.yaml") -> None:
+    def mutate(data: Dict[str, Any]) -> None:
+        entry = error_entry(data, key)
+        try:
+            entry[field] = int(value)
+        except ValueError:
+            entry[field] = value
+    update_json(path, mutate, issues_path)
+
+
+@op("errors-provider-failure", 3, 4)
+def errors_provider_failure(path: str, key: str, provider: str, issues_path: str = "ai/issues.yaml") -> None:
+    def mutate(data: Dict[str, Any]) -> None:
+        failures = error_entry(data, key).setdefault("provider_failures", {})
+        failures[provider] = failures.get(provider, 0) + 1
+    update_json(path, mutate, issues_path)
+    record_metric("provider_failures", provider)
+
+
+@op("errors-add-api-outcome", 3, 4)
+def errors_add_api_outcome(path: str, key: str, outcome: str, issues_path: str = "ai/issues.yaml") -> None:
+    def mutate(data: Dict[str, Any]) -> None:
+        entry = error_entry(data, key)
+        entry.setdefault("api_outcomes", [])
+        entry.setdefault("provider_failures", {})
+        entry.setdefault("no_effect_count", 0)
+        if outcome == "no_effect":
+            entry["no_effect_count"] = entry.get("no_effect_count", 0) + 1
+        entry["api_outcomes"].append(outcome)
+    update_json(path, mutate, issues_path)
+    record_metric("api_outcomes", outcome)
+
+
+@op("errors-api-outcome-count", 3)
+def errors_api_outcome_count(path: str, key: str, outcome: str) -> str:
+    try:
+        with open(path) as fh:
+            return str(json.load(fh).get(key, {}).get("api_outcomes", []).count(outcome))
+    except Exception:
+        return "0"
+
+
+@op("errors-latest-api-outcome", 2)
+def errors_latest_api_outcome(path: str, key: str) -> str:
+    try:
+        with open(path) as fh:
+            outcomes = json.load(fh).get(key, {}).get("api_outcomes", [])
+    except Exception:
+        return ""
+    return str(outcomes[-1]) if outcomes else ""
+
+
+@op("errors-update", 6, 7)
+def errors_update(path: str, key: str, source: str, ts: str, increment_api: str, increment_attempts: str,
+                  issues_path: str = "ai/issues.yaml") -> None:
+    """Record a failure observation: last source/transition, optional attempt and API-call bumps."""
+    def mutate(data: Dict[str, Any]) -> None:
+        entry = error_entry(data, key)
+        entry.setdefault("api_outcomes", [])
+        entry.setdefault("provider_failures", {})
+        attempts = entry.get("attempts", 0)
+        if increment_attempts == "true":
+            attempts += 1
+        entry["attempts"] = attempts
+        entry["last_source"] = source
+        entry["last_transition"] = ts
+        if increment_api == "true":
+            entry["api_calls"] = entry.get("api_calls", 0) + 1
+    update_json(path, mutate, issues_path)
+
+
+@op("errors-reset", 3, 4)
+def errors_reset(path: str, key: str, ts: str, issues_path: str = "ai/issues.yaml") -> None:
+    def mutate(data: Dict[str, Any]) -> None:
+        entry = error_entry(data, key)
+        entry.update({
+            "attempts": 0,
+            "api_calls": 0,
+            "last_source": "none",
+            "last_transition": ts,
+            "no_effect_count": 0,
+            "no_new_evidence_count": 0,
+            "patch_failures": 0,
+            "provider_failures": {},
+        })
+    update_json(path, mutate, issues_path)
+
+
+@op("errors-clear-stage", 2, 3)
+def errors_clear_stage(path: str, stage: str, issues_path: str = "ai/issues.yaml") -> None:
+    def mutate(data: Dict[str, Any]) -> None:
+        for key in [k for k in data if k.startswith(stage + "_")]:
+            del data[key]
+    update_json(path, mutate, issues_path)
+
+
+# -- stage_status.json --------------------------------------------------------
+
+@op("stage-status-get", 2)
+def stage_status_get(path: str, stage: str) -> str:
+    try:
+        with open(path) as fh:
+            return str(json.load(fh).get(stage, "idle"))
+    except Exception:
+        return "idle"
+
+
+@op("stage-status-set", 3, 4)
+def stage_status_set(path: str, stage: str, status: str, issues_path: str = "ai/issues.yaml") -> None:
+    update_json(path, lambda data: data.__setitem__(stage, status), issues_path)
+
+
+# -- give_up.json -------------------------------------------------------------
+
+@op("give-up-record", 2, 7)
+def give_up_record(path: str, stage: str, command: str = "", log_path: str = "", next_action: str = "",
+                   probe_summary: str = "", evidence_json: str = "") -> None:
+    """Store a give-up entry enriched with the drift engine evidence capsule."""
+    try:
+        evidence = json.loads(evidence_json) if evidence_json else {}
+    except json.JSONDecodeError:
+        evidence = {}
+    if not isinstance(evidence, dict):
+        evidence = {}
+    entry = {
+        "stage": stage,
+        "timestamp": utc_now().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "last_command": command,
+        "log_path": evidence.get("log_path", log_path) or log_path or "unknown",
+        "next_action": evidence.get("suggested_next_action", next_action) or next_action or "Review logs",
+        "probe_summary": probe_summary,
+        "failing_claim_id": evidence.get("failing_claim_id"),
+        "failing_claim_evidence": evidence.get("failing_claim_evidence"),
+        "evidence_excerpt": (evidence.get("evidence_excerpt") or "")[:500],
+        "gating_status": evidence.get("gating_status", {}),
+    }
+    update_json(path, lambda data: data.__setitem__(stage, entry))
+
+
+@op("give-up-clear", 2)
+def give_up_clear(path: str, stage: str) -> None:
+    if os.path.exists(path):
+        update_json(path, lambda data: data.pop(stage, None))
+
+
+@op("give-up-info", 2)
+def give_up_info(path: str, stage: str) -> str:
+    """next_action and log_path lines; exit 1 when the stage has no entry."""
+    try:
+        with open(path) as fh:
+            entry = json.load(fh).get(stage)
+    except (OSError, json.JSONDecodeError):
+        raise OpFailed(1)
+    if not entry:
+        raise OpFailed(1)
+    return f"{entry.get('next_action', '')}\n{entry.get('log_path', '')}"
+
+
+@op("give-up-reset", 2, 3)
+def give_up_reset(path: str, stage: str, force: str = "false") -> str:
+    """Clear a stage's give-up entry unless it is younger than the cooldown (exit 2) or absent (exit 1)."""
+    with locked(path):
+        data = load_json(path)
+        entry = data.get(stage)
+        if not entry:
+            raise OpFailed(1, f"No give_up entry for stage {stage}")
+        age = 1e9
+        ts = entry.get("timestamp")
+        if ts:
+            try:
+                last = datetime.fromisoformat(ts[:-1] + "+00:00" if ts.endswith("Z") else ts)
+                if last.tzinfo is None:
+                    last = last.replace(tzinfo=timezone.utc)
+                age = (utc_now() - last).total_seconds()
+            except ValueError:
+                age = 1e9
+        if age < GIVE_UP_RESET_COOLDOWN and force != "true":
+            raise OpFailed(2, f"Cannot reset {stage}: give_up recorded {int(age)}s ago. Use --force to override.")
+        data.pop(stage, None)
+        write_json(path, data)
+    return f"Give-up entry for stage {stage} cleared."
+
+
+# -- status.json / safe mode ----------------------------------------------------
+
+@op("orchestrator-status", 4)
+def orchestrator_status(path: str, status_value: str, reason: str, ts: str) -> None:
+    def mutate(data: Dict[str, Any]) -> None:
+        data["orchestrator_status"] = status_value
+        data["safe_mode_reason"] = reason
+        data["safe_mode_timestamp"] = ts
+    update_json(path, mutate)
+
+
+@op("safe-mode-summary", 6)
+def safe_mode_summary(path: str, stage: str, error_key: str, reason: str, executor_health: str, ts: str) -> None:
+    try:
+        executor_state = json.loads(executor_health)
+    except json.JSONDecodeError:
+        executor_state = executor_health
+    write_json(path, {
+        "mode": "safe",
+        "entered_at": ts,
+        "stage": stage,
+        "error_key": error_key,
+        "reason": reason,
+        "executor_health": executor_state,
+    })
+
+
+# -- router state ---------------------------------------------------------------
+
+@op("router-break-sticky", 3)
+def router_break_sticky(path: str, role: str, key: str) -> None:
+    """Drop the sticky provider route of a role for one error key."""
+    with locked(path):
+        try:
+            with open(path) as fh:
+                data = json.load(fh)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        episode_routes = data.get("episode_routes", {})
+        episode = episode_routes.get(key, {})
+        if not episode or role not in episode:
+            return
+        episode.pop(role, None)
+        if episode:
+            episode_routes[key] = episode
+        else:
+            episode_routes.pop(key, None)
+        data["episode_routes"] = episode_routes
+        write_json(path, data)
+
+
+@op("router-executors-unhealthy", 2)
+def router_executors_unhealthy(config_path: str, state_path: str) -> str:
+    """'true' when no executor provider in priority order is healthy/degraded with a closed circuit."""
+    try:
+        with open(config_path) as fh:
+            config = json.load(fh)
+    except (json.JSONDecodeError, FileNotFoundError):
+        return "false"
+    try:
+        with open(state_path) as fh:
+            state = json.load(fh)
+    except (json.JSONDecodeError, FileNotFoundError):
+        state = {}
+    providers = state.get("providers", {})
+    for candidate in config.get("roles", {}).get("executor", {}).get("priority", []):
+        entry = providers.get(candidate, {})
+        if entry.get("health", "healthy") in ("healthy", "degraded") and entry.get("circuit_state", "closed") != "open":
+            return "false"
+    return "true"
+
+
+# -- misc loop state ------------------------------------------------------------
+
+@op("lock-age", 1)
+def lock_age(started: str) -> str:
+    """Seconds since a %Y-%m-%dT%H:%M:%SZ timestamp (0 when unparseable)."""
+    try:
+        then = datetime.strptime(started.strip(), "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return "0"
+    return str(max(0, int((utc_now() - then).total_seconds())))
+
+
+@op("drift-actionable", 1)
+def drift_actionable(status_json: str) -> str:
+    """"<rc>:<blocked>:<deferred>" for drift status JSON; rc 0 when no FAIL claim is actionable."""
+    claims = json.loads(status_json).get("claims", [])
+    now = utc_now()
+    fail_claims = [c for c in claims if c.get("status") == "FAIL"]
+    if not fail_claims:
+        return "0:0:0"
+    blocked = deferred = 0
+    for claim in fail_claims:
+        if claim.get("status") == "BLOCKED":
+            blocked += 1
+            continue
+        defer_until = claim.get("defer_until")
+        if defer_until:
+            try:
+                if datetime.fromisoformat(defer_until) > now:
+                    deferred += 1
+                    continue
+            except ValueError:
+                pass
+    actionable = len(fail_claims) - blocked - deferred
+    return f"{0 if actionable == 0 else 1}:{blocked}:{deferred}"
+
+
+@op("json-get", 2, VARIADIC)
+def json_get(document: str, *fields: str) -> str:
+    """
+    Several fields of one JSON document in one process, one line per field
+    in argument order. FIELD is a dotted path with an optional "=DEFAULT"
+    (empty when absent); unparseable input yields the defaults. Newlines in
+    values are folded to spaces so every field stays on its own line.
+    """
+    try:
+        data = json.loads(sys.stdin.read() if document == "-" else document)
+    except json.JSONDecodeError:
+        data = None
+    lines = []
+    for field in fields:
+        path, _, default = field.partition("=")
+        value: Any = data
+        for part in path.split("."):
+            value = value.get(part) if isinstance(value, dict) else None
+        lines.append(default if value is None else scalar(value).replace("\n", " "))
+    return "\n".join(lines)
+
+
+# -- metrics ----------------------------------------------------------------------
+
+@op("metrics-increment-failure", 3)
+def metrics_increment_failure(path: str, task_id: str, error_hash: str) -> str:
+    """Count a failure per task:hash and per task; prints the new per-hash count."""
+    store = MetricsStore(path)
+    key = f"{task_id}:{error_hash}"
+    store.record([("failure_counts", key, 1), ("failure_totals", task_id, 1)])
+    return str(store.get("failure_counts", key))
+
+
+@op("metrics-total-failures", 2)
+def metrics_total_failures(path: str, task_id: str) -> str:
+    return str(MetricsStore(path).get("failure_totals", task_id))
+
+
+@op("metrics-window", 3, 4)
+def metrics_window(path: str, counter: str, hours: str, key: str = "") -> str:
+    """Events of a counter in the last N hours: one key's count, or the per-key map as JSON."""
+    counts = MetricsStore(path).window(counter, float(hours), key or None)
+    return str(counts.get(key, 0)) if key else json.dumps(counts, sort_keys=True)
+
+
+# -- backlog writes -------------------------------------------------------------------
+
+@op("task-update", 3)
+def task_update(path: str, task_id: str, patch_json: str) -> None:
+    """Merge a JSON patch into one task; status changes must go through task-set-status."""
+    patch = json.loads(patch_json)
+    if isinstance(patch, dict) and "status" in patch:
+        sys.stderr.write("Refusing to set status via yaml_update_task; use set_task_status (v7.2 state machine)\n")
+        raise OpFailed(2)
+    with locked(path):
+        if yaml_io.update_entry(path, task_id, patch) is None:
+            raise OpFailed(1)
+
+
+@op("task-increment-attempts", 2)
+def task_increment_attempts(path: str, task_id: str) -> None:
+    def bump(entry: Dict[str, Any]) -> None:
+        entry["attempts"] = int(entry.get("attempts", 0)) + 1
+    with locked(path):
+        if yaml_io.update_entry(path, task_id, bump) is None:
+            raise OpFailed(1)
+
+
+@op("task-append", 2)
+def task_append(path: str, payload_json: str) -> None:
+    """Append a task unless its id already exists."""
+    payload = json.loads(payload_json)
+    with locked(path):
+        if yaml_io.find_entry(path, payload.get("id")) is not None:
+            return
+        yaml_io.insert_entries(path, [payload])
+
+
+@op("task-set-status", 3, 6)
+def task_set_status(path: str, task_id: str, next_status: str, note: str = "", next_retry_at: str = "",
+                    skip_validation: str = "0") -> None:
+    """Status change under the v7.2 state machine: exit 1 unknown task/status, 2 invalid transition."""
+    if next_status not in TASK_STATUSES:
+        raise OpFailed(1)
+    if next_status == "completed":
+        next_status = "success"
+
+    def apply(entry: Dict[str, Any]) -> None:
+        current = entry.get("status")
+        if current == "completed":
+            current = "success"
+        sys.stderr.write(f"[set_task_status] {task_id}: {current}->{next_status}\n")
+        if skip_validation != "1":
+            if next_status in RESERVED_TASK_STATUSES:
+                sys.stderr.write(f"Invalid transition {current}->{next_status} (reserved status)\n")
+                raise OpFailed(2)
+            if (current, next_status) not in TASK_TRANSITIONS:
+                sys.stderr.write(f"Invalid transition {current}->{next_status}\n")
+                raise OpFailed(2)
+        else:
+            sys.stderr.write("[set_task_status] SKIP_VALIDATION=1 bypassing state checks\n")
+        entry["status"] = next_status
+        if note:
+            entry["note"] = note
+        if next_retry_at:
+            entry.setdefault("metadata", {})["next_retry_at"] = float(next_retry_at)
+        elif (entry.get("metadata") or {}).get("next_retry_at"):
+            entry["metadata"].pop("next_retry_at", None)
+
+    with locked(path):
+        if yaml_io.update_entry(path, task_id, apply) is None:
+            raise OpFailed(1)
+
+
+@op("task-set-note", 3)
+def task_set_note(path: str, task_id: str, note: str) -> None:
+    with locked(path):
+        yaml_io.update_entry(path, task_id, {"note": note})
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def run_op(name: str, args: List[str]) -> Optional[str]:
+    if name not in OPS:
+        raise UsageError(f"unknown op: {name}")
+    func, min_args, max_args = OPS[name]
+    if not min_args <= len(args) <= max_args:
+        expected = f"at least {min_args}" if max_args == VARIADIC else f"{min_args}-{max_args}"
+        raise UsageError(f"{name} takes {expected} arguments, got {len(args)}")
+    return func(*args)
+
+
+def split_ops(argv: List[str]) -> List[List[str]]:
+    ops: List[List[str]] = [[]]
+    for word in argv:
+        if word == "::":
+            ops.append([])
+        else:
+            ops[-1].append(word)
+    return [words for words in ops if words]
+
+
+def run_batch(lines: List[str]) -> None:
+    """One JSON result per line; a line that does not split gets rc 2 and the batch carries on."""
+    for line in lines:
+        try:
+            words = shlex.split(line)
+        except ValueError as e:
+            print(json.dumps({"op": "", "rc": 2, "output": f"unparseable line: {e}"}), flush=True)
+            continue
+        if not words:
+            continue
+        try:
+            output, code = run_op(words[0], words[1:]), 0
+        except OpFailed as e:
+            output, code = e.output, e.code
+        print(json.dumps({"op": words[0], "rc": code, "output": output or ""}), flush=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] in ("-h", "--help"):
+        print(__doc__.strip())
+        return 0 if argv else 2
+    if argv == ["list"]:
+        print("\n".join(sorted(OPS)))
+        return 0
+    if argv == ["batch"]:
+        run_batch(sys.stdin.readlines())
+        return 0
+
+    ops = split_ops(argv)
+    multi = len(ops) > 1
+    for words in ops:
+        try:
+            output = run_op(words[0], words[1:])
+        except OpFailed as e:
+            if e.output:
+                print(e.output, file=sys.stderr if isinstance(e, UsageError) else sys.stdout)
+            return e.code
+        if output is not None and (output or multi):
+            print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
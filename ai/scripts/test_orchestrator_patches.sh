@@ -8,6 +8,13 @@ set -euo pipefail
 # 3. Failed execution is reported as failed
 # 4. Reserved statuses are rejected
 # 5. Backlog lookups consistently use id
+# 6. Patch-style backlog writes keep comments and untouched bytes
+# 7. state_toolkit: locked concurrent increments, atomic replace, :: multi-op calls, json-get
+# 8. DependencyScheduler honours the same dependency rule as next-task
+# 9. backlog_engine batch reports malformed lines and keeps going
+# 10. run_history rebuild and queries over run summaries
+# 11. metrics_store windowed counts under concurrent appends and compactions
+# 12. error_classifier matches the old util_errors.sh / error_classifier.sh chains
 
 REPO_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/../.." && pwd)"
 cd "$REPO_ROOT"
@@ -18,9 +25,11 @@ cd "$REPO_ROOT"
 TEST_BACKLOG="ai/backlog_test.yaml"
 TEST_STATUS_FILE="ai/state/status_test.json"
 TEST_TASK_ID="TEST-001"
+TEST_STATE_DIR="$(mktemp -d)"
 
 cleanup() {
   rm -f "$TEST_BACKLOG" "$TEST_STATUS_FILE"
+  rm -rf "$TEST_STATE_DIR"
 }
 
 trap cleanup EXIT
@@ -165,5 +174,414 @@ if grep -q "\.task_id.*//.*unknown" ai/scripts/orchestrator_dry_run.sh; then
 fi
 echo "PASS: Codebase consistently uses 'id' for backlog tasks"
 
+echo ""
+echo "=== Test 6: Patch-style backlog writes keep comments ==="
+set +e
+patch_out=$(python3 - "$REPO_ROOT" "$TEST_BACKLOG" <<'PYEOF' 2>&1
+import sys
+sys.path.insert(0, f"{sys.argv[1]}/ai/scripts")
+import yaml_io
+
+path = sys.argv[2]
+original = """# Backlog header
+- id: A-001
+  stage: 1
+  status: pending
+  # trailing note on A-001
+
+# --- section B ---
+- id: B-001
+  stage: 2
+  status: pending
+
+- id: B-003
+  stage: 2
+  status: pending  # inline comment
+"""
+with open(path, "w") as fh:
+    fh.write(original)
+
+yaml_io.update_entry(path, "A-001", {"status": "done"})
+text = open(path).read()
+tail = original[original.index("  # trailing note"):]
+if not text.startswith("# Backlog header\n- id: A-001\n") or not text.endswith(tail) or "status: done" not in text:
+    print("update_entry rewrote bytes outside the patched item")
+    sys.exit(1)
+
+yaml_io.insert_entries(path, [{"id": "B-002", "stage": 2, "status": "pending"}],
+                       sort_key=lambda e: str(e.get("id", "")))
+after = open(path).read()
+head, sep, rest = after.partition("- id: B-002\n  stage: 2\n  status: pending\n")
+if not sep or head + rest != text or not head.endswith("status: pending\n") or not rest.startswith("\n- id: B-003"):
+    print("insert_entries moved or dropped untouched bytes")
+    sys.exit(1)
+
+yaml_io.update_entry(path, "B-003", {"status": "done"})
+final = yaml_io.load(path, cache=False)
+if [e["status"] for e in final] != ["done", "pending", "pending", "done"]:
+    print(f"update_entry lost data on a commented item: {final}")
+    sys.exit(1)
+PYEOF
+)
+patch_rc=$?
+set -e
+if [ "$patch_rc" -ne 0 ]; then
+  echo "FAIL: $patch_out"
+  exit 1
+fi
+echo "PASS: update_entry/insert_entries keep comments and untouched bytes"
+
+echo ""
+echo "=== Test 7: state_toolkit locking, atomic writes and :: calls ==="
+errors_file="$TEST_STATE_DIR/errors.json"
+issues_file="$TEST_STATE_DIR/issues.yaml"
+for worker in 1 2 3 4 5 6 7 8; do
+  (
+    for _ in 1 2 3 4 5; do
+      python3 ai/scripts/state_toolkit.py errors-increment "$errors_file" "1_race" attempts 1 "$issues_file"
+    done
+  ) &
+done
+wait
+attempts="$(python3 ai/scripts/state_toolkit.py errors-get "$errors_file" "1_race" attempts 0)"
+if [ "$attempts" != "40" ]; then
+  echo "FAIL: concurrent errors-increment lost updates (attempts=$attempts, expected 40)"
+  exit 1
+fi
+echo "PASS: 40 concurrent increments all counted"
+
+set +e
+atomic_out=$(python3 - "$REPO_ROOT" "$errors_file" <<'PYEOF' 2>&1
+import json
+import os
+import sys
+sys.path.insert(0, f"{sys.argv[1]}/ai/scripts")
+import state_toolkit
+
+path = sys.argv[2]
+before = open(path).read()
+
+def interrupted(src, dst):
+    raise OSError("interrupted before rename")
+
+real_replace, os.replace = os.replace, interrupted
+try:
+    state_toolkit.run_op("errors-increment", [path, "1_race", "attempts", "1"])
+except OSError:
+    pass
+else:
+    print("interrupted write did not raise")
+    sys.exit(1)
+finally:
+    os.replace = real_replace
+if open(path).read() != before or json.loads(before)["1_race"]["attempts"] != 40:
+    print("interrupted write changed the target file")
+    sys.exit(1)
+PYEOF
+)
+atomic_rc=$?
+set -e
+if [ "$atomic_rc" -ne 0 ]; then
+  echo "FAIL: $atomic_out"
+  exit 1
+fi
+echo "PASS: a write interrupted before the rename leaves the old file intact"
+
+stage_file="$TEST_STATE_DIR/stage_status.json"
+multi_out="$(python3 ai/scripts/state_toolkit.py \
+  errors-set "$errors_file" "1_race" last_source probe "$issues_file" :: \
+  stage-status-set "$stage_file" 1 running "$issues_file" :: \
+  errors-get "$errors_file" "1_race" last_source none :: \
+  errors-get "$errors_file" "1_race" api_calls 0 :: \
+  stage-status-get "$stage_file" 1)"
+if [ "$multi_out" != $'probe\n0\nrunning' ]; then
+  echo "FAIL: :: call printed unexpected output: $multi_out"
+  exit 1
+fi
+set +e
+stop_out="$(python3 ai/scripts/state_toolkit.py give-up-info "$TEST_STATE_DIR/give_up.json" 1 :: stage-status-get "$stage_file" 1)"
+stop_rc=$?
+set -e
+if [ "$stop_rc" -ne 1 ] || [ -n "$stop_out" ]; then
+  echo "FAIL: :: call did not stop at the first failing op (rc=$stop_rc, output=$stop_out)"
+  exit 1
+fi
+echo "PASS: :: runs ops in order, one line per query, stopping at the first failure"
+
+fields_out="$(echo '{"id":"c-1","evaluation":{"target":"infra/a"},"text":"two\nlines"}' | \
+  python3 ai/scripts/state_toolkit.py json-get - id evaluation.target text attempts=0)"
+if [ "$fields_out" != $'c-1\ninfra/a\ntwo lines\n0' ]; then
+  echo "FAIL: json-get printed unexpected fields: $fields_out"
+  exit 1
+fi
+echo "PASS: json-get returns several fields, one line each"
+
+echo ""
+echo "=== Test 8: Scheduler and next-task share the dependency rule ==="
+set +e
+sched_out=$(python3 - "$REPO_ROOT" <<'PYEOF' 2>&1
+import sys
+sys.path.insert(0, f"{sys.argv[1]}/ai/scripts")
+from backlog_engine import BacklogIndex, DependencyScheduler
+
+index = BacklogIndex([
+    {"id": "E1", "persona": "executor", "stage": 1, "status": "running"},
+    {"id": "E2", "persona": "executor", "stage": 2, "status": "pending"},
+    {"id": "P1", "persona": "planner", "stage": 1, "status": "pending", "depends_on": ["E1"]},
+    {"id": "E3", "persona": "executor", "stage": 1, "status": "pending", "depends_on": ["E1"]},
+])
+scheduler = DependencyScheduler(index)
+ids = lambda entries: [e["id"] for e in entries]
+problems = []
+if ids(scheduler.next_runnable(persona="executor", stage=1)) != []:
+    problems.append("stage filter returned other stages")
+if scheduler.mark_started("E1", "failed") != ["P1"] or index.next_task(1)["id"] != "P1":
+    problems.append("a failed executor did not release its planner in both views")
+if ids(scheduler.next_runnable()) != ["E2", "P1"]:
+    problems.append(f"unexpected runnable set {ids(scheduler.next_runnable())}")
+scheduler.requeue("E1")
+if ids(scheduler.next_runnable()) != ["E1", "E2"]:
+    problems.append("a retried dependency did not hold its planner back")
+if scheduler.mark_success("E1") != ["P1", "E3"] or ids(scheduler.next_runnable(2)) != ["E2", "E3"]:
+    problems.append("success did not release its dependents")
+print("; ".join(problems))
+sys.exit(1 if problems else 0)
+PYEOF
+)
+sched_rc=$?
+set -e
+if [ "$sched_rc" -ne 0 ]; then
+  echo "FAIL: $sched_out"
+  exit 1
+fi
+echo "PASS: next-runnable and next-task agree on planner dependencies"
+
+echo ""
+echo "=== Test 9: backlog_engine batch survives malformed lines ==="
+batch_rcs="$(printf '%s\n' 'status "unbalanced' 'next-runnable --limit x' 'next-runnable --limit 1' | \
+  python3 ai/scripts/backlog_engine.py --backlog "$TEST_BACKLOG" batch 2>/dev/null | \
+  python3 -c 'import json, sys; print(" ".join(str(json.loads(line)["rc"]) for line in sys.stdin))')"
+if [ "$batch_rcs" != "2 2 0" ]; then
+  echo "FAIL: batch rcs were '$batch_rcs', expected '2 2 0'"
+  exit 1
+fi
+echo "PASS: malformed batch lines get rc 2 without ending the batch"
+
+echo ""
+echo "=== Test 10: run_history rebuild and queries ==="
+runs_dir="$TEST_STATE_DIR/runs"
+history_db="$TEST_STATE_DIR/history.sqlite3"
+set +e
+history_out=$(python3 - "$runs_dir" <<'PYEOF' 2>&1
+import json
+import sys
+from pathlib import Path
+
+runs = Path(sys.argv[1])
+runs.mkdir(parents=True)
+summaries = [
+    ("2026-01-01T10:00:00Z", "1", "success", ""),
+    ("2026-01-02T10:00:00Z", "1", "failed", "kubectl apply timed out"),
+    ("2026-01-03T10:00:00Z", "2", "failed", "kubectl apply timed out"),
+    ("manual-run", "2", "failed", "untimed"),
+]
+for run_id, stage, status, stuck_on in summaries:
+    (runs / f"run-{run_id}.json").write_text(json.dumps({
+        "run_id": run_id, "stage": stage, "status": status, "stuck_on": stuck_on,
+        "target": "lab", "component": "orchestrator",
+    }))
+PYEOF
+)
+history_rc=$?
+set -e
+if [ "$history_rc" -ne 0 ]; then
+  echo "FAIL: could not write run summaries: $history_out"
+  exit 1
+fi
+rebuild_err="$TEST_STATE_DIR/rebuild.err"
+rebuild_out="$(python3 ai/scripts/executor/run_history.py rebuild --db "$history_db" --runs-dir "$runs_dir" 2>"$rebuild_err")"
+python3 ai/scripts/executor/run_history.py rebuild --db "$history_db" --runs-dir "$runs_dir" >/dev/null 2>&1
+if [[ "$rebuild_out" != "Indexed 3 run summaries"* ]] || ! grep -q "run-manual-run.json" "$rebuild_err"; then
+  echo "FAIL: rebuild should index 3 timed runs and report the untimed one: $rebuild_out / $(cat "$rebuild_err")"
+  exit 1
+fi
+history_check="$(python3 - "$history_db" <<'PYEOF'
+import json
+import subprocess
+import sys
+
+def history(*args):
+    out = subprocess.run([sys.executable, "ai/scripts/executor/run_history.py", *args, "--db", sys.argv[1], "--json"],
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out)
+
+problems = []
+stats = history("stats")
+if stats["total_runs"] != 3 or stats["by_status"] != {"success": 1, "failed": 2}:
+    problems.append(f"a second rebuild duplicated or lost runs: {stats}")
+groups = {g["stage"]: g["failure_rate"] for g in stats["groups"]}
+if groups != {"1": 0.5, "2": 1.0} or stats["top_stuck_on"] != [{"stuck_on": "kubectl apply timed out", "count": 2}]:
+    problems.append(f"unexpected stats: {stats}")
+ranged = history("query", "--since", "2026-01-02T00:00:00Z", "--until", "2026-01-03T00:00:00Z")
+if [run["run_id"] for run in ranged] != ["2026-01-02T10:00:00Z"]:
+    problems.append(f"time range query returned {ranged}")
+if [run["run_id"] for run in history("query", "--stage", "1")] != ["2026-01-02T10:00:00Z", "2026-01-01T10:00:00Z"]:
+    problems.append("stage query is not newest first")
+print("; ".join(problems))
+PYEOF
+)"
+if [ -n "$history_check" ]; then
+  echo "FAIL: $history_check"
+  exit 1
+fi
+set +e
+python3 ai/scripts/executor/run_history.py query --db "$history_db" --since yesterday >/dev/null 2>&1
+bad_since_rc=$?
+set -e
+if [ "$bad_since_rc" -ne 2 ]; then
+  echo "FAIL: an unparseable --since should be a usage error (rc=$bad_since_rc)"
+  exit 1
+fi
+echo "PASS: run_history rebuild is idempotent and answers stats, stage and time-range queries"
+
+echo ""
+echo "=== Test 11: metrics_store windows under concurrent appends ==="
+set +e
+metrics_out=$(python3 - "$REPO_ROOT" "$TEST_STATE_DIR/metrics.json" <<'PYEOF' 2>&1
+import multiprocessing
+import sys
+import time
+sys.path.insert(0, f"{sys.argv[1]}/ai/scripts")
+from metrics_store import MetricsStore
+
+path = sys.argv[2]
+now = time.time()
+# A tiny compaction threshold makes appends race against compactions
+store = MetricsStore(path, compact_bytes=512, retention_hours=2)
+store.increment("provider_failures", "codex", 5, ts=now - 90 * 60)
+store.increment("provider_failures", "codex", 7, ts=now - 3 * 3600)
+
+
+def worker(n):
+    writer = MetricsStore(path, compact_bytes=512, retention_hours=2)
+    for _ in range(100):
+        writer.record([("provider_failures", "codex", 1), ("provider_failures", f"w{n}", 1)])
+
+
+procs = [multiprocessing.Process(target=worker, args=(n,)) for n in range(6)]
+for proc in procs:
+    proc.start()
+for proc in procs:
+    proc.join()
+store.compact()
+
+problems = []
+if store.get("provider_failures", "codex") != 612:
+    problems.append(f"total {store.get('provider_failures', 'codex')} != 612")
+last_hour = store.window("provider_failures", 1)
+if last_hour != {"codex": 600, **{f"w{n}": 100 for n in range(6)}}:
+    problems.append(f"1h window {last_hour}")
+if store.window("provider_failures", 2, key="codex") != {"codex": 605}:
+    problems.append("2h window missed the 90-minute-old event")
+if store.window("provider_failures", 4, key="codex") != {"codex": 605}:
+    problems.append("events older than retention leaked into a window")
+print("; ".join(problems))
+sys.exit(1 if problems else 0)
+PYEOF
+)
+metrics_rc=$?
+set -e
+if [ "$metrics_rc" -ne 0 ]; then
+  echo "FAIL: $metrics_out"
+  exit 1
+fi
+echo "PASS: 1200 concurrent appends across compactions are all counted and windowed"
+
+echo ""
+echo "=== Test 12: error_classifier parity with the old shell chains ==="
+# The grep/substring chains error_classifier.py replaced, with the Proxmox
+# probe pinned to "unreachable" (the classifier gets a closed port below).
+old_classify_error(){
+  local logfile="$1"
+  if grep -q "Control-plane IP not configured" "$logfile"; then echo "ERR_CONFIG_MISSING_CTRL_IP"; return 0; fi
+  if grep -q "No VMs found on Proxmox" "$logfile"; then echo "ERR_PREREQ_MISSING_VMS"; return 0; fi
+  if grep -qE "Network is unreachable|No route to host|Connection timed out|Operation timed out" "$logfile"; then echo "ERR_SSH_UNREACHABLE"; return 0; fi
+  if grep -qE "ssh: connect to host .* port [0-9]+:" "$logfile" && grep -qE "rc=255|exit=255" "$logfile"; then echo "ERR_SSH_UNREACHABLE"; return 0; fi
+  if grep -qE "HARNESS_STEP name=scp rc=255" "$logfile"; then echo "ERR_SSH_UNREACHABLE"; return 0; fi
+  if grep -qE "Permission denied.*publickey|Host key verification failed|Too many authentication failures" "$logfile"; then echo "ERR_SSH_AUTH_FAILED"; return 0; fi
+  if grep -qE "Could not resolve hostname|Name or service not known|Temporary failure in name resolution" "$logfile"; then echo "ERR_DNS_UNREACHABLE"; return 0; fi
+  if grep -q "k3s kubeconfig missing" "$logfile"; then echo "ERR_K3S_KUBECONFIG_MISSING"; return 0; fi
+  if grep -q "Unable to locate package kubectl" "$logfile"; then echo "ERR_KUBECTL_NOT_AVAILABLE"; return 0; fi
+  echo "ERR_UNKNOWN"
+}
+old_error_type(){
+  local lower
+  lower="$(printf '%s' "$1" | tr '[:upper:]' '[:lower:]')"
+  if [[ "$lower" == *"permission"* ]]; then echo "permission_denied"; return; fi
+  if [[ "$lower" == *"no such file"* || "$lower" == *"cannot open"* ]]; then echo "missing_file"; return; fi
+  if [[ "$lower" == *"command not found"* ]]; then echo "command_not_found"; return; fi
+  if [[ "$lower" == *"timeout"* || "$lower" == *"network"* || "$lower" == *"connection"* ]]; then echo "network_error"; return; fi
+  if [[ "$lower" == *"yaml"* || "$lower" == *"kustomize"* ]]; then echo "yaml_parse_error"; return; fi
+  if [[ "$lower" == *"k3s"* ]]; then echo "k3s_error"; return; fi
+  if [[ "$lower" == *"proxmox"* ]]; then echo "proxmox_error"; return; fi
+  echo "unknown"
+}
+parity_dir="$TEST_STATE_DIR/error_logs"
+python3 - "$parity_dir" <<'PYEOF'
+import random
+import sys
+from pathlib import Path
+
+fragments = [
+    "Control-plane IP not configured", "No VMs found on Proxmox", "Network is unreachable",
+    "ssh: connect to host 10.0.0.5 port 22: Connection refused", "rc=255", "exit=255",
+    "HARNESS_STEP name=scp rc=255", "Permission denied (publickey)", "Host key verification failed",
+    "Could not resolve hostname node1", "Temporary failure in name resolution", "k3s kubeconfig missing",
+    "Unable to locate package kubectl", "bash: kubectl: command not found", "cat: x: No such file or directory",
+    "YAML parse error", "kustomize build failed", "K3S service failed", "proxmox api error",
+    "read TIMEOUT", "Operation timed out", "ok", "applying manifests", "rc=0",
+]
+out = Path(sys.argv[1])
+out.mkdir(parents=True)
+rng = random.Random(37)
+for n in range(200):
+    lines = [rng.choice(fragments) for _ in range(rng.randint(0, 6))]
+    # ssh connect and its exit code on one line, so the all-of rule is exercised both ways
+    if rng.random() < 0.2:
+        lines.append("ssh: connect to host h port 22: timed out rc=255")
+    (out / f"{n:03d}.log").write_text("\n".join(lines) + "\n")
+PYEOF
+old_results="$TEST_STATE_DIR/old_error_results.txt"
+: > "$old_results"
+for log in "$parity_dir"/*.log; do
+  echo "$(basename "$log") $(old_classify_error "$log") $(old_error_type "$(cat "$log")")" >> "$old_results"
+done
+set +e
+parity_out=$(PROXMOX_HOST=127.0.0.1 PROXMOX_SSH_PORT=9 python3 - "$REPO_ROOT" "$parity_dir" "$old_results" <<'PYEOF' 2>&1
+import sys
+from pathlib import Path
+sys.path.insert(0, f"{sys.argv[1]}/ai/scripts")
+import error_classifier
+
+mismatches = []
+for line in Path(sys.argv[3]).read_text().splitlines():
+    name, old_class, old_type = line.split()
+    text = (Path(sys.argv[2]) / name).read_text()
+    new_class = error_classifier.classify_log(Path(sys.argv[2]) / name).classification
+    new_type = error_classifier.error_type(text)[0]
+    if (new_class, new_type) != (old_class, old_type):
+        mismatches.append(f"{name}: {old_class}/{old_type} -> {new_class}/{new_type}")
+print("; ".join(mismatches[:5]))
+sys.exit(1 if mismatches else 0)
+PYEOF
+)
+parity_rc=$?
+set -e
+if [ "$parity_rc" -ne 0 ]; then
+  echo "FAIL: classifier disagrees with the old chains: $parity_out"
+  exit 1
+fi
+echo "PASS: 200 generated logs classify and bucket the same as the old chains"
+
 echo ""
 echo "=== All smoke tests passed ==="
@@ -7,6 +7,19 @@
 #   2. Model router selects correct providers for executor/architect roles
 #   3. State files are created and readable
 #   4. Converge command starts without errors
+#   8. http_ok evaluator against a stand-in HTTP server
+#   9. cluster_resource evaluator against a stub kubectl
+#  10. Budgeted measurement rotates claims slower than the budget
+#  11. State files are replaced atomically; artifact_valid fingerprints follow artifacts.json
+#  12. Watchers flag new/vanished directories and queue overflow; evidence is stable
+#  13. Prometheus textfile follows the text exposition format
+#  14. History aggregates in timeline_stats.json match a rebuild from timeline.json
+#  15. Stat-style claims answered from shared directory listings match plain stat calls
+#  16. A failing dir_exists/file_exists root settles the claims below it without probing them
+#  17. Memory-mapped content search finds matches across page and block boundaries
+#  18. Kustomize node cache is invalidated by the files and directories a node read
+#  19. yaml_tree_valid parses a changed batch in a process pool and reports only invalid files
+#  20. tcp_reachable connects once per port and reuses tcp_cache.json within the TTL
 #
 # Usage: ./ai/scripts/test_v7_smoke.sh
 # =============================================================================
@@ -271,6 +284,1109 @@ fi
 
 echo ""
 
+# -----------------------------------------------------------------------------
+# Test 8: http_ok evaluator against a stand-in HTTP server
+# -----------------------------------------------------------------------------
+echo "--- Test 8: http_ok Evaluator ---"
+
+# Each check prints "PASS <msg>" or "FAIL <msg>"; the engine runs against a
+# throwaway repo root so no state lands in ai/state.
+probe_dir="$(mktemp -d)"
+set +e
+http_output="$(python3 - "$REPO_ROOT" "$probe_dir" <<'PYEOF' 2>&1
+import sys, threading, time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+repo_root, scratch = sys.argv[1], sys.argv[2]
+sys.path.insert(0, f"{repo_root}/ai")
+sys.path.insert(0, f"{repo_root}/ai/scripts")
+from drift_engine import Claim, ClaimEvaluation, ClaimStatus, ClaimType, DriftEngine
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/hang":
+            time.sleep(3)
+        if self.path == "/chunked":
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for part in (b"hello ", b"world"):
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(part), part))
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        if self.path == "/close":
+            # No length, no chunking: the body ends when the server closes
+            self.send_response(200)
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.wfile.write(b"first half ")
+            self.wfile.flush()
+            time.sleep(0.1)
+            self.wfile.write(b"second half")
+            self.close_connection = True
+            return
+        body = b"ok healthy"
+        self.send_response(404 if self.path == "/missing" else 200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+base = f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def claim(cid, target, **kw):
+    return Claim(id=cid, type=ClaimType.OPERATIONAL, source="smoke", section="smoke", text=cid,
+                 evaluation=ClaimEvaluation(method="http_ok", target=target, **kw))
+
+
+claims = {c.id: c for c in [
+    claim("status_ok", f"{base}/"),
+    claim("status_404", f"{base}/missing"),
+    claim("status_expected", f"{base}/missing", expected="404"),
+    claim("pattern_ok", f"{base}/", pattern="heal+thy"),
+    claim("pattern_miss", f"{base}/", pattern="unhealthy"),
+    claim("chunked", f"{base}/chunked", pattern="hello world"),
+    claim("close_delimited", f"{base}/close", pattern="first half second half"),
+    claim("timeout", f"{base}/hang", timeout=1),
+    claim("refused", "http://127.0.0.1:1/"),
+]}
+DriftEngine(scratch).evaluate_claims(list(claims.values()))
+
+expect = {
+    "status_ok": ClaimStatus.PASS, "status_404": ClaimStatus.FAIL,
+    "status_expected": ClaimStatus.PASS, "pattern_ok": ClaimStatus.PASS,
+    "pattern_miss": ClaimStatus.FAIL, "chunked": ClaimStatus.PASS,
+    "close_delimited": ClaimStatus.PASS, "timeout": ClaimStatus.FAIL,
+    "refused": ClaimStatus.FAIL,
+}
+for cid, status in expect.items():
+    got = claims[cid].status
+    verdict = "PASS" if got == status else "FAIL"
+    print(f"{verdict} http_ok {cid}: {got.value} ({claims[cid].evidence})")
+server.shutdown()
+PYEOF
+)"
+http_rc=$?
+set -e
+rm -rf "$probe_dir"
+
+if [ "$http_rc" -ne 0 ]; then
+  fail "http_ok smoke script crashed: $http_output"
+else
+  while IFS= read -r line; do
+    case "$line" in
+      PASS\ *) pass "${line#PASS }" ;;
+      FAIL\ *) fail "${line#FAIL }" ;;
+    esac
+  done <<< "$http_output"
+fi
+
+echo ""
+
+# -----------------------------------------------------------------------------
+# Test 9: cluster_resource evaluator against a stub kubectl
+# -----------------------------------------------------------------------------
+echo "--- Test 9: cluster_resource Evaluator ---"
+
+probe_dir="$(mktemp -d)"
+cat > "$probe_dir/kubectl" <<'PYEOF'
+import json, os, sys
+with open(os.path.join(os.path.dirname(__file__), "calls"), "a") as log:
+    log.write(sys.argv[2] + "\n")
+kinds = [{"node": "nodes", "pod": "pods"}.get(k, k) for k in sys.argv[2].split(",")]
+known = {
+    "nodes": [
+        {"kind": "Node", "apiVersion": "v1", "metadata": {"name": "n1"},
+         "status": {"conditions": [{"type": "Ready", "status": "True"}]}},
+        {"kind": "Node", "apiVersion": "v1", "metadata": {"name": "n2"},
+         "status": {"conditions": [{"type": "Ready", "status": "False"}]}},
+    ],
+    "pods": [
+        {"kind": "Pod", "apiVersion": "v1",
+         "metadata": {"name": "sc-1", "namespace": "flux-system", "labels": {"app": "source-controller"}},
+         "status": {"phase": "Running"}},
+        {"kind": "Pod", "apiVersion": "v1",
+         "metadata": {"name": "sc-0", "namespace": "flux-system", "labels": {"app": "source-controller"}},
+         "status": {"phase": "Failed"}},
+        {"kind": "Pod", "apiVersion": "v1",
+         "metadata": {"name": "web", "namespace": "apps", "labels": {"app": "web"}},
+         "status": {"phase": "Pending"}},
+    ],
+    "kustomizations.kustomize.toolkit.fluxcd.io": [
+        {"kind": "Kustomization", "apiVersion": "kustomize.toolkit.fluxcd.io/v1",
+         "metadata": {"name": "apps", "namespace": "flux-system"},
+         "status": {"conditions": [{"type": "Ready", "status": "True"}]}},
+    ],
+}
+missing = [k for k in kinds if k not in known]
+if missing:
+    print(f'error: the server doesn\'t have a resource type "{missing[0]}"', file=sys.stderr)
+    sys.exit(1)
+print(json.dumps({"kind": "List", "items": [item for k in kinds for item in known[k]]}))
+PYEOF
+set +e
+cluster_output="$(DRIFT_KUBECTL="python3 $probe_dir/kubectl" python3 - "$REPO_ROOT" "$probe_dir" <<'PYEOF' 2>&1
+import sys
+from pathlib import Path
+
+repo_root, scratch = sys.argv[1], sys.argv[2]
+sys.path.insert(0, f"{repo_root}/ai")
+sys.path.insert(0, f"{repo_root}/ai/scripts")
+from drift_engine import Claim, ClaimEvaluation, ClaimStatus, ClaimType, DriftEngine
+
+calls = Path(scratch) / "calls"
+
+
+def claim(cid, target, **kw):
+    return Claim(id=cid, type=ClaimType.OPERATIONAL, source="smoke", section="smoke", text=cid,
+                 evaluation=ClaimEvaluation(method="cluster_resource", target=target, **kw))
+
+
+def check(ok, msg):
+    print(f"{'PASS' if ok else 'FAIL'} cluster_resource {msg}")
+
+
+ready = "status.conditions.Ready.status"
+claims = {c.id: c for c in [
+    claim("nodes_all_ready", "nodes", key_path=ready, expected="True"),
+    claim("nodes_any_ready", "node", key_path=ready, expected="True", match="any"),
+    claim("flux_all_running", "pods", namespace="flux-system", selector="app=source-controller",
+          key_path="status.phase", expected="Running"),
+    claim("flux_any_running", "pods", namespace="flux-system", selector="app=source-controller",
+          key_path="status.phase", expected="Running", match="any"),
+    claim("selector_miss", "pods", selector="app!=web,app!=source-controller"),
+    claim("named", "kustomizations.kustomize.toolkit.fluxcd.io/apps", key_path=ready, expected="True"),
+    claim("unknown_kind", "helmreleases.helm.toolkit.fluxcd.io"),
+]}
+engine = DriftEngine(scratch)
+engine.evaluate_claims(list(claims.values()))
+
+expect = {
+    "nodes_all_ready": ClaimStatus.FAIL, "nodes_any_ready": ClaimStatus.PASS,
+    "flux_all_running": ClaimStatus.FAIL, "flux_any_running": ClaimStatus.PASS,
+    "selector_miss": ClaimStatus.FAIL, "named": ClaimStatus.PASS,
+    "unknown_kind": ClaimStatus.FAIL,
+}
+for cid, status in expect.items():
+    check(claims[cid].status == status, f"{cid}: {claims[cid].status.value} ({claims[cid].evidence})")
+
+# One combined get fails on the unknown kind, then one get per kind
+fetches = calls.read_text().splitlines()
+check(fetches[0].count(",") == 4 and sorted(fetches[1:]) == sorted(fetches[0].split(",")),
+      f"per-kind fallback after one combined get: {fetches}")
+
+engine.evaluate_claims(list(claims.values()))
+check(len(calls.read_text().splitlines()) == len(fetches), "fresh snapshot answers a second pass without kubectl")
+check(engine.latency_sketches()["named"]["count"] == 1, "a reused snapshot adds no latency sample")
+
+engine.prefetch_network_probes(list(claims.values()), refresh=True)
+engine.end_measurement_pass()
+check(len(calls.read_text().splitlines()) > len(fetches), "refresh bypasses the snapshot file")
+PYEOF
+)"
+cluster_rc=$?
+set -e
+rm -rf "$probe_dir"
+
+if [ "$cluster_rc" -ne 0 ]; then
+  fail "cluster_resource smoke script crashed: $cluster_output"
+else
+  while IFS= read -r line; do
+    case "$line" in
+      PASS\ *) pass "${line#PASS }" ;;
+      FAIL\ *) fail "${line#FAIL }" ;;
+    esac
+  done <<< "$cluster_output"
+fi
+
+echo ""
+
+# -----------------------------------------------------------------------------
+# Test 10: budgeted measurement never starves a claim slower than the budget
+# -----------------------------------------------------------------------------
+echo "--- Test 10: Budget Carry-over ---"
+
+probe_dir="$(mktemp -d)"
+set +e
+budget_output="$(python3 - "$REPO_ROOT" "$probe_dir" <<'PYEOF' 2>&1
+import sys, time
+
+repo_root, scratch = sys.argv[1], sys.argv[2]
+sys.path.insert(0, f"{repo_root}/ai")
+sys.path.insert(0, f"{repo_root}/ai/scripts")
+from drift_engine import Claim, ClaimEvaluation, ClaimStatus, ClaimType, DriftEngine
+
+
+def claim(cid, command, timeout):
+    return Claim(id=cid, type=ClaimType.OPERATIONAL, source="smoke", section="smoke", text=cid,
+                 evaluation=ClaimEvaluation(method="command_succeeds", target="", command=command, timeout=timeout))
+
+
+def check(ok, msg):
+    print(f"{'PASS' if ok else 'FAIL'} budget {msg}")
+
+
+# Timeouts above the 1s budget: fast only once capped, slow never finishes
+fast, slow = claim("fast", "true", 10), claim("slow", "sleep 5", 10)
+quick = [claim(f"quick{i}", "sleep 0.1", 0.5) for i in range(2)]
+claims = [fast, slow] + quick
+engine = DriftEngine(scratch)
+ticks = []
+for _ in range(4):
+    engine.evaluate_claims(claims, deadline=time.perf_counter() + 1)
+    ticks.append({c.id: (c.status.value, c.carried_over) for c in claims})
+
+check(ticks[0]["fast"] == ("UNKNOWN", True), f"first tick carries the over-budget claim: {ticks[0]['fast']}")
+check(fast.status == ClaimStatus.PASS, f"carried-over claim runs with a capped timeout: {fast.evidence}")
+check(slow.status == ClaimStatus.UNKNOWN, "a capped run cut short keeps the previous status")
+check(sum(not tick["quick0"][1] for tick in ticks) >= 2,
+      f"a claim slower than the budget does not take every tick: {[t['quick0'] for t in ticks]}")
+PYEOF
+)"
+budget_rc=$?
+set -e
+rm -rf "$probe_dir"
+
+if [ "$budget_rc" -ne 0 ]; then
+  fail "budget smoke script crashed: $budget_output"
+else
+  while IFS= read -r line; do
+    case "$line" in
+      PASS\ *) pass "${line#PASS }" ;;
+      FAIL\ *) fail "${line#FAIL }" ;;
+    esac
+  done <<< "$budget_output"
+fi
+
+echo ""
+
+# -----------------------------------------------------------------------------
+# Test 11: atomic state writes and the artifact_valid gating fingerprint
+# -----------------------------------------------------------------------------
+echo "--- Test 11: State Writes ---"
+
+probe_dir="$(mktemp -d)"
+set +e
+state_output="$(python3 - "$REPO_ROOT" "$probe_dir" <<'PYEOF' 2>&1
+import json, sys
+
+repo_root, scratch = sys.argv[1], sys.argv[2]
+sys.path.insert(0, f"{repo_root}/ai")
+sys.path.insert(0, f"{repo_root}/ai/scripts")
+from drift_engine import Claim, ClaimEvaluation, ClaimStatus, ClaimType, DriftEngine
+
+
+def check(ok, msg):
+    print(f"{'PASS' if ok else 'FAIL'} state {msg}")
+
+
+engine = DriftEngine(scratch)
+claim = Claim(id="kubeconfig_valid", type=ClaimType.OPERATIONAL, source="smoke", section="smoke", text="kubeconfig",
+              evaluation=ClaimEvaluation(method="artifact_valid", target="", artifact_name="kubeconfig"))
+before = engine.gating_fingerprint(claim)
+check(engine.update_artifact("kubeconfig", {"valid": True}), "update_artifact writes artifacts.json")
+check(engine.gating_fingerprint(claim) != before, "artifact_valid fingerprint follows artifacts.json")
+engine.evaluate_claims([claim])
+check(claim.status == ClaimStatus.PASS, f"artifact_valid reads the update: {claim.evidence}")
+
+engine.update_now_state(active_claim="kubeconfig_valid", attempt_count=1)
+check(engine.update_cluster_identity({"cluster_name": "smoke"}), "update_cluster_identity writes")
+now = json.loads(engine.now_file.read_text())
+identity = json.loads(engine.cluster_identity_file.read_text())
+check(now["active_claim"] == "kubeconfig_valid" and identity["cluster_name"] == "smoke", "state files parse back")
+leftovers = sorted(p.name for p in engine.state_dir.rglob("*.tmp"))
+check(not leftovers, f"no temp files left behind: {leftovers}")
+PYEOF
+)"
+state_rc=$?
+set -e
+rm -rf "$probe_dir"
+
+if [ "$state_rc" -ne 0 ]; then
+  fail "state write smoke script crashed: $state_output"
+else
+  while IFS= read -r line; do
+    case "$line" in
+      PASS\ *) pass "${line#PASS }" ;;
+      FAIL\ *) fail "${line#FAIL }" ;;
+    esac
+  done <<< "$state_output"
+fi
+
+echo ""
+
+# -----------------------------------------------------------------------------
+# Test 12: watch-mode events (tree changes, overflow) and stable evidence
+# -----------------------------------------------------------------------------
+echo "--- Test 12: Watch Events ---"
+
+probe_dir="$(mktemp -d)"
+set +e
+watch_output="$(python3 - "$REPO_ROOT" "$probe_dir" <<'PYEOF' 2>&1
+import os, struct, sys
+from pathlib import Path
+
+repo_root, scratch = sys.argv[1], Path(sys.argv[2])
+sys.path.insert(0, f"{repo_root}/ai")
+sys.path.insert(0, f"{repo_root}/ai/scripts")
+from drift_engine import Claim, ClaimEvaluation, ClaimType, DriftEngine, InotifyWatcher, PollingWatcher
+
+
+def check(ok, msg):
+    print(f"{'PASS' if ok else 'FAIL'} watch {msg}")
+
+
+base = scratch / "tree"
+base.mkdir()
+try:
+    watcher = InotifyWatcher()
+except OSError as e:
+    print(f"SKIP watch inotify unavailable: {e}")
+    watcher = None
+if watcher is not None:
+    watcher.set_dirs({base})
+    (base / "file.yaml").write_text("a: 1\n")
+    check(watcher.wait(1) == {base} and not watcher.tree_changed, "file writes do not ask for a rescan")
+    (base / "sub").mkdir()
+    check(base in watcher.wait(1) and watcher.tree_changed, "a new directory asks for a rescan")
+    watcher.tree_changed = False
+    watcher.set_dirs({base, base / "sub"})
+    (base / "sub").rmdir()
+    watcher.wait(1)
+    watcher.wait(0.2)
+    check(watcher.tree_changed and base / "sub" not in watcher._dir_to_wd, "IN_IGNORED drops the dead watch")
+    watcher.read_events(struct.pack("iIII", -1, InotifyWatcher.IN_Q_OVERFLOW, 0, 0))
+    check(watcher.overflowed, "IN_Q_OVERFLOW sets overflowed")
+    watcher.reset()
+    check(not watcher.overflowed and not watcher._dir_to_wd, "reset drops every watch for a full re-add")
+    watcher.close()
+
+poller = PollingWatcher(0.05)
+poller.set_dirs({base})
+(base / "file.yaml").write_text("a: 22\n")
+check(poller.wait(0.05) == {base} and not poller.tree_changed, "polling: file writes do not ask for a rescan")
+(base / "other").mkdir()
+check(poller.wait(0.05) == {base} and poller.tree_changed, "polling: a new directory asks for a rescan")
+
+(base / "kustomization.yaml").write_text("resources:\n  - cm.yaml\n")
+(base / "cm.yaml").write_text("apiVersion: v1\nkind: ConfigMap\nmetadata:\n  name: smoke\n")
+claims = [
+    Claim(id="kust", type=ClaimType.STRUCTURAL, source="smoke", section="smoke", text="kust",
+          evaluation=ClaimEvaluation(method="kustomize_resolves", target="tree")),
+    Claim(id="tree", type=ClaimType.STRUCTURAL, source="smoke", section="smoke", text="tree",
+          evaluation=ClaimEvaluation(method="yaml_tree_valid", target="tree/*.yaml")),
+]
+DriftEngine(str(scratch)).evaluate_claims(claims)
+first = [c.evidence for c in claims]
+DriftEngine(str(scratch)).evaluate_claims(claims)
+check([c.evidence for c in claims] == first, f"cached re-evaluation keeps the same evidence: {first}")
+PYEOF
+)"
+watch_rc=$?
+set -e
+rm -rf "$probe_dir"
+
+if [ "$watch_rc" -ne 0 ]; then
+  fail "watch smoke script crashed: $watch_output"
+else
+  while IFS= read -r line; do
+    case "$line" in
+      PASS\ *) pass "${line#PASS }" ;;
+      FAIL\ *) fail "${line#FAIL }" ;;
+      SKIP\ *) warn "${line#SKIP }" ;;
+    esac
+  done <<< "$watch_output"
+fi
+
+echo ""
+
+# -----------------------------------------------------------------------------
+# Test 13: Prometheus textfile follows the text exposition format
+# -----------------------------------------------------------------------------
+echo "--- Test 13: Prometheus Textfile ---"
+
+probe_dir="$(mktemp -d)"
+set +e
+textfile_output="$(python3 - "$REPO_ROOT" "$probe_dir" <<'PYEOF' 2>&1
+import re, sys
+from pathlib import Path
+
+repo_root, scratch = sys.argv[1], Path(sys.argv[2])
+sys.path.insert(0, f"{repo_root}/ai")
+sys.path.insert(0, f"{repo_root}/ai/scripts")
+from drift_engine import DriftEngine
+
+
+def check(ok, msg):
+    print(f"{'PASS' if ok else 'FAIL'} textfile {msg}")
+
+
+(scratch / "docs").mkdir()
+(scratch / "docs/memo.txt").write_text("## Layout\n- The file `infra/app.yaml` must exist.\n")
+engine = DriftEngine(str(scratch))
+engine.measure_drift("docs/memo.txt")
+state = engine.measure_drift("docs/memo.txt")
+text = engine.metrics_file.read_text()
+
+sample_re = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(?:[a-zA-Z_]\w*="(?:[^"\\\n]|\\.)*",?)*\})? (\S+)$')
+families, samples, problems = {}, [], []
+for line in text.splitlines():
+    if line.startswith("# HELP ") or line.startswith("# TYPE "):
+        parts = line.split(" ", 3)
+        families.setdefault(parts[2], {})[parts[1]] = parts[3] if len(parts) > 3 else ""
+        continue
+    match = sample_re.match(line)
+    if not match:
+        problems.append(line)
+        continue
+    name, labels, value = match.groups()
+    family = re.sub(r"_(bucket|sum|count)$", "", name) if name not in families else name
+    if family not in families:
+        problems.append(f"no HELP/TYPE before {name}")
+    try:
+        samples.append((name, labels or "", float(value)))
+    except ValueError:
+        problems.append(f"{name} value {value}")
+check(text.endswith("\n") and not problems, f"every line is HELP, TYPE or a valid sample: {problems[:3]}")
+check(all({"HELP", "TYPE"} <= set(meta) for meta in families.values()), "every family has HELP and TYPE")
+check(all(meta["TYPE"] in {"gauge", "counter", "histogram"} for meta in families.values()), "known metric types")
+
+values = {(name, labels): value for name, labels, value in samples}
+check(values[("orchestrator_drift_measurements_total", "")] == 2, "measurements_total counts measures")
+status_total = sum(v for (name, _), v in values.items() if name == "orchestrator_drift_claims")
+check(status_total == len(state.claims), f"claims by status add up to {len(state.claims)}")
+check(values[("orchestrator_drift_score", "")] == state.drift_score, "score matches drift.json")
+
+buckets = {}
+for name, labels, value in samples:
+    if name == "orchestrator_drift_evaluator_latency_seconds_bucket":
+        method = re.search(r'method="([^"]*)"', labels).group(1)
+        buckets.setdefault(method, []).append(value)
+counts = {re.search(r'method="([^"]*)"', labels).group(1): value for name, labels, value in samples
+          if name == "orchestrator_drift_evaluator_latency_seconds_count"}
+check(buckets and all(b == sorted(b) and b[-1] == counts[m] for m, b in buckets.items()),
+      "histogram buckets are cumulative and +Inf equals _count")
+check(not list(engine.metrics_file.parent.glob("*.tmp")), "no temp files left next to the textfile")
+PYEOF
+)"
+textfile_rc=$?
+set -e
+rm -rf "$probe_dir"
+
+if [ "$textfile_rc" -ne 0 ]; then
+  fail "textfile smoke script crashed: $textfile_output"
+else
+  while IFS= read -r line; do
+    case "$line" in
+      PASS\ *) pass "${line#PASS }" ;;
+      FAIL\ *) fail "${line#FAIL }" ;;
+    esac
+  done <<< "$textfile_output"
+fi
+
+echo ""
+
+# -----------------------------------------------------------------------------
+# Test 14: History aggregates in timeline_stats.json match a rebuild from timeline.json
+# -----------------------------------------------------------------------------
+echo "--- Test 14: Timeline Aggregates ---"
+
+probe_dir="$(mktemp -d)"
+set +e
+timeline_output="$(python3 - "$REPO_ROOT" "$probe_dir" <<'PYEOF' 2>&1
+import json, sys
+from pathlib import Path
+
+repo_root, scratch = sys.argv[1], Path(sys.argv[2])
+sys.path.insert(0, f"{repo_root}/ai")
+sys.path.insert(0, f"{repo_root}/ai/scripts")
+from drift_engine import DriftEngine
+
+
+def check(ok, msg):
+    print(f"{'PASS' if ok else 'FAIL'} timeline {msg}")
+
+
+(scratch / "docs").mkdir()
+(scratch / "docs/memo.txt").write_text("## Layout\n- The file `infra/app.yaml` must exist.\n")
+engine = DriftEngine(str(scratch))
+first = engine.measure_drift("docs/memo.txt")
+claim_id = next(claim.id for claim in first.claims if "infra/app.yaml" in claim.text)
+engine.measure_drift("docs/memo.txt", patch_claim=claim_id)
+(scratch / "infra").mkdir()
+(scratch / "infra/app.yaml").write_text("kind: ConfigMap\n")
+engine.measure_drift("docs/memo.txt", patch_claim=claim_id)
+
+timeline = json.loads(engine.timeline_file.read_text())
+check(len(timeline) == 3, f"appends keep timeline.json a valid array ({len(timeline)} entries)")
+incremental = json.loads(engine.timeline_stats_file.read_text())
+rebuilt = engine.load_timeline_stats(rebuild=True)
+check(incremental == rebuilt, "incremental aggregates equal a rebuild from timeline.json")
+check(rebuilt.get("timeline_bytes") == engine.timeline_file.stat().st_size, "stats record the timeline size they cover")
+
+history = engine.drift_history()
+check(history["entries"] == 3, "history counts every entry")
+patches = history["patches"]
+check((patches["applied"], patches["zero_delta"], patches["improved"]) == (2, 1, 1),
+      "patches are bucketed by drift delta")
+check(history["time_to_pass"].get(claim_id, {}).get("passes") == 1, "FAIL -> PASS records a time to pass")
+check(claim_id not in history["failing_claims"], "the fixed claim is no longer failing")
+check(history["moving_average"]["window"] == 3, "moving average covers the window")
+
+# Stats written by an older engine (size mismatch) are rebuilt on read
+engine.timeline_stats_file.write_text(json.dumps({"entries": 99, "timeline_bytes": 1}))
+check(engine.load_timeline_stats()["entries"] == 3, "stale stats are rebuilt by streaming the timeline")
+PYEOF
+)"
+timeline_rc=$?
+set -e
+rm -rf "$probe_dir"
+
+if [ "$timeline_rc" -ne 0 ]; then
+  fail "timeline smoke script crashed: $timeline_output"
+else
+  while IFS= read -r line; do
+    case "$line" in
+      PASS\ *) pass "${line#PASS }" ;;
+      FAIL\ *) fail "${line#FAIL }" ;;
+    esac
+  done <<< "$timeline_output"
+fi
+
+echo ""
+
+# -----------------------------------------------------------------------------
+# Test 15: Stat-style claims answered from shared directory listings match plain stat calls
+# -----------------------------------------------------------------------------
+echo "--- Test 15: Scandir Stat Answers ---"
+
+probe_dir="$(mktemp -d)"
+set +e
+scandir_output="$(python3 - "$REPO_ROOT" "$probe_dir" <<'PYEOF' 2>&1
+import copy, os, sys
+from pathlib import Path
+
+repo_root, scratch = sys.argv[1], Path(sys.argv[2])
+sys.path.insert(0, f"{repo_root}/ai")
+sys.path.insert(0, f"{repo_root}/ai/scripts")
+import drift_engine
+from drift_engine import Claim, ClaimEvaluation, ClaimType, DriftEngine
+
+
+def check(ok, msg):
+    print(f"{'PASS' if ok else 'FAIL'} scandir {msg}")
+
+
+def claim(cid, method, target):
+    return Claim(id=cid, type=ClaimType.STRUCTURAL, source="smoke", section="smoke", text=cid,
+                 evaluation=ClaimEvaluation(method=method, target=target))
+
+
+for rel, body in [("a/x.txt", "x"), ("a/empty.txt", ""), ("a/sub/y.txt", "y"), ("b/z.yaml", "z: 1"), ("top.md", "t")]:
+    (scratch / rel).parent.mkdir(parents=True, exist_ok=True)
+    (scratch / rel).write_text(body)
+claims = [
+    claim("c1", "file_exists", "a/x.txt"), claim("c2", "file_exists", "a/missing.txt"),
+    claim("c3", "file_nonempty", "a/empty.txt"), claim("c4", "file_nonempty", "a/x.txt"),
+    claim("c5", "dir_exists", "a/sub"), claim("c6", "file_exists", "a/sub"),
+    claim("c7", "file_exists", "a/sub/y.txt"), claim("c8", "dir_exists", "b/z.yaml"),
+    claim("c9", "file_exists", "top.md"), claim("c10", "file_exists", "b/*.yaml"),
+    claim("c11", "dir_exists", "nowhere/deeper"), claim("c12", "file_exists", "./a/../a/x.txt"),
+]
+engine = DriftEngine(str(scratch))
+
+expected = copy.deepcopy(claims)
+for c in expected:
+    engine.evaluate_claim(c)  # outside a pass: plain stat calls
+
+calls = []
+real_scandir = os.scandir
+
+
+def counting_scandir(path="."):
+    calls.append(os.fspath(path))
+    return real_scandir(path)
+
+
+drift_engine.os.scandir = counting_scandir
+try:
+    engine.evaluate_claims(claims)
+finally:
+    drift_engine.os.scandir = real_scandir
+
+mismatched = [(c.id, c.status, e.status) for c, e in zip(claims, expected)
+              if (c.status, c.evidence) != (e.status, e.evidence)]
+check(not mismatched, f"listing answers equal stat answers: {mismatched}")
+check(len(calls) == len(set(calls)), f"each directory is listed once per pass ({len(calls)} scandir calls)")
+check(len(calls) <= 5, f"scandir calls follow distinct parents, not claims ({len(calls)} for {len(claims)} claims)")
+check(engine._dir_listings is None, "listings are dropped when the pass ends")
+
+(scratch / "a/missing.txt").write_text("now")
+engine.evaluate_claims(claims)
+check(claims[1].status.value == "PASS", "the next pass sees files created after the last one")
+PYEOF
+)"
+scandir_rc=$?
+set -e
+rm -rf "$probe_dir"
+
+if [ "$scandir_rc" -ne 0 ]; then
+  fail "scandir smoke script crashed: $scandir_output"
+else
+  while IFS= read -r line; do
+    case "$line" in
+      PASS\ *) pass "${line#PASS }" ;;
+      FAIL\ *) fail "${line#FAIL }" ;;
+    esac
+  done <<< "$scandir_output"
+fi
+
+echo ""
+
+# -----------------------------------------------------------------------------
+# Test 16: A failing dir_exists/file_exists root settles the claims below it without probing them
+# -----------------------------------------------------------------------------
+echo "--- Test 16: Ancestor Pruning ---"
+
+probe_dir="$(mktemp -d)"
+set +e
+pruning_output="$(python3 - "$REPO_ROOT" "$probe_dir" <<'PYEOF' 2>&1
+import sys
+from pathlib import Path
+
+repo_root, scratch = sys.argv[1], Path(sys.argv[2])
+sys.path.insert(0, f"{repo_root}/ai")
+sys.path.insert(0, f"{repo_root}/ai/scripts")
+from drift_engine import Claim, ClaimEvaluation, ClaimType, DriftEngine
+
+
+def check(ok, msg):
+    print(f"{'PASS' if ok else 'FAIL'} pruning {msg}")
+
+
+def claim(cid, method, target, expected=None):
+    return Claim(id=cid, type=ClaimType.STRUCTURAL, source="smoke", section="smoke", text=cid,
+                 evaluation=ClaimEvaluation(method=method, target=target, expected=expected))
+
+
+claims = [
+    claim("root", "dir_exists", "infra"),
+    claim("nested_root", "dir_exists", "infra/apps"),
+    claim("manifest", "file_exists", "infra/apps/app.yaml"),
+    claim("parses", "yaml_parseable", "infra/apps/app.yaml"),
+    claim("script", "script_behavior", "infra/bootstrap.sh"),
+    claim("cfg", "file_exists", "cfg.json"),
+    claim("cfg_content", "file_content", "cfg.json", expected="enabled"),
+    claim("glob", "file_exists", "infra/*.yaml"),
+    claim("sibling", "file_exists", "infrastructure.md"),
+]
+engine = DriftEngine(str(scratch))
+evaluated = []
+real_evaluate = engine.evaluate_claim
+engine.evaluate_claim = lambda c: (evaluated.append(c.id), real_evaluate(c))[1]
+
+# Everything missing: the shallowest failing root settles its subtree
+engine.evaluate_claims(claims)
+by_id = {c.id: c for c in claims}
+check(set(evaluated) == {"root", "cfg", "glob", "sibling"}, f"only roots and unrelated claims are probed: {sorted(evaluated)}")
+check(all(by_id[cid].implied_by == "root" for cid in ("nested_root", "manifest", "parses", "script")),
+      "dependents name the shallowest failing ancestor")
+check(by_id["parses"].status.value == "FAIL" and by_id["script"].status.value == "UNKNOWN",
+      "implied status is what the evaluator reports for a missing path")
+check(by_id["manifest"].evidence.startswith("Implied by root (dir_exists infra)"), "evidence names the root cause")
+check(by_id["cfg_content"].implied_by == "cfg", "a failing file_exists settles content claims on the same file")
+check(by_id["glob"].implied_by is None and by_id["sibling"].implied_by is None,
+      "glob targets and prefix-sharing siblings are not pruned")
+
+# Once the roots exist, dependents are evaluated for real and lose implied_by
+(scratch / "infra/apps").mkdir(parents=True)
+(scratch / "infra/apps/app.yaml").write_text("kind: [unclosed\n")
+(scratch / "cfg.json").write_text('{"enabled": true}')
+evaluated.clear()
+engine.evaluate_claims(claims)
+check(set(evaluated) == {c.id for c in claims}, "every claim is probed once its ancestors pass")
+check(all(c.implied_by is None for c in claims), "implied_by is cleared on real evaluation")
+check(by_id["parses"].status.value == "FAIL" and "Implied" not in by_id["parses"].evidence,
+      "a real failure below a passing root carries its own evidence")
+PYEOF
+)"
+pruning_rc=$?
+set -e
+rm -rf "$probe_dir"
+
+if [ "$pruning_rc" -ne 0 ]; then
+  fail "pruning smoke script crashed: $pruning_output"
+else
+  while IFS= read -r line; do
+    case "$line" in
+      PASS\ *) pass "${line#PASS }" ;;
+      FAIL\ *) fail "${line#FAIL }" ;;
+    esac
+  done <<< "$pruning_output"
+fi
+
+echo ""
+
+# -----------------------------------------------------------------------------
+# Test 17: Memory-mapped content search finds matches across page and block boundaries
+# -----------------------------------------------------------------------------
+echo "--- Test 17: Content Search Boundaries ---"
+
+probe_dir="$(mktemp -d)"
+set +e
+content_output="$(python3 - "$REPO_ROOT" "$probe_dir" <<'PYEOF' 2>&1
+import mmap, sys
+from pathlib import Path
+
+repo_root, scratch = sys.argv[1], Path(sys.argv[2])
+sys.path.insert(0, f"{repo_root}/ai")
+sys.path.insert(0, f"{repo_root}/ai/scripts")
+import drift_engine
+from drift_engine import EVIDENCE_BLOCK_BYTES, Claim, ClaimEvaluation, ClaimType, DriftEngine
+
+
+def check(ok, msg):
+    print(f"{'PASS' if ok else 'FAIL'} content {msg}")
+
+
+def claim(cid, target, pattern=None, expected=None):
+    return Claim(id=cid, type=ClaimType.STRUCTURAL, source="smoke", section="smoke", text=cid,
+                 evaluation=ClaimEvaluation(method="file_content", target=target, pattern=pattern, expected=expected))
+
+
+# Filler lines with markers planted so each straddles a page or block boundary
+data = bytearray(b"# filler line that matches nothing in particular\n" * 120_000)
+planted = {}
+for name, boundary in [("page", mmap.PAGESIZE), ("block", EVIDENCE_BLOCK_BYTES), ("far", 5 * 1024 * 1024 + 1)]:
+    marker = f"image: registry.local/{name}-marker:1.0".encode()
+    offset = boundary - len(marker) // 2
+    data[offset:offset + len(marker)] = marker
+    planted[name] = marker
+data += "\ntail: café ünicode last line without newline".encode()
+(scratch / "big.log").write_bytes(bytes(data))
+text = data.decode("utf-8", errors="replace")
+
+claims = [
+    claim("page", "big.log", pattern=r"registry\.local/page-marker:\d"),
+    claim("block", "big.log", expected="block-marker:1.0"),
+    claim("far", "big.log", pattern=r"far-marker:[0-9.]+"),
+    claim("tail", "big.log", expected="café ünicode"),
+    claim("missing", "big.log", pattern=r"never-planted-\w+"),
+    claim("invalid", "big.log", pattern=r"unbalanced(("),
+]
+engine = DriftEngine(str(scratch))
+scans = []
+real_scan = drift_engine.scan_content
+drift_engine.scan_content = lambda path, keys: (scans.append(list(keys)), real_scan(path, keys))[1]
+try:
+    engine.evaluate_claims(claims)
+finally:
+    drift_engine.scan_content = real_scan
+by_id = {c.id: c for c in claims}
+
+for name in ("page", "block", "far"):
+    line = next(l for l in text.splitlines() if planted[name].decode() in l).strip()
+    check(by_id[name].status.value == "PASS" and by_id[name].evidence.endswith(line[:200]),
+          f"a match straddling the {name} boundary passes and reports its whole line")
+check(by_id["tail"].status.value == "PASS" and by_id["tail"].evidence.endswith("without newline"),
+      "non-ASCII literals match on the last, unterminated line")
+check(by_id["missing"].status.value == "FAIL", "a pattern absent from the file fails")
+check(by_id["invalid"].status.value != "PASS" and all(by_id[c].status.value == "PASS" for c in planted),
+      "an invalid pattern fails only its own claim")
+check(len(scans) == 1 and len(scans[0]) == len(claims), f"one scan answers every claim on the file ({len(scans)} scans)")
+
+(scratch / "empty.txt").write_bytes(b"")
+empty = claim("empty", "empty.txt", expected="anything")
+engine.evaluate_claim(empty)
+check(empty.status.value == "FAIL", "an empty file cannot be mapped and simply does not match")
+PYEOF
+)"
+content_rc=$?
+set -e
+rm -rf "$probe_dir"
+
+if [ "$content_rc" -ne 0 ]; then
+  fail "content smoke script crashed: $content_output"
+else
+  while IFS= read -r line; do
+    case "$line" in
+      PASS\ *) pass "${line#PASS }" ;;
+      FAIL\ *) fail "${line#FAIL }" ;;
+    esac
+  done <<< "$content_output"
+fi
+
+echo ""
+
+# -----------------------------------------------------------------------------
+# Test 18: Kustomize node cache is invalidated by the files and directories a node read
+# -----------------------------------------------------------------------------
+echo "--- Test 18: Kustomize Cache Invalidation ---"
+
+probe_dir="$(mktemp -d)"
+set +e
+kustomize_output="$(python3 - "$REPO_ROOT" "$probe_dir" <<'PYEOF' 2>&1
+import sys
+from pathlib import Path
+
+repo_root, scratch = sys.argv[1], Path(sys.argv[2])
+sys.path.insert(0, f"{repo_root}/ai")
+sys.path.insert(0, f"{repo_root}/ai/scripts")
+from drift_engine import Claim, ClaimEvaluation, ClaimType, DriftEngine
+
+
+def check(ok, msg):
+    print(f"{'PASS' if ok else 'FAIL'} kustomize {msg}")
+
+
+tree = {
+    "cluster/kustomization.yaml": "resources:\n  - apps/web\n  - apps/db\n",
+    "cluster/apps/web/kustomization.yaml": "resources:\n  - deploy.yaml\n",
+    "cluster/apps/web/deploy.yaml": "kind: Deployment\nmetadata:\n  name: web\n",
+    "cluster/apps/db/kustomization.yaml": "resources:\n  - statefulset.yaml\n",
+    "cluster/apps/db/statefulset.yaml": "kind: StatefulSet\nmetadata:\n  name: db\n",
+}
+for rel, body in tree.items():
+    (scratch / rel).parent.mkdir(parents=True, exist_ok=True)
+    (scratch / rel).write_text(body)
+
+engine = DriftEngine(str(scratch))
+first = engine.check_kustomization("cluster")
+check(first["nodes"] == 3 and first["reparsed"] == 3 and not first["problems"], "a cold walk parses every node")
+check(engine.check_kustomization("cluster")["reparsed"] == 0, "an unchanged tree is answered from the cache")
+check(DriftEngine(str(scratch)).check_kustomization("cluster")["reparsed"] == 0,
+      "kustomize_cache.json carries node results to a new engine")
+
+(scratch / "cluster/apps/web/deploy.yaml").write_text("kind: Deployment\nmetadata: [unclosed\n")
+edited = engine.check_kustomization("cluster")
+check(edited["reparsed"] == 1, f"editing a manifest re-parses only its node ({edited['reparsed']})")
+check(any(p.startswith("cluster/apps/web/deploy.yaml: unparseable") for p in edited["problems"]),
+      "the broken manifest is reported")
+
+(scratch / "cluster/apps/db/kustomization.yaml").write_text("resources:\n  - statefulset.yaml\n  - service.yaml\n")
+grown = engine.check_kustomization("cluster")
+check(grown["reparsed"] == 1 and "cluster/apps/db/kustomization.yaml: missing service.yaml" in grown["problems"],
+      "a new reference re-parses its kustomization and reports the missing file")
+(scratch / "cluster/apps/db/service.yaml").write_text("kind: Service\nmetadata:\n  name: db\n")
+healed = engine.check_kustomization("cluster")
+check(healed["reparsed"] == 1 and not any("service.yaml" in p for p in healed["problems"]),
+      "creating the missing file invalidates the node that reported it")
+
+(scratch / "cluster/apps/web/deploy.yaml").write_text(tree["cluster/apps/web/deploy.yaml"])
+claim = Claim(id="k", type=ClaimType.STRUCTURAL, source="smoke", section="smoke", text="k",
+              evaluation=ClaimEvaluation(method="kustomize_resolves", target="cluster"))
+engine.evaluate_claim(claim)
+check(claim.status.value == "PASS", f"the repaired tree resolves: {claim.evidence}")
+PYEOF
+)"
+kustomize_rc=$?
+set -e
+rm -rf "$probe_dir"
+
+if [ "$kustomize_rc" -ne 0 ]; then
+  fail "kustomize smoke script crashed: $kustomize_output"
+else
+  while IFS= read -r line; do
+    case "$line" in
+      PASS\ *) pass "${line#PASS }" ;;
+      FAIL\ *) fail "${line#FAIL }" ;;
+    esac
+  done <<< "$kustomize_output"
+fi
+
+echo ""
+
+# -----------------------------------------------------------------------------
+# Test 19: yaml_tree_valid parses a changed batch in a process pool and reports only invalid files
+# -----------------------------------------------------------------------------
+echo "--- Test 19: Pooled YAML Validation ---"
+
+probe_dir="$(mktemp -d)"
+set +e
+yaml_tree_output="$(python3 - "$REPO_ROOT" "$probe_dir" <<'PYEOF' 2>&1
+import os, sys
+from pathlib import Path
+
+repo_root, scratch = sys.argv[1], Path(sys.argv[2])
+sys.path.insert(0, f"{repo_root}/ai")
+sys.path.insert(0, f"{repo_root}/ai/scripts")
+import drift_engine
+from drift_engine import YAML_TREE_EVIDENCE_FILES, YAML_TREE_POOL_MIN, Claim, ClaimEvaluation, ClaimType, DriftEngine
+
+
+def check(ok, msg):
+    print(f"{'PASS' if ok else 'FAIL'} yaml_tree {msg}")
+
+
+pools = []
+
+
+class CountingPool(drift_engine.ProcessPoolExecutor):
+    def __init__(self, *args, **kwargs):
+        pools.append(kwargs.get("max_workers"))
+        super().__init__(*args, **kwargs)
+
+
+count = YAML_TREE_POOL_MIN + 4
+for n in range(count):
+    app = scratch / f"cluster/apps/app{n % 3}"
+    app.mkdir(parents=True, exist_ok=True)
+    (app / f"m{n:02d}.yaml").write_text(f"kind: ConfigMap\nmetadata:\n  name: cm{n}\n---\nkind: Service\n")
+(scratch / "cluster/apps/app1/m07.yaml").write_text("kind: ConfigMap\ndata: {unclosed\n")
+
+drift_engine.ProcessPoolExecutor = CountingPool
+drift_engine.YAML_TREE_WORKERS = 2
+engine = DriftEngine(str(scratch))
+cold = engine.check_yaml_tree("cluster/**/*.yaml")
+check(pools == [2], f"{count} changed files are parsed in a process pool ({pools})")
+check(cold["files"] == count and cold["parsed"] == count, "every file is parsed on the first pass")
+check(list(cold["errors"]) == ["cluster/apps/app1/m07.yaml"], f"only the invalid file is reported: {list(cold['errors'])}")
+
+drift_engine.YAML_TREE_WORKERS = 1
+engine.yaml_tree_cache_file.unlink()
+serial = engine.check_yaml_tree("cluster/**/*.yaml")
+check(serial["errors"] == cold["errors"], "in-process parsing reports the same errors as the pool")
+
+warm = engine.check_yaml_tree("cluster/**/*.yaml")
+check(warm["rehashed"] == 0 and warm["errors"] == cold["errors"], "unchanged stamps skip reading, errors are kept")
+touched = scratch / "cluster/apps/app1/m07.yaml"
+os.utime(touched, ns=(touched.stat().st_atime_ns, touched.stat().st_mtime_ns + 10**9))
+retouched = engine.check_yaml_tree("cluster/**/*.yaml")
+check(retouched["rehashed"] == 1 and retouched["parsed"] == 0 and retouched["errors"] == cold["errors"],
+      "a touched file with the same content hash is not parsed again")
+
+for n in range(YAML_TREE_EVIDENCE_FILES + 2):
+    (scratch / f"cluster/apps/app0/broken{n}.yaml").write_text("- [\n")
+claim = Claim(id="tree", type=ClaimType.STRUCTURAL, source="smoke", section="smoke", text="tree",
+              evaluation=ClaimEvaluation(method="yaml_tree_valid", target="cluster/**/*.yaml"))
+engine.evaluate_claim(claim)
+check(claim.status.value == "FAIL" and claim.evidence.endswith("; +3 more"),
+      f"evidence lists {YAML_TREE_EVIDENCE_FILES} failures and counts the rest")
+PYEOF
+)"
+yaml_tree_rc=$?
+set -e
+rm -rf "$probe_dir"
+
+if [ "$yaml_tree_rc" -ne 0 ]; then
+  fail "yaml_tree smoke script crashed: $yaml_tree_output"
+else
+  while IFS= read -r line; do
+    case "$line" in
+      PASS\ *) pass "${line#PASS }" ;;
+      FAIL\ *) fail "${line#FAIL }" ;;
+    esac
+  done <<< "$yaml_tree_output"
+fi
+
+echo ""
+
+# -----------------------------------------------------------------------------
+# Test 20: tcp_reachable connects once per port and reuses tcp_cache.json within the TTL
+# -----------------------------------------------------------------------------
+echo "--- Test 20: TCP Reachability Cache ---"
+
+probe_dir="$(mktemp -d)"
+set +e
+tcp_cache_output="$(python3 - "$REPO_ROOT" "$probe_dir" <<'PYEOF' 2>&1
+import json, socket, sys, threading, time
+from pathlib import Path
+
+repo_root, scratch = sys.argv[1], Path(sys.argv[2])
+sys.path.insert(0, f"{repo_root}/ai")
+sys.path.insert(0, f"{repo_root}/ai/scripts")
+import drift_engine
+from drift_engine import Claim, ClaimEvaluation, ClaimType, DriftEngine
+
+
+def check(ok, msg):
+    print(f"{'PASS' if ok else 'FAIL'} tcp_cache {msg}")
+
+
+listener = socket.socket()
+listener.bind(("127.0.0.1", 0))
+listener.listen(16)
+open_port = listener.getsockname()[1]
+accepted = []
+
+
+def accept_loop():
+    while True:
+        try:
+            conn, _ = listener.accept()
+        except OSError:
+            return
+        accepted.append(time.time())
+        conn.close()
+
+
+threading.Thread(target=accept_loop, daemon=True).start()
+spare = socket.socket()
+spare.bind(("127.0.0.1", 0))
+closed_port = spare.getsockname()[1]
+spare.close()
+
+
+def claims():
+    return [Claim(id="node", type=ClaimType.OPERATIONAL, source="smoke", section="smoke", text="node",
+                  evaluation=ClaimEvaluation(method="tcp_reachable", target="127.0.0.1",
+                                             ports=[open_port, closed_port], timeout=2)),
+            Claim(id="api", type=ClaimType.OPERATIONAL, source="smoke", section="smoke", text="api",
+                  evaluation=ClaimEvaluation(method="tcp_reachable", target=f"127.0.0.1:{open_port}", timeout=2))]
+
+
+def settle():
+    time.sleep(0.2)  # let the accept loop catch up
+    return len(accepted)
+
+
+first = DriftEngine(str(scratch)).evaluate_claims(claims())
+check(settle() == 1, f"a port shared by two claims is connected to once per pass ({len(accepted)})")
+check([c.status.value for c in first] == ["FAIL", "PASS"], "open and closed ports are told apart")
+cache = json.loads((scratch / "ai/state/tcp_cache.json").read_text())
+check(set(cache) == {f"127.0.0.1:{open_port}", f"127.0.0.1:{closed_port}"}, "both ports are cached in tcp_cache.json")
+
+second = DriftEngine(str(scratch)).evaluate_claims(claims())
+check(settle() == 1, "a new engine within the TTL answers from tcp_cache.json without connecting")
+check([c.status.value for c in second] == ["FAIL", "PASS"] and "cached" in second[1].evidence,
+      "cached answers keep the status and say they are cached")
+
+single = claims()[1]
+DriftEngine(str(scratch)).evaluate_claim(single)
+check(settle() == 1 and single.status.value == "PASS", "evaluating one claim outside a pass also reads the cache")
+
+drift_engine.TCP_CACHE_TTL = 0
+DriftEngine(str(scratch)).evaluate_claims(claims())
+check(settle() == 2, "an expired entry is probed again")
+listener.close()
+PYEOF
+)"
+tcp_cache_rc=$?
+set -e
+rm -rf "$probe_dir"
+
+if [ "$tcp_cache_rc" -ne 0 ]; then
+  fail "tcp_cache smoke script crashed: $tcp_cache_output"
+else
+  while IFS= read -r line; do
+    case "$line" in
+      PASS\ *) pass "${line#PASS }" ;;
+      FAIL\ *) fail "${line#FAIL }" ;;
+    esac
+  done <<< "$tcp_cache_output"
+fi
+
+echo ""
+
 # -----------------------------------------------------------------------------
 # Summary
 # -----------------------------------------------------------------------------
@@ -406,7 +406,15 @@ printf '\n-- Python compile checks --\n'
 if [ "$HAS_PYTHON" -eq 1 ]; then
   PY_FILES=(
     "ai/scripts/backlog_summary.py"
+    "ai/scripts/backlog_engine.py"
+    "ai/scripts/yaml_io.py"
+    "ai/scripts/state_toolkit.py"
+    "ai/scripts/metrics_store.py"
+    "ai/scripts/error_classifier.py"
+    "ai/scripts/net_probe.py"
     "ai/scripts/executor/run_summary.py"
+    "ai/scripts/executor/run_history.py"
+    "ai/scripts/executor/parallel_dispatch.py"
     "ai/scripts/executor/stage1_backlog_sync.py"
   )
   for file in "${PY_FILES[@]}"; do
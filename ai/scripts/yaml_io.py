@@ -0,0 +1,320 @@
+"""
+Shared YAML I/O for the orchestrator scripts and drift engine.
+
+- Uses libyaml (CSafeLoader/CSafeDumper) when PyYAML was built with it and
+  falls back to the pure-Python SafeLoader/SafeDumper otherwise; documents
+  and emitted YAML are the same either way.
+- load() caches parsed documents per path keyed by (mtime_ns, size, inode),
+  so repeated reads in one process (watch loop, gating, dispatch) skip the
+  parse while the file is unchanged. Cached objects are shared: callers that
+  mutate the result pass copy=True or cache=False.
+- Patch-style writes for top-level block sequences such as ai/backlog.yaml:
+  update_entry() re-emits only the `- id: X` item it changes and
+  insert_entries() splices new items in at their sorted position. The rest
+  of the file, comments and blank lines between items included, is kept
+  byte for byte; files that are not a block sequence (flow style, mapping
+  at the top) and items with comments inside them fall back to a full dump.
+"""
+
+from __future__ import annotations
+
+import copy as copy_module
+import functools
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import yaml
+
+try:
+    from yaml import CSafeDumper as SafeDumper, CSafeLoader as SafeLoader
+    LIBYAML = True
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeDumper, SafeLoader  # type: ignore[assignment]
+    LIBYAML = False
+
+YAMLError = yaml.YAMLError
+
+# Files modified within this window may change again inside the same mtime
+# tick, so they are parsed but not cached.
+RACY_NS = 2_000_000_000
+
+# A top-level block sequence item starts with "- " (or a bare "-") in column 0.
+ITEM_START_RE = re.compile(r"^-(?: |$)", re.M)
+# Anything else in column 0 (a mapping key, a flow collection) means the
+# document is not a plain block sequence.
+NON_ITEM_LINE_RE = re.compile(r"^[^\s#-]", re.M)
+# Anchors/aliases can tie items together; such files are rewritten whole.
+ALIAS_RE = re.compile(r"(?:^|\s)[&*][\w-]+", re.M)
+# A comment starts at a '#' that opens a line or follows whitespace.
+COMMENT_RE = re.compile(r"(?:^|(?<=\s))#.*$", re.M)
+# Top-level keys of an item as emitted by safe_dump: "- key: v" then "  key: v".
+ITEM_KEY_RE = re.compile(r"^(?:- |  )([A-Za-z_][\w-]*):(?: (.*))?$", re.M)
+
+_cache: Dict[str, Tuple[Tuple[int, int, int], Any]] = {}
+
+PathLike = Union[str, Path]
+Patch = Union[Dict[str, Any], Callable[[Dict[str, Any]], Any]]
+
+
+def loads(text: str) -> Any:
+    return yaml.load(text, Loader=SafeLoader)
+
+
+def loads_all(text: str) -> List[Any]:
+    """Every document of a multi-document stream (Kubernetes manifests)."""
+    return list(yaml.load_all(text, Loader=SafeLoader))
+
+
+def dumps(data: Any, sort_keys: bool = False) -> str:
+    return yaml.dump(data, Dumper=SafeDumper, sort_keys=sort_keys, default_flow_style=False, allow_unicode=False)
+
+
+def _stamp(st: os.stat_result) -> Tuple[int, int, int]:
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def load(path: PathLike, default: Any = None, *, cache: bool = True, copy: bool = False) -> Any:
+    """Parse a YAML file; returns default when it is missing or empty."""
+    key = os.path.abspath(path)
+    try:
+        st = os.stat(key)
+    except FileNotFoundError:
+        _cache.pop(key, None)
+        return default
+    stamp = _stamp(st)
+    hit = _cache.get(key) if cache else None
+    if hit is not None and hit[0] == stamp:
+        data, shared = hit[1], True
+    else:
+        with open(key, encoding="utf-8") as fh:
+            data = loads(fh.read())
+        shared = cache and time.time_ns() - st.st_mtime_ns > RACY_NS
+        if shared:
+            _cache[key] = (stamp, data)
+        else:
+            _cache.pop(key, None)
+    if data is None:
+        return default
+    return copy_module.deepcopy(data) if copy and shared else data
+
+
+def invalidate(path: PathLike) -> None:
+    _cache.pop(os.path.abspath(path), None)
+
+
+def write_text(path: PathLike, text: str) -> None:
+    """Atomic replace: write a sibling temp file and rename it over the target."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(text)
+    os.replace(tmp, path)
+    invalidate(path)
+
+
+def dump(path: PathLike, data: Any, sort_keys: bool = False) -> None:
+    write_text(path, dumps(data, sort_keys=sort_keys))
+
+
+# ----------------------------------------------------------------------------
+# Patch-style writes on top-level block sequences
+# ----------------------------------------------------------------------------
+
+def item_spans(text: str) -> List[Tuple[int, int]]:
+    """
+    (start, end) offsets of each top-level sequence item; [] if items cannot
+    be patched independently. An item ends with its last content line:
+    blank and comment lines before the next item (section headers) are
+    left outside every span.
+    """
+    if NON_ITEM_LINE_RE.search(text) or ALIAS_RE.search(text):
+        return []
+    starts = [m.start() for m in ITEM_START_RE.finditer(text)]
+    spans = []
+    for start, end in zip(starts, starts[1:] + [len(text)]):
+        while True:
+            line_start = text.rfind("\n", start, end - 1) + 1
+            line = text[line_start:end].strip()
+            if line_start <= start or (line and not line.startswith("#")):
+                break
+            end = line_start
+        spans.append((start, end))
+    return spans
+
+
+def has_comments(block: str) -> bool:
+    """Whether an item carries comments, which re-emitting it would drop."""
+    if "#" not in block:
+        return False
+    stripped = COMMENT_RE.sub("", block)
+    if stripped == block:
+        return False
+    # A '#' inside a quoted or block scalar is content: stripping it changes the value
+    try:
+        return loads(stripped) == loads(block)
+    except YAMLError:
+        return False
+
+
+@functools.lru_cache(maxsize=4096)
+def _scalar(raw: str) -> Any:
+    try:
+        value = loads(raw)
+    except YAMLError:
+        return None
+    return None if isinstance(value, (dict, list)) else value
+
+
+def item_fields(block: str) -> Dict[str, Any]:
+    """Top-level scalar fields of one item (first line of each value), without parsing the item."""
+    fields: Dict[str, Any] = {}
+    for match in ITEM_KEY_RE.finditer(block):
+        name, raw = match.group(1), match.group(2)
+        # A later duplicate key wins, as in YAML; block values are not scalars.
+        value = _scalar(raw) if raw is not None else None
+        if value is None:
+            fields.pop(name, None)
+        else:
+            fields[name] = value
+    return fields
+
+
+def item_value(block: str, key: str) -> Any:
+    """One top-level scalar field of an item (same rules as item_fields)."""
+    value = None
+    for match in re.finditer(rf"^(?:- |  ){re.escape(key)}:(?: (.*))?$", block, re.M):
+        raw = match.group(1)
+        value = _scalar(raw) if raw is not None else None
+    return value
+
+
+def _read(path: Path) -> str:
+    try:
+        return path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return ""
+
+
+def find_entry(path: PathLike, value: Any, key: str = "id") -> Optional[Dict[str, Any]]:
+    """Parse only the item whose `key` equals value (whole file when items cannot be split)."""
+    text = _read(Path(path))
+    spans = item_spans(text)
+    for start, end in spans:
+        block = text[start:end]
+        if item_value(block, key) == value:
+            parsed = loads(block)
+            return parsed[0] if isinstance(parsed, list) and parsed else None
+    if spans or not text.strip():
+        return None
+    data = loads(text)
+    for entry in data if isinstance(data, list) else []:
+        if isinstance(entry, dict) and entry.get(key) == value:
+            return entry
+    return None
+
+
+def update_entry(path: PathLike, value: Any, patch: Patch, key: str = "id") -> Optional[Dict[str, Any]]:
+    """
+    Update one item in place and re-emit only that item (the whole file when
+    the item has comments of its own, which a re-emit would lose anyway).
+
+    patch is a dict merged into the entry or a callable that edits it; a
+    callable returning False leaves the file untouched. Returns the updated
+    entry, or None when no item matched (or the callable declined).
+    """
+    path = Path(path)
+    text = _read(path)
+    spans = item_spans(text)
+    for start, end in spans:
+        block = text[start:end]
+        if item_value(block, key) != value:
+            continue
+        parsed = loads(block)
+        if not (isinstance(parsed, list) and len(parsed) == 1 and isinstance(parsed[0], dict)):
+            break
+        if has_comments(block):
+            break
+        entry = parsed[0]
+        if callable(patch):
+            if patch(entry) is False:
+                return None
+        else:
+            entry.update(patch)
+        write_text(path, text[:start] + dumps([entry]) + text[end:])
+        return entry
+    else:
+        if spans:
+            return None
+    # Not a block sequence: fall back to a full parse and dump.
+    data = loads(text) if text.strip() else None
+    if not isinstance(data, list):
+        return None
+    for entry in data:
+        if isinstance(entry, dict) and entry.get(key) == value:
+            if callable(patch):
+                if patch(entry) is False:
+                    return None
+            else:
+                entry.update(patch)
+            dump(path, data)
+            return entry
+    return None
+
+
+def insert_entries(path: PathLike, entries: Iterable[Dict[str, Any]],
+                   sort_key: Optional[Callable[[Dict[str, Any]], Any]] = None) -> None:
+    """
+    Add items to a top-level sequence without re-emitting existing ones.
+
+    With sort_key, each new item goes before the first existing item whose
+    key (computed from its top-level scalar fields) sorts after it;
+    otherwise items are appended.
+    """
+    path = Path(path)
+    new = list(entries)
+    if not new:
+        return
+    if sort_key is not None:
+        new.sort(key=sort_key)
+    text = _read(path)
+    spans = item_spans(text)
+    if not spans:
+        data = loads(text) if text.strip() else None
+        if data is None:
+            data = []
+        elif not isinstance(data, list):
+            raise ValueError(f"{path} is not a YAML sequence")
+        data.extend(new)
+        if sort_key is not None:
+            data.sort(key=lambda e: sort_key(e) if isinstance(e, dict) else sort_key({}))
+        dump(path, data)
+        return
+
+    if text and not text.endswith("\n"):
+        text += "\n"
+        if spans[-1][1] == len(text) - 1:
+            spans[-1] = (spans[-1][0], len(text))
+    inserts: Dict[int, List[str]] = {}
+    existing_keys = [sort_key(item_fields(text[s:e])) for s, e in spans] if sort_key is not None else []
+    for entry in new:
+        offset = len(text)
+        if sort_key is not None:
+            entry_key = sort_key(entry)
+            for index, existing in enumerate(existing_keys):
+                if existing > entry_key:
+                    # Right after the previous item, so a header comment stays with its item
+                    offset = spans[index - 1][1] if index else spans[0][0]
+                    break
+        inserts.setdefault(offset, []).append(dumps([entry]))
+    parts = []
+    cursor = 0
+    for offset in sorted(inserts):
+        parts.append(text[cursor:offset])
+        parts.extend(inserts[offset])
+        cursor = offset
+    parts.append(text[cursor:])
+    write_text(path, "".join(parts))